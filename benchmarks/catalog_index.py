@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+BTR Catalog Index - ToolCatalog versus the former dict-of-dicts all_tools
+
+Builds both structures from the same synthetic tools/list answers (many
+servers, a limited pool of input schemas as real servers tend to have,
+unique descriptions) and compares retained memory and lookup times:
+
+    count      tools of one server (/api/status by_server)
+    glob       "server__get_*" pattern expansion (presets, PATCH /api/current)
+    prefix     names starting with a prefix (/api/tools?prefix=)
+    hint       tools annotated readOnlyHint
+
+Usage:
+    python benchmarks/catalog_index.py
+    python benchmarks/catalog_index.py --tools 10000 --servers 20 --schemas 50
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from harness import GATEWAY_DIR, print_table_rows
+
+sys.path.insert(0, str(GATEWAY_DIR))
+from catalog import ToolCatalog  # noqa: E402
+
+VERBS = ["get", "list", "create", "update", "delete", "search"]
+
+
+def make_answers(tools: int, servers: int, schemas: int, seed: int = 7) -> dict[str, str]:
+    """Synthetic tools/list results per server, as raw JSON (as received from upstreams)"""
+    rng = random.Random(seed)
+    schema_pool = [
+        {
+            "type": "object",
+            "properties": {
+                f"arg_{j}": {"type": rng.choice(["string", "integer", "boolean"]), "description": f"Argument {j}"}
+                for j in range(rng.randint(1, 6))
+            },
+            "required": ["arg_0"]
+        }
+        for _ in range(schemas)
+    ]
+    answers = {}
+    per_server = tools // servers
+    for s in range(servers):
+        server_tools = []
+        for i in range(per_server):
+            verb = VERBS[i % len(VERBS)]
+            tool = {
+                "name": f"{verb}_item_{i:05d}",
+                "description": f"{verb.title()} item {i} on server {s}: synthetic tool for index benchmarks",
+                "inputSchema": rng.choice(schema_pool),
+            }
+            if verb in ("get", "list", "search"):
+                tool["annotations"] = {"readOnlyHint": True}
+            server_tools.append(tool)
+        answers[f"srv{s:02d}"] = json.dumps(server_tools)
+    return answers
+
+
+def build_legacy(answers: dict[str, str]) -> dict[str, dict]:
+    """all_tools as it was: prefixed name -> {server, original_name, schema}"""
+    all_tools = {}
+    for server, raw in answers.items():
+        for tool in json.loads(raw):
+            all_tools[f"{server}__{tool['name']}"] = {
+                "server": server,
+                "original_name": tool["name"],
+                "schema": tool
+            }
+    return all_tools
+
+
+def build_catalog(answers: dict[str, str]) -> ToolCatalog:
+    catalog = ToolCatalog()
+    for server, raw in answers.items():
+        catalog.replace_server(server, json.loads(raw))
+    catalog.sorted_names()
+    return catalog
+
+
+def retained_kb(build: Callable, answers: dict[str, str]):
+    """Memory still allocated after building (the structure is kept alive)"""
+    gc.collect()
+    tracemalloc.start()
+    structure = build(answers)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return structure, current / 1024
+
+
+def time_us(fn: Callable, repeat: int) -> float:
+    """Median wall time in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main(argv: Optional[list[str]] = None):
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="ToolCatalog versus dict-of-dicts")
+    parser.add_argument("--tools", type=int, default=10000, help="Total tools")
+    parser.add_argument("--servers", type=int, default=20, help="Servers sharing the tools")
+    parser.add_argument("--schemas", type=int, default=50, help="Distinct input schemas")
+    parser.add_argument("--repeat", type=int, default=50, help="Samples per lookup")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    answers = make_answers(args.tools, args.servers, args.schemas)
+    server = "srv03"
+    pattern = f"{server}__get_*"
+    prefix = f"{server}__search_"
+
+    legacy, legacy_kb = retained_kb(build_legacy, answers)
+    catalog, catalog_kb = retained_kb(build_catalog, answers)
+
+    def catalog_prefix():
+        names = catalog.sorted_names()
+        lo, hi = catalog.prefix_range(names, prefix)
+        return names[lo:hi]
+
+    rows = [
+        {
+            "structure": "dict-of-dicts",
+            "tools": len(legacy),
+            "memory_kb": round(legacy_kb, 1),
+            "count_us": round(time_us(lambda: len([t for t in legacy.values() if t["server"] == server]), args.repeat), 1),
+            "glob_us": round(time_us(lambda: fnmatch.filter(legacy, pattern), args.repeat), 1),
+            "prefix_us": round(time_us(lambda: [n for n in sorted(legacy) if n.startswith(prefix)], args.repeat), 1),
+            "hint_us": round(time_us(lambda: [
+                n for n, t in legacy.items() if t["schema"].get("annotations", {}).get("readOnlyHint")
+            ], args.repeat), 1),
+        },
+        {
+            "structure": "ToolCatalog",
+            "tools": len(catalog),
+            "memory_kb": round(catalog_kb, 1),
+            "count_us": round(time_us(lambda: catalog.count(server), args.repeat), 1),
+            "glob_us": round(time_us(lambda: catalog.match(pattern), args.repeat), 1),
+            "prefix_us": round(time_us(catalog_prefix, args.repeat), 1),
+            "hint_us": round(time_us(lambda: catalog.with_annotation("readOnlyHint"), args.repeat), 1),
+        },
+    ]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
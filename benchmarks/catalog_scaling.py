@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+BTR Catalog Scaling - Measures gateway hot paths against synthetic catalogs
+
+Discovers a fake server advertising N tools (stdio transport), enables all
+of them, then times the catalog-dependent paths in-process:
+
+    discovery        router.discover_tools()
+    tools/list       POST /mcp tools/list
+    /api/tools       GET /api/tools
+    /api/status      GET /api/status
+
+Usage:
+    python benchmarks/catalog_scaling.py                 # 100, 1000, 10000 tools
+    python benchmarks/catalog_scaling.py --sizes 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from harness import FakeServerSpec, import_gateway, print_table_rows, write_server_config
+
+
+async def time_request(client: httpx.AsyncClient, method: str, path: str, body: Optional[dict], repeat: int) -> float:
+    """Median wall time in milliseconds for a request"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if method == "GET":
+            response = await client.get(path)
+        else:
+            response = await client.post(path, json=body)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def measure(main, workdir: Path, size: int, repeat: int) -> dict:
+    """Discover a catalog of the given size and time the hot paths"""
+    router = main.router
+    tool_state = main.tool_state
+
+    # Reset the router to a single fake server of this size
+    shutil.rmtree(workdir / "servers", ignore_errors=True)
+    spec = FakeServerSpec(name="fake", tools=size)
+    write_server_config(workdir / "servers", spec)
+    router.servers.clear()
+    for name in router.all_tools.servers():
+        router.all_tools.remove_server(name)
+    router._transports.clear()
+    router._load_servers()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    await router.discover_tools()
+    discovery_ms = (time.perf_counter() - start) * 1000
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    catalog_bytes = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    tool_state.set_tools(spec.tool_names())
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tools_list = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        return {
+            "tools": len(router.all_tools),
+            "discovery_ms": round(discovery_ms, 1),
+            "catalog_kb": round(catalog_bytes / 1024, 1),
+            "tools_list_ms": round(await time_request(client, "POST", "/mcp", tools_list, repeat), 2),
+            "api_tools_ms": round(await time_request(client, "GET", "/api/tools", None, repeat), 2),
+            "api_tools_page_ms": round(
+                await time_request(client, "GET", "/api/tools?limit=100&q=tool_", None, repeat), 2
+            ),
+            "api_status_ms": round(await time_request(client, "GET", "/api/status", None, repeat), 2),
+        }
+
+
+async def run(sizes: list[int], repeat: int) -> list[dict]:
+    """Run the scaling measurements for every size"""
+    workdir = Path(tempfile.mkdtemp(prefix="btr-catalog-"))
+    try:
+        main = import_gateway(workdir, transport_mode="local")
+        return [await measure(main, workdir, size, repeat) for size in sizes]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv: Optional[list[str]] = None):
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="Synthetic catalog scaling benchmark")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=10, help="Samples per measurement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = asyncio.run(run([int(s) for s in args.sizes.split(",")], args.repeat))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
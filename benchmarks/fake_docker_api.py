@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Fake Docker API - Docker Engine API stand-in for container pausing and stats
+
+Serves the part of the Engine API the gateway uses to pause idle MCP
+containers, over a unix socket like /var/run/docker.sock:
+
+    GET  /_ping
+    GET  /containers/{name}/json      State.Running / State.Paused
+    GET  /containers/{name}/stats     Synthetic memory, CPU and pids stats
+    POST /containers/{name}/pause     204, 409 if already paused
+    POST /containers/{name}/unpause   204, 409 if not paused
+
+Tunables:
+    --socket      Unix socket path to listen on
+    --containers  Comma-separated container names that exist
+    --pause-ms    Added latency for pause
+    --resume-ms   Added latency for unpause (what the gateway measures)
+
+Examples:
+    python benchmarks/fake_docker_api.py --socket /tmp/docker.sock --containers github-mcp --resume-ms 40 &
+    BTR_CONTAINER_PAUSE=true BTR_DOCKER_SOCKET=/tmp/docker.sock uvicorn main:app
+    curl --unix-socket /tmp/docker.sock http://docker/containers/github-mcp/json
+"""
+import argparse
+import json
+import os
+import re
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler
+
+CONTAINER_PATH = re.compile(r"^/containers/([^/]+)/(json|stats|pause|unpause)$")
+
+# Synthetic stats: memory use and CPU time grow with each stats call
+STATS_MEMORY = 64 * 1024 * 1024
+STATS_CPU_NS = 50_000_000
+
+
+@dataclass
+class FakeDockerOptions:
+    """Behaviour knobs for the fake Docker API"""
+    containers: list[str] = field(default_factory=list)
+    pause_ms: float = 0.0
+    resume_ms: float = 0.0
+
+
+class FakeDocker:
+    """Container states and their transitions"""
+
+    def __init__(self, options: FakeDockerOptions):
+        self.options = options
+        self.paused = {name: False for name in options.containers}
+        self.calls: list[tuple[str, str]] = []
+        self.stats_calls = {name: 0 for name in options.containers}
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str) -> tuple[int, dict]:
+        """
+        Handle one API call.
+
+        Returns:
+            (HTTP status, JSON body or {} for no content)
+        """
+        if path == "/_ping":
+            return 200, {}
+
+        match = CONTAINER_PATH.match(path.split("?")[0])
+        if not match:
+            return 404, {"message": f"page not found: {path}"}
+        name, action = match.groups()
+        if name not in self.paused:
+            return 404, {"message": f"No such container: {name}"}
+
+        with self._lock:
+            self.calls.append((action, name))
+            if action == "json" and method == "GET":
+                return 200, {
+                    "Name": f"/{name}",
+                    "State": {
+                        "Status": "paused" if self.paused[name] else "running",
+                        "Running": True,
+                        "Paused": self.paused[name]
+                    }
+                }
+            if action == "stats" and method == "GET":
+                self.stats_calls[name] += 1
+                count = self.stats_calls[name]
+                return 200, {
+                    "memory_stats": {"usage": STATS_MEMORY + count * 1024 * 1024, "stats": {"inactive_file": 0}},
+                    "cpu_stats": {"cpu_usage": {"total_usage": count * STATS_CPU_NS}},
+                    "pids_stats": {"current": 4}
+                }
+            if method != "POST" or action in ("json", "stats"):
+                return 405, {"message": "method not allowed"}
+
+            pausing = action == "pause"
+            if self.paused[name] == pausing:
+                state = "already paused" if pausing else "not paused"
+                return 409, {"message": f"Container {name} is {state}"}
+
+        time.sleep((self.options.pause_ms if pausing else self.options.resume_ms) / 1000.0)
+        with self._lock:
+            self.paused[name] = pausing
+        return 204, {}
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_handler(docker: FakeDocker):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self):
+            status, body = docker.handle(self.command, self.path)
+            data = json.dumps(body).encode() if body else b""
+            self.send_response(status)
+            if data:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _respond
+        do_POST = _respond
+
+        def address_string(self):
+            return "unix"
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(socket_path: str, options: FakeDockerOptions) -> UnixHTTPServer:
+    """Start the fake API in a background thread"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = UnixHTTPServer(socket_path, make_handler(FakeDocker(options)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Docker Engine API on a unix socket")
+    parser.add_argument("--socket", default="/tmp/fake-docker.sock", help="Unix socket path")
+    parser.add_argument("--containers", default="", help="Comma-separated container names")
+    parser.add_argument("--pause-ms", type=float, default=0.0, help="Added latency for pause")
+    parser.add_argument("--resume-ms", type=float, default=0.0, help="Added latency for unpause")
+    args = parser.parse_args()
+
+    options = FakeDockerOptions(
+        containers=[name for name in args.containers.split(",") if name],
+        pause_ms=args.pause_ms,
+        resume_ms=args.resume_ms
+    )
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    server = UnixHTTPServer(args.socket, make_handler(FakeDocker(options)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Fake MCP Server - Configurable upstream for gateway benchmarks
+
+Speaks MCP JSON-RPC over stdio (one request per line, like StdioTransport
+and DockerTransport expect) or over HTTP (POST /mcp, GET /health, like
+HttpTransport expects). With --uds the same line protocol (or HTTP, with
+--http) is served on a unix socket over persistent connections, like
+UdsTransport expects. ``fake_mcp_server:handle`` is an entry point for
+InProcTransport, configured with the same flags in ``FAKE_MCP_ARGS``.
+
+Tunables:
+    --tools          Number of tools advertised by tools/list
+    --latency-ms     Mean added latency per request
+    --jitter-ms      Uniform jitter added on top of the mean latency
+    --payload-bytes  Size of the text content returned by tools/call
+    --failure-rate   Probability (0-1) that tools/call returns an error
+
+Examples:
+    echo '{"jsonrpc":"2.0","id":1,"method":"tools/list"}' | \\
+        python benchmarks/fake_mcp_server.py --tools 5
+    python benchmarks/fake_mcp_server.py --http --port 9100 --latency-ms 20
+    python benchmarks/fake_mcp_server.py --uds /tmp/fake-mcp.sock
+    FAKE_MCP_ARGS="--tools 5" BTR_TRANSPORT_MODE=inproc uvicorn main:app
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import socketserver
+import sys
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class FakeServerOptions:
+    """Behaviour knobs for the fake server"""
+    tools: int = 10
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    payload_bytes: int = 256
+    failure_rate: float = 0.0
+    seed: Optional[int] = None
+    name: str = "fake"
+
+
+class FakeMCPServer:
+    """Transport-independent JSON-RPC handler"""
+
+    def __init__(self, options: FakeServerOptions):
+        self.options = options
+        self._random = random.Random(options.seed)
+        self._tools = [self._make_tool(i) for i in range(options.tools)]
+        self._payload = ("x" * options.payload_bytes)
+
+    def _make_tool(self, index: int) -> dict:
+        """Build a synthetic tool definition"""
+        return {
+            "name": f"tool_{index:05d}",
+            "description": f"Synthetic benchmark tool #{index} served by {self.options.name}",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Free-form input"},
+                    "limit": {"type": "integer", "description": "Result limit"}
+                },
+                "required": ["query"]
+            }
+        }
+
+    def _delay(self) -> float:
+        """Seconds to sleep before answering"""
+        delay = self.options.latency_ms
+        if self.options.jitter_ms:
+            delay += self._random.uniform(0, self.options.jitter_ms)
+        return max(delay, 0.0) / 1000.0
+
+    def handle(self, request: dict) -> dict:
+        """
+        Handle a single JSON-RPC request.
+
+        Args:
+            request: JSON-RPC request dict
+
+        Returns:
+            JSON-RPC response dict
+        """
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+
+        method = request.get("method")
+        request_id = request.get("id")
+        params = request.get("params") or {}
+
+        if method == "initialize":
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": self.options.name, "version": "0.0.0"}
+            }
+        elif method == "tools/list":
+            result = {"tools": self._tools}
+        elif method == "tools/call":
+            if self._random.random() < self.options.failure_rate:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32000, "message": "Injected failure"}
+                }
+            result = {
+                "content": [{"type": "text", "text": self._payload}],
+                "isError": False,
+                "_meta": {"tool": params.get("name")}
+            }
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32601, "message": f"Method not found: {method}"}
+            }
+
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def answer_line(server: FakeMCPServer, line: str) -> dict:
+    """Answer one newline-delimited JSON-RPC request"""
+    try:
+        return server.handle(json.loads(line))
+    except json.JSONDecodeError as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32700, "message": f"Parse error: {e}"}
+        }
+
+
+def serve_stdio(server: FakeMCPServer):
+    """Answer newline-delimited JSON-RPC requests until stdin closes"""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        sys.stdout.write(json.dumps(answer_line(server, line)) + "\n")
+        sys.stdout.flush()
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_line_handler(server: FakeMCPServer) -> type:
+    """Build a handler answering request lines until the client disconnects"""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.strip()
+                if not line:
+                    continue
+                self.wfile.write(json.dumps(answer_line(server, line.decode())).encode() + b"\n")
+
+    return Handler
+
+
+def serve_uds(server: FakeMCPServer, path: str, http: bool):
+    """Serve JSON-RPC lines (or HTTP) on a unix socket until interrupted"""
+    if os.path.exists(path):
+        os.unlink(path)
+    handler = make_http_handler(server) if http else make_line_handler(server)
+    with ThreadingUnixServer(path, handler) as unix_server:
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def make_http_handler(server: FakeMCPServer) -> type:
+    """Build a keep-alive HTTP handler bound to a fake server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/health"):
+                self._send_json(200, {"status": "healthy"})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as e:
+                self._send_json(400, {"error": f"Invalid JSON: {e}"})
+                return
+            self._send_json(200, server.handle(request))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve_http(server: FakeMCPServer, host: str, port: int):
+    """Serve JSON-RPC over HTTP until interrupted"""
+    httpd = ThreadingHTTPServer((host, port), make_http_handler(server))
+    httpd.daemon_threads = True
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Configurable fake MCP server")
+    parser.add_argument("--http", action="store_true", help="Serve over HTTP instead of stdio")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind host")
+    parser.add_argument("--port", type=int, default=9100, help="HTTP bind port")
+    parser.add_argument("--uds", help="Serve on this unix socket (JSON-RPC lines, or HTTP with --http)")
+    parser.add_argument("--name", default="fake", help="Server name reported by initialize")
+    parser.add_argument("--tools", type=int, default=10, help="Number of tools to advertise")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform latency jitter")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="tools/call result size")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="tools/call error probability")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    return parser.parse_args(argv)
+
+
+def options_from_args(args: argparse.Namespace) -> FakeServerOptions:
+    """Server options from parsed command line arguments"""
+    return FakeServerOptions(
+        tools=args.tools,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        payload_bytes=args.payload_bytes,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        name=args.name
+    )
+
+
+_inproc_server: Optional[FakeMCPServer] = None
+
+
+def handle(request: dict) -> dict:
+    """InProcTransport entry point; flags are read from FAKE_MCP_ARGS on first use"""
+    global _inproc_server
+    if _inproc_server is None:
+        args = parse_args(shlex.split(os.environ.get("FAKE_MCP_ARGS", "")))
+        _inproc_server = FakeMCPServer(options_from_args(args))
+    return _inproc_server.handle(request)
+
+
+def main(argv: Optional[list[str]] = None):
+    """CLI entry point"""
+    args = parse_args(argv)
+    server = FakeMCPServer(options_from_args(args))
+
+    if args.uds:
+        serve_uds(server, args.uds, args.http)
+    elif args.http:
+        serve_http(server, args.host, args.port)
+    else:
+        serve_stdio(server)
+
+
+if __name__ == "__main__":
+    main()
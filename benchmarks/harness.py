@@ -0,0 +1,298 @@
+"""
+Benchmark harness - Shared helpers for spinning up fake servers and gateways
+"""
+import json
+import math
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+GATEWAY_DIR = REPO_DIR / "gateway"
+FAKE_SERVER = BENCH_DIR / "fake_mcp_server.py"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Samples (need not be sorted)
+        pct: Percentile in the range 0-100
+
+    Returns:
+        The percentile value, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct * len(ordered) / 100.0))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def print_table_rows(rows: list[dict]):
+    """Print a list of same-keyed dicts as an aligned table"""
+    if not rows:
+        return
+    headers = list(rows[0].keys())
+    widths = {h: max(len(h), *(len(str(r[h])) for r in rows)) for h in headers}
+    print("  ".join(h.ljust(widths[h]) for h in headers))
+    print("  ".join("-" * widths[h] for h in headers))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(widths[h]) for h in headers))
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """Ask the OS for an unused TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_socket(path: str, timeout: float = 30.0) -> bool:
+    """Poll a unix socket until it accepts a connection"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def wait_for_http(url: str, timeout: float = 30.0) -> bool:
+    """Poll a URL until it answers with a non-5xx status"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+@dataclass
+class FakeServerSpec:
+    """How to launch one fake MCP server"""
+    name: str = "fake"
+    tools: int = 10
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    payload_bytes: int = 256
+    failure_rate: float = 0.0
+    http_port: Optional[int] = None
+    uds_path: Optional[str] = None
+    inproc_pool: str = "thread"
+
+    def args(self) -> list[str]:
+        """Command line arguments shared by every transport"""
+        return [
+            "--name", self.name,
+            "--tools", str(self.tools),
+            "--latency-ms", str(self.latency_ms),
+            "--jitter-ms", str(self.jitter_ms),
+            "--payload-bytes", str(self.payload_bytes),
+            "--failure-rate", str(self.failure_rate),
+        ]
+
+    def inproc_env(self) -> dict:
+        """Gateway environment for the inproc transport (workers inherit it)"""
+        return {"FAKE_MCP_ARGS": shlex.join(self.args())}
+
+    def tool_names(self) -> list[str]:
+        """Prefixed tool names as the gateway will expose them"""
+        return [f"{self.name}__tool_{i:05d}" for i in range(self.tools)]
+
+
+def write_server_config(servers_dir: Path, spec: FakeServerSpec) -> Path:
+    """
+    Write a servers/<name>/config.json pointing at the fake server.
+
+    The local transport runs the fake server as a stdio subprocess; the
+    inproc transport imports it (with flags from FAKE_MCP_ARGS, see
+    inproc_env); the http and uds transports are only written when the
+    spec has an http_port or uds_path.
+    """
+    transports = {
+        "local": {
+            "command": [sys.executable, str(FAKE_SERVER), *spec.args()]
+        },
+        "inproc": {
+            "entry_point": f"{FAKE_SERVER.stem}:handle",
+            "sys_path": [str(BENCH_DIR)],
+            "pool": spec.inproc_pool
+        }
+    }
+    if spec.http_port:
+        transports["http"] = {"url": f"http://127.0.0.1:{spec.http_port}/mcp"}
+    if spec.uds_path:
+        transports["uds"] = {"socket": spec.uds_path}
+
+    server_dir = servers_dir / spec.name
+    server_dir.mkdir(parents=True, exist_ok=True)
+    config_file = server_dir / "config.json"
+    config_file.write_text(json.dumps({
+        "name": spec.name,
+        "description": "Fake MCP server for benchmarks",
+        "default_transport": "local",
+        "transports": transports
+    }, indent=2))
+    return config_file
+
+
+class FakeHttpServer:
+    """Run a fake MCP server over HTTP for the lifetime of a with-block"""
+
+    def __init__(self, spec: FakeServerSpec):
+        if spec.http_port is None:
+            spec.http_port = free_port()
+        self.spec = spec
+        self.proc: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "FakeHttpServer":
+        self.proc = subprocess.Popen(
+            [sys.executable, str(FAKE_SERVER), "--http", "--port", str(self.spec.http_port),
+             *self.spec.args()],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if not wait_for_http(f"http://127.0.0.1:{self.spec.http_port}/health"):
+            self.__exit__(None, None, None)
+            raise RuntimeError("Fake HTTP MCP server did not start")
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+            self.proc = None
+
+
+class FakeUdsServer:
+    """Run a fake MCP server on a unix socket for the lifetime of a with-block"""
+
+    def __init__(self, spec: FakeServerSpec):
+        if spec.uds_path is None:
+            spec.uds_path = os.path.join(tempfile.mkdtemp(prefix="btr-bench-"), f"{spec.name}.sock")
+        self.spec = spec
+        self.proc: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "FakeUdsServer":
+        self.proc = subprocess.Popen(
+            [sys.executable, str(FAKE_SERVER), "--uds", self.spec.uds_path, *self.spec.args()],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if not wait_for_socket(self.spec.uds_path):
+            self.__exit__(None, None, None)
+            raise RuntimeError("Fake unix socket MCP server did not start")
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+            self.proc = None
+
+
+@dataclass
+class GatewayProcess:
+    """Run the real gateway under uvicorn against a scratch servers/presets/data tree"""
+    transport_mode: str = "auto"
+    port: int = 0
+    env: dict = field(default_factory=dict)
+    workdir: Optional[Path] = None
+    proc: Optional[subprocess.Popen] = None
+
+    def __post_init__(self):
+        if not self.port:
+            self.port = free_port()
+        if self.workdir is None:
+            self.workdir = Path(tempfile.mkdtemp(prefix="btr-bench-"))
+        for sub in ("servers", "presets", "data"):
+            (self.workdir / sub).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def servers_dir(self) -> Path:
+        return self.workdir / "servers"
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "GatewayProcess":
+        env = dict(os.environ)
+        env.update({
+            "BTR_SERVERS_DIR": str(self.workdir / "servers"),
+            "BTR_PRESETS_DIR": str(self.workdir / "presets"),
+            "BTR_DATA_DIR": str(self.workdir / "data"),
+            "BTR_TRANSPORT_MODE": self.transport_mode,
+            "BTR_LOG_LEVEL": "WARNING",
+        })
+        env.update(self.env)
+
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app",
+             "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=GATEWAY_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        # /health answers while discovery is still running; wait for the full catalog
+        if not wait_for_http(f"{self.url}/health/ready", timeout=60.0):
+            self.__exit__(None, None, None)
+            raise RuntimeError("Gateway did not become ready")
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+            self.proc = None
+
+    def enable(self, tools: list[str]):
+        """Replace the enabled tool set via the management API"""
+        response = httpx.post(f"{self.url}/api/update", json={"tools": tools}, timeout=30.0)
+        response.raise_for_status()
+
+
+def import_gateway(workdir: Path, transport_mode: str = "local"):
+    """
+    Import the gateway modules in-process against a scratch tree.
+
+    Settings are read at import time, so the BTR_* environment has to be
+    in place before the first import.
+
+    Returns:
+        The gateway ``main`` module
+    """
+    for sub in ("servers", "presets", "data"):
+        (workdir / sub).mkdir(parents=True, exist_ok=True)
+    os.environ.update({
+        "BTR_SERVERS_DIR": str(workdir / "servers"),
+        "BTR_PRESETS_DIR": str(workdir / "presets"),
+        "BTR_DATA_DIR": str(workdir / "data"),
+        "BTR_TRANSPORT_MODE": transport_mode,
+        "BTR_LOG_LEVEL": "WARNING",
+    })
+    if str(GATEWAY_DIR) not in sys.path:
+        sys.path.insert(0, str(GATEWAY_DIR))
+
+    import main
+    return main
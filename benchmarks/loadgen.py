@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+BTR Load Generator - Drives /mcp tools/list and tools/call at fixed concurrency
+
+Standalone (against a running gateway):
+    python benchmarks/loadgen.py --url http://localhost:8090 --method tools/list
+    python benchmarks/loadgen.py --method tools/call --tool github__get_me -c 32
+
+Suite (spins up fake servers and a gateway per transport mode):
+    python benchmarks/loadgen.py --suite --modes local,http --requests 2000
+    python benchmarks/loadgen.py --suite --modes local,uds,inproc --inproc-pool process
+    python benchmarks/loadgen.py --uds /run/btr/gateway.sock --method tools/list
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import httpx
+
+from harness import (
+    FakeHttpServer, FakeServerSpec, FakeUdsServer, GatewayProcess, percentile, print_table_rows,
+    write_server_config
+)
+
+
+@dataclass
+class LoadResult:
+    """Outcome of one load run"""
+    label: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> dict:
+        """Summary statistics in milliseconds"""
+        ms = [v * 1000 for v in self.latencies]
+        return {
+            "label": self.label,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput_rps": round(self.throughput, 1),
+            "p50_ms": round(percentile(ms, 50), 2),
+            "p95_ms": round(percentile(ms, 95), 2),
+            "p99_ms": round(percentile(ms, 99), 2),
+        }
+
+
+def mcp_payload(
+    method: str,
+    tool: Optional[str] = None,
+    arguments: Optional[dict] = None,
+    priority: Optional[str] = None
+) -> Callable[[int], dict]:
+    """Build a JSON-RPC request factory for the given method"""
+    def factory(request_id: int) -> dict:
+        request = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if method == "tools/call":
+            request["params"] = {"name": tool, "arguments": arguments or {"query": "bench"}}
+            if priority:
+                request["params"]["_meta"] = {"priority": priority}
+        return request
+    return factory
+
+
+async def run_load(
+    url: str,
+    payload: Callable[[int], dict],
+    concurrency: int = 16,
+    total_requests: int = 1000,
+    warmup: int = 20,
+    label: str = "",
+    uds: Optional[str] = None
+) -> LoadResult:
+    """
+    Fire requests at a fixed concurrency and record per-request latency.
+
+    Args:
+        url: Full /mcp URL
+        payload: Factory producing the JSON-RPC body for a request id
+        concurrency: Number of requests kept in flight
+        total_requests: Requests to measure (after warmup)
+        warmup: Unmeasured requests sent first
+        label: Name for the result row
+        uds: Connect to the gateway's unix socket instead of the url's host
+
+    Returns:
+        LoadResult with latencies, error count and wall time
+    """
+    result = LoadResult(label=label)
+    counter = itertools.count(1)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits) if uds else None
+    async with httpx.AsyncClient(limits=limits, timeout=60.0, transport=transport) as client:
+        async def one(record: bool):
+            request_id = next(counter)
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload(request_id))
+                body = response.json()
+                failed = response.status_code >= 400 or "error" in body
+            except (httpx.HTTPError, json.JSONDecodeError):
+                failed = True
+            if not record:
+                return
+            if failed:
+                result.errors += 1
+            else:
+                result.latencies.append(time.perf_counter() - start)
+
+        async def worker(count: int, record: bool):
+            for _ in range(count):
+                await one(record)
+
+        def split(total: int) -> list[int]:
+            base, extra = divmod(total, concurrency)
+            return [base + (1 if i < extra else 0) for i in range(concurrency)]
+
+        await asyncio.gather(*(worker(n, False) for n in split(warmup)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n, True) for n in split(total_requests)))
+        result.elapsed = time.perf_counter() - start
+
+    return result
+
+
+async def run_suite(args: argparse.Namespace) -> list[dict]:
+    """Run tools/list and tools/call against a gateway for each transport mode"""
+    rows = []
+    for mode in args.modes.split(","):
+        spec = FakeServerSpec(
+            name="fake",
+            tools=args.tools,
+            latency_ms=args.latency_ms,
+            payload_bytes=args.payload_bytes,
+            failure_rate=args.failure_rate,
+            inproc_pool=args.inproc_pool
+        )
+        # http and uds upstreams are long-running servers; local and inproc start on demand
+        server_class = {"http": FakeHttpServer, "uds": FakeUdsServer}.get(mode)
+        upstream = server_class(spec) if server_class else None
+        if upstream:
+            upstream.__enter__()
+        try:
+            gateway = GatewayProcess(transport_mode=mode, env=spec.inproc_env())
+            write_server_config(gateway.servers_dir, spec)
+            with gateway:
+                names = spec.tool_names()
+                gateway.enable(names)
+                mcp_url = f"{gateway.url}/mcp"
+
+                for method in ("tools/list", "tools/call"):
+                    result = await run_load(
+                        mcp_url,
+                        mcp_payload(method, names[0] if names else None),
+                        concurrency=args.concurrency,
+                        total_requests=args.requests,
+                        label=f"{mode} {method}"
+                    )
+                    rows.append(result.summary())
+        finally:
+            if upstream:
+                upstream.__exit__(None, None, None)
+    return rows
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="BTR /mcp load generator")
+    parser.add_argument("--url", default="http://localhost:8090", help="Gateway base URL")
+    parser.add_argument("--uds", help="Gateway unix socket (BTR_UDS) to connect through")
+    parser.add_argument("--method", default="tools/list", choices=["tools/list", "tools/call"])
+    parser.add_argument("--tool", help="Tool name for tools/call")
+    parser.add_argument("--arguments", default='{"query": "bench"}', help="JSON arguments for tools/call")
+    parser.add_argument("--priority", choices=["high", "normal", "low"], help="Scheduling class for tools/call")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="Measured requests")
+    parser.add_argument("--suite", action="store_true", help="Run every transport mode end to end")
+    parser.add_argument("--modes", default="local,http", help="Transport modes for --suite")
+    parser.add_argument("--inproc-pool", default="thread", choices=["thread", "process"],
+                        help="Pool for the inproc mode (--suite)")
+    parser.add_argument("--tools", type=int, default=20, help="Fake server tool count (--suite)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake server latency (--suite)")
+    parser.add_argument("--payload-bytes", type=int, default=1024, help="Fake result size (--suite)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fake error rate (--suite)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None):
+    """CLI entry point"""
+    args = parse_args(argv)
+
+    if args.suite:
+        rows = asyncio.run(run_suite(args))
+    else:
+        if args.method == "tools/call" and not args.tool:
+            print("--tool is required for tools/call", file=sys.stderr)
+            sys.exit(2)
+        result = asyncio.run(run_load(
+            f"{args.url.rstrip('/')}/mcp",
+            mcp_payload(args.method, args.tool, json.loads(args.arguments), args.priority),
+            concurrency=args.concurrency,
+            total_requests=args.requests,
+            label=args.method,
+            uds=args.uds
+        ))
+        rows = [result.summary()]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
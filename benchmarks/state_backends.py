@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+BTR State Backends - Mutation throughput of the json and sqlite backends
+
+For each enabled-set size, times single-tool toggles (enable/disable) and
+full replacements that differ by one tool.
+
+Usage:
+    python benchmarks/state_backends.py
+    python benchmarks/state_backends.py --sizes 100,10000 --ops 500
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from harness import GATEWAY_DIR, print_table_rows
+
+sys.path.insert(0, str(GATEWAY_DIR))
+from state_backends import JsonStateBackend, SqliteStateBackend  # noqa: E402
+
+
+def make_backend(kind: str, workdir: Path):
+    if kind == "json":
+        return JsonStateBackend(workdir / "enabled_tools.json")
+    return SqliteStateBackend(workdir / "btr_state.db")
+
+
+def measure(kind: str, size: int, ops: int) -> dict:
+    """Time toggles and replacements against a backend holding `size` tools"""
+    workdir = Path(tempfile.mkdtemp(prefix="btr-state-"))
+    try:
+        backend = make_backend(kind, workdir)
+        tools = [f"bench__tool_{i:05d}" for i in range(size)]
+        backend.apply(add=tools, replace=True)
+
+        start = time.perf_counter()
+        for i in range(ops):
+            tool = f"bench__extra_{i % 10}"
+            backend.apply(add=[tool])
+            backend.apply(remove=[tool])
+        toggle_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(ops):
+            backend.apply(add=tools[:-1] + [f"bench__extra_{i % 10}"], replace=True)
+        replace_elapsed = time.perf_counter() - start
+
+        backend.close()
+        return {
+            "backend": kind,
+            "enabled": size,
+            "toggle_ops_s": round(2 * ops / toggle_elapsed, 1),
+            "replace_ops_s": round(ops / replace_elapsed, 1),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv: Optional[list[str]] = None):
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(description="State backend mutation benchmark")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma-separated enabled-set sizes")
+    parser.add_argument("--ops", type=int, default=200, help="Mutations per measurement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    rows = [
+        measure(kind, int(size), args.ops)
+        for size in args.sizes.split(",")
+        for kind in ("json", "sqlite")
+    ]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
 #!/usr/bin/env python3
 """
 BTR Port Checker - Detects port conflicts before starting services
+
+On Linux, listening sockets are read from /proc/net/tcp and /proc/net/tcp6
+and mapped to their owning processes through the socket inodes in
+/proc/*/fd, in a single pass and without spawning lsof/ps/ss. Elsewhere
+(or if /proc is unreadable) ports are probed with concurrent connects.
 """
+import asyncio
+import os
 import socket
-import subprocess
 import sys
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Iterable, Optional, List
+
+PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+
+# st column value for LISTEN in /proc/net/tcp
+TCP_LISTEN = "0A"
+
+# Ports below this are never proposed by --auto-allocate
+MIN_ALLOCATABLE_PORT = 1024
 
 
 @dataclass
@@ -18,6 +32,153 @@ class PortConflict:
     pid: Optional[int] = None
 
 
+# =============================================================================
+# /proc parsing
+# =============================================================================
+
+def read_listening_sockets() -> Optional[dict]:
+    """
+    Read listening TCP sockets from /proc/net/tcp and /proc/net/tcp6.
+
+    Returns:
+        {port: inode} for every socket in LISTEN state, or None if
+        /proc/net is not available (non-Linux)
+    """
+    listening = {}
+    found = False
+
+    for path in PROC_NET_TCP:
+        try:
+            with open(path) as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        found = True
+
+        # sl local_address rem_address st tx:rx tr:when retrnsmt uid timeout inode ...
+        for line in lines[1:]:
+            fields = line.split()
+            if len(fields) < 10 or fields[3] != TCP_LISTEN:
+                continue
+            port = int(fields[1].rsplit(":", 1)[1], 16)
+            inode = int(fields[9])
+            # Keep the first inode seen; either identifies the owner
+            listening.setdefault(port, inode)
+
+    return listening if found else None
+
+
+def find_socket_owners(inodes: Iterable[int]) -> dict:
+    """
+    Map socket inodes to the processes holding them.
+
+    Walks /proc/*/fd once and stops as soon as every inode is found.
+    Processes of other users are skipped unless running as root.
+
+    Returns:
+        {inode: (process_name, pid)} for the inodes that were found
+    """
+    wanted = {f"socket:[{inode}]": inode for inode in inodes}
+    owners = {}
+    if not wanted:
+        return owners
+
+    try:
+        proc_entries = os.scandir("/proc")
+    except OSError:
+        return owners
+
+    with proc_entries:
+        for entry in proc_entries:
+            if not entry.name.isdigit():
+                continue
+            fd_dir = f"/proc/{entry.name}/fd"
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+
+            for fd in fds:
+                try:
+                    target = os.readlink(f"{fd_dir}/{fd}")
+                except OSError:
+                    continue
+                inode = wanted.pop(target, None)
+                if inode is not None:
+                    pid = int(entry.name)
+                    owners[inode] = (_process_name(pid), pid)
+
+            if not wanted:
+                break
+
+    return owners
+
+
+def _process_name(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            return f.read().strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+# =============================================================================
+# Connect probing (fallback)
+# =============================================================================
+
+async def _probe_port(port: int, host: str, timeout: float, semaphore: asyncio.Semaphore) -> bool:
+    """True if something accepts connections on the port"""
+    async with semaphore:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+
+async def scan_ports(
+    ports: Iterable[int],
+    host: str = "127.0.0.1",
+    timeout: float = 0.5,
+    concurrency: int = 256
+) -> set:
+    """
+    Probe ports concurrently with TCP connects.
+
+    Returns:
+        Set of ports that accepted a connection
+    """
+    ports = list(ports)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(
+        *(_probe_port(port, host, timeout, semaphore) for port in ports)
+    )
+    return {port for port, in_use in zip(ports, results) if in_use}
+
+
+def ports_in_use(ports: Iterable[int], host: str = "127.0.0.1") -> set:
+    """
+    Find which of the given ports are in use.
+
+    Uses /proc/net when available (one read covers any range), otherwise
+    a concurrent connect scan.
+    """
+    ports = set(ports)
+    listening = read_listening_sockets()
+    if listening is not None:
+        return ports & listening.keys()
+    return asyncio.run(scan_ports(ports, host))
+
+
+# =============================================================================
+# Checks
+# =============================================================================
+
 def check_port_available(port: int, host: str = "127.0.0.1") -> bool:
     """
     Check if a port is available for binding.
@@ -26,10 +187,7 @@ def check_port_available(port: int, host: str = "127.0.0.1") -> bool:
         True if port is available, False if in use
     """
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.settimeout(1)
-            result = sock.connect_ex((host, port))
-            return result != 0  # Non-zero means connection failed = port available
+        return port not in ports_in_use([port], host)
     except Exception:
         return True  # Assume available if we can't check
 
@@ -41,59 +199,17 @@ def get_process_using_port(port: int) -> Optional[tuple]:
     Returns:
         (process_name, pid) tuple or None if not found
     """
-    try:
-        # Try lsof (Linux/Mac)
-        result = subprocess.run(
-            ["lsof", "-i", f":{port}", "-t"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            pid = int(result.stdout.strip().split()[0])
-
-            # Get process name
-            name_result = subprocess.run(
-                ["ps", "-p", str(pid), "-o", "comm="],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            process_name = name_result.stdout.strip() if name_result.returncode == 0 else "unknown"
-            return (process_name, pid)
-    except FileNotFoundError:
-        pass
-    except Exception:
-        pass
-
-    try:
-        # Try ss (Linux)
-        result = subprocess.run(
-            ["ss", "-tlnp", f"sport = :{port}"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            for line in result.stdout.split("\n"):
-                if f":{port}" in line:
-                    # Parse process info from ss output
-                    if "pid=" in line:
-                        import re
-                        match = re.search(r'pid=(\d+)', line)
-                        if match:
-                            return ("process", int(match.group(1)))
-    except FileNotFoundError:
-        pass
-    except Exception:
-        pass
-
-    return None
+    listening = read_listening_sockets()
+    if not listening or port not in listening:
+        return None
+    inode = listening[port]
+    return find_socket_owners([inode]).get(inode)
 
 
 def check_btr_ports(
     gateway_port: int = 8090,
-    ui_port: int = 5010
+    ui_port: int = 5010,
+    host: str = "127.0.0.1"
 ) -> List[PortConflict]:
     """
     Check if BTR ports are available.
@@ -101,27 +217,75 @@ def check_btr_ports(
     Returns:
         List of PortConflict objects for any ports in use
     """
-    conflicts = []
-
     ports_to_check = [
         (gateway_port, "BTR Gateway"),
         (ui_port, "BTR UI"),
     ]
 
+    listening = read_listening_sockets()
+    if listening is not None:
+        busy = {port for port, _ in ports_to_check if port in listening}
+        owners = find_socket_owners(listening[port] for port in busy)
+    else:
+        busy = asyncio.run(scan_ports([port for port, _ in ports_to_check], host))
+        owners = {}
+
+    conflicts = []
     for port, service_name in ports_to_check:
-        if not check_port_available(port):
-            process_info = get_process_using_port(port)
-            conflict = PortConflict(
-                port=port,
-                service_name=service_name,
-                process_name=process_info[0] if process_info else None,
-                pid=process_info[1] if process_info else None
-            )
-            conflicts.append(conflict)
+        if port not in busy:
+            continue
+        process_info = owners.get(listening[port]) if listening is not None else None
+        conflicts.append(PortConflict(
+            port=port,
+            service_name=service_name,
+            process_name=process_info[0] if process_info else None,
+            pid=process_info[1] if process_info else None
+        ))
 
     return conflicts
 
 
+def allocate_ports(
+    preferred: List[int],
+    host: str = "127.0.0.1",
+    max_distance: int = 100
+) -> List[int]:
+    """
+    Pick the nearest free port to each preferred port.
+
+    Candidates are tried in order of distance (p, p+1, p-1, p+2, ...) and
+    every port in the search window is checked in one scan. Returned ports
+    are distinct.
+
+    Raises:
+        RuntimeError: If no free port exists within max_distance
+    """
+    window = set()
+    for port in preferred:
+        window.update(range(
+            max(MIN_ALLOCATABLE_PORT, port - max_distance),
+            min(65535, port + max_distance) + 1
+        ))
+    taken = ports_in_use(window, host)
+
+    allocated = []
+    for port in preferred:
+        for distance in range(max_distance + 1):
+            candidates = (port + distance, port - distance) if distance else (port,)
+            choice = next(
+                (c for c in candidates
+                 if c in window and c not in taken and c not in allocated),
+                None
+            )
+            if choice is not None:
+                allocated.append(choice)
+                break
+        else:
+            raise RuntimeError(f"No free port within {max_distance} of {port}")
+
+    return allocated
+
+
 def format_conflict_message(conflicts: List[PortConflict]) -> str:
     """Format port conflicts as a user-friendly message"""
     if not conflicts:
@@ -144,15 +308,20 @@ def format_conflict_message(conflicts: List[PortConflict]) -> str:
         "  2. Change BTR ports in .env:",
         f"     BTR_GATEWAY_PORT={conflicts[0].port + 1 if conflicts[0].port == 8090 else 8090}",
         f"     BTR_UI_PORT={conflicts[0].port + 1 if conflicts[0].port == 5010 else 5010}",
+        "  3. Or pick free ports automatically: python cli/port_checker.py --auto-allocate",
     ])
 
     return "\n".join(lines)
 
 
+def _parse_range(value: str) -> range:
+    start, _, end = value.partition("-")
+    return range(int(start), int(end or start) + 1)
+
+
 def main():
     """CLI entry point"""
     import argparse
-    import os
 
     parser = argparse.ArgumentParser(
         description="Check if BTR ports are available"
@@ -169,6 +338,22 @@ def main():
         default=int(os.environ.get("BTR_UI_PORT", 5010)),
         help="UI port to check (default: 5010)"
     )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Host to probe when /proc/net is unavailable (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--scan",
+        metavar="START-END",
+        type=_parse_range,
+        help="List ports in use within a range, with owning processes"
+    )
+    parser.add_argument(
+        "--auto-allocate",
+        action="store_true",
+        help="Print the nearest free gateway and UI ports as .env lines"
+    )
     parser.add_argument(
         "--quiet",
         action="store_true",
@@ -177,7 +362,26 @@ def main():
 
     args = parser.parse_args()
 
-    conflicts = check_btr_ports(args.gateway_port, args.ui_port)
+    if args.scan:
+        busy = sorted(ports_in_use(args.scan, args.host))
+        listening = read_listening_sockets() or {}
+        owners = find_socket_owners(listening[port] for port in busy if port in listening)
+        for port in busy:
+            owner = owners.get(listening.get(port))
+            print(f"{port}\t{owner[0]} (PID {owner[1]})" if owner else f"{port}\tin use")
+        sys.exit(0)
+
+    if args.auto_allocate:
+        try:
+            gateway_port, ui_port = allocate_ports([args.gateway_port, args.ui_port], args.host)
+        except RuntimeError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"BTR_GATEWAY_PORT={gateway_port}")
+        print(f"BTR_UI_PORT={ui_port}")
+        sys.exit(0)
+
+    conflicts = check_btr_ports(args.gateway_port, args.ui_port, args.host)
 
     if conflicts:
         print(format_conflict_message(conflicts))
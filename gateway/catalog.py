@@ -0,0 +1,265 @@
+"""
+BTR Tool Catalog - Indexed store of every discovered tool
+
+Replaces the dict-of-dicts ToolRouter.all_tools. Entries are compact
+``__slots__`` objects, and identical input schemas and annotations are
+stored once and shared between entries (servers often repeat the same
+schema for many tools). Secondary indexes:
+
+    by server      server -> tool names         per-server counts in O(1)
+    sorted names   bisect over prefixed names   prefix and glob lookups in O(log n + k)
+    by annotation  hint -> tool names           readOnlyHint, destructiveHint, ...
+
+The catalog is a read-only Mapping of prefixed tool name -> ToolEntry;
+it only changes through replace_server() and remove_server().
+"""
+import bisect
+import fnmatch
+import hashlib
+import json
+import logging
+from collections.abc import Mapping
+from typing import Iterable, Iterator, Optional
+
+GLOB_CHARS = set("*?[")
+
+# Last code point, used as an exclusive upper bound for prefix ranges
+PREFIX_END = "\U0010ffff"
+
+logger = logging.getLogger(__name__)
+
+
+class ToolEntry:
+    """One tool in the catalog"""
+
+    __slots__ = ("name", "server", "original_name", "description", "input_schema", "annotations", "extra")
+
+    def __init__(
+        self,
+        name: str,
+        server: str,
+        original_name: str,
+        description: Optional[str],
+        input_schema: Optional[dict],
+        annotations: Optional[dict],
+        extra: Optional[dict]
+    ):
+        self.name = name
+        self.server = server
+        self.original_name = original_name
+        self.description = description
+        self.input_schema = input_schema
+        self.annotations = annotations
+        self.extra = extra
+
+    def to_tool(self, name: Optional[str] = None) -> dict:
+        """
+        MCP tool definition.
+
+        Returns a new top-level dict; the nested inputSchema and annotations
+        objects are shared and must not be mutated.
+
+        Args:
+            name: Name to advertise (defaults to the prefixed name)
+        """
+        tool = {"name": self.name if name is None else name}
+        if self.description is not None:
+            tool["description"] = self.description
+        if self.input_schema is not None:
+            tool["inputSchema"] = self.input_schema
+        if self.annotations is not None:
+            tool["annotations"] = self.annotations
+        if self.extra:
+            tool.update(self.extra)
+        return tool
+
+    @property
+    def schema(self) -> dict:
+        """The tool as its server advertised it"""
+        return self.to_tool(self.original_name)
+
+
+class ToolCatalog(Mapping):
+    """Prefixed tool name -> ToolEntry, with server, prefix and annotation indexes"""
+
+    def __init__(self):
+        self._entries: dict[str, ToolEntry] = {}
+        self._by_server: dict[str, list[str]] = {}
+        self._by_annotation: dict[str, set[str]] = {}
+        self._interned: dict[bytes, dict] = {}
+
+        # Derived lookups, rebuilt lazily after a change
+        self._sorted: Optional[list[str]] = None
+        self._server_sorted: dict[str, list[str]] = {}
+        self._search: Optional[dict[str, str]] = None
+
+    # -------------------------------------------------------------------------
+    # Mapping
+    # -------------------------------------------------------------------------
+
+    def __getitem__(self, name: str) -> ToolEntry:
+        return self._entries[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -------------------------------------------------------------------------
+    # Mutation
+    # -------------------------------------------------------------------------
+
+    def replace_server(self, server: str, tools: Iterable[dict]):
+        """
+        Replace every entry of a server with freshly discovered tools.
+
+        Args:
+            server: Server name (tools are prefixed ``{server}__``)
+            tools: Tool definitions as returned by the server's tools/list
+        """
+        self._drop(server)
+
+        names = []
+        seen = set()
+        for tool in tools:
+            entry = self._make_entry(server, tool)
+            if entry.name in seen:
+                continue  # repeated in tools/list; the first definition wins
+            owner = self._entries.get(entry.name)
+            if owner is not None:
+                # Prefixed names can collide across servers ("a" + "b__c" vs "a__b" + "c")
+                logger.warning(f"Ignoring {entry.name} from {server}: already provided by {owner.server}")
+                continue
+            seen.add(entry.name)
+            self._entries[entry.name] = entry
+            names.append(entry.name)
+            if entry.annotations:
+                for hint, value in entry.annotations.items():
+                    if value is True:
+                        self._by_annotation.setdefault(hint, set()).add(entry.name)
+        if names:
+            self._by_server[server] = names
+
+        self._changed(server)
+
+    def remove_server(self, server: str):
+        """Drop every entry of a server"""
+        self._drop(server)
+        self._changed(server)
+
+    def _drop(self, server: str):
+        for name in self._by_server.pop(server, ()):
+            entry = self._entries.pop(name, None)
+            if entry is not None and entry.annotations:
+                for hint in entry.annotations:
+                    names = self._by_annotation.get(hint)
+                    if names is not None:
+                        names.discard(name)
+                        if not names:
+                            del self._by_annotation[hint]
+
+    def _changed(self, server: str):
+        self._sorted = None
+        self._server_sorted.pop(server, None)
+        self._search = None
+        if len(self._interned) > 2 * len(self._entries) + 64:
+            self._prune_interned()
+
+    def _make_entry(self, server: str, tool: dict) -> ToolEntry:
+        original_name = tool["name"]
+        extra = {
+            key: value for key, value in tool.items()
+            if key not in ("name", "description", "inputSchema", "annotations")
+        }
+        return ToolEntry(
+            name=f"{server}__{original_name}",
+            server=server,
+            original_name=original_name,
+            description=tool.get("description"),
+            input_schema=self._intern(tool.get("inputSchema")),
+            annotations=self._intern(tool.get("annotations")),
+            extra=extra or None
+        )
+
+    def _intern(self, value: Optional[dict]) -> Optional[dict]:
+        """Return a shared object for JSON-equal schemas"""
+        if value is None:
+            return None
+        key = hashlib.blake2b(
+            json.dumps(value, sort_keys=True, separators=(",", ":")).encode(),
+            digest_size=16
+        ).digest()
+        return self._interned.setdefault(key, value)
+
+    def _prune_interned(self):
+        """Forget interned objects no entry uses any more"""
+        live = set()
+        for entry in self._entries.values():
+            live.add(id(entry.input_schema))
+            live.add(id(entry.annotations))
+        self._interned = {key: value for key, value in self._interned.items() if id(value) in live}
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def servers(self) -> list[str]:
+        """Servers with at least one tool"""
+        return list(self._by_server)
+
+    def count(self, server: str) -> int:
+        """Number of tools from a server"""
+        return len(self._by_server.get(server, ()))
+
+    def sorted_names(self) -> list[str]:
+        """Every tool name, sorted (shared list; do not mutate)"""
+        if self._sorted is None:
+            self._sorted = sorted(self._entries)
+        return self._sorted
+
+    def server_names(self, server: str) -> list[str]:
+        """A server's tool names, sorted (shared list; do not mutate)"""
+        names = self._server_sorted.get(server)
+        if names is None:
+            names = self._server_sorted[server] = sorted(self._by_server.get(server, ()))
+        return names
+
+    def prefix_range(self, names: list[str], prefix: str) -> tuple[int, int]:
+        """Index range of a sorted name list whose names start with prefix"""
+        return bisect.bisect_left(names, prefix), bisect.bisect_left(names, prefix + PREFIX_END)
+
+    def match(self, pattern: str) -> list[str]:
+        """
+        Tool names matching an fnmatch pattern, or the name itself if known.
+
+        Only the slice of sorted names sharing the pattern's literal prefix
+        is scanned.
+        """
+        literal = pattern
+        for i, c in enumerate(pattern):
+            if c in GLOB_CHARS:
+                literal = pattern[:i]
+                break
+        else:
+            return [pattern] if pattern in self._entries else []
+
+        names = self.sorted_names()
+        lo, hi = self.prefix_range(names, literal)
+        return fnmatch.filter(names[lo:hi], pattern)
+
+    def with_annotation(self, hint: str) -> set[str]:
+        """Tools whose annotations set a hint to true (e.g. readOnlyHint)"""
+        return self._by_annotation.get(hint, set())
+
+    def search_text(self, name: str) -> str:
+        """Lowercased "name description" used for text filtering"""
+        if self._search is None:
+            self._search = {
+                tool_name: f"{tool_name} {entry.description or ''}".lower()
+                for tool_name, entry in self._entries.items()
+            }
+        return self._search[name]
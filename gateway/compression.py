@@ -0,0 +1,195 @@
+"""
+BTR Compression - Accept-Encoding negotiation for /mcp and /api/*
+
+gzip is always available; zstd needs ``zstandard`` (in requirements.txt)
+and is skipped if it is not installed. Responses smaller than
+``BTR_COMPRESSION_MIN_BYTES`` are sent as is.
+
+CompressionMiddleware compresses ordinary responses per request.
+tools/list is served from a ToolsListBody instead, which keeps the encoded
+bytes of the catalog part of the response so that each request only
+compresses its few trailing bytes (the JSON-RPC id).
+"""
+import json
+import zlib
+from typing import Optional
+
+from config import settings
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Preferred first when the client accepts both equally
+SUPPORTED_ENCODINGS = ("zstd", "gzip") if ZSTD_AVAILABLE else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+# Streamed as events arrive; never held back or compressed
+STREAMING_TYPES = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a response encoding from an Accept-Encoding header.
+
+    Returns:
+        "zstd", "gzip", or None for identity
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class ToolsListBody:
+    """
+    Pre-serialized tools/list response for one catalog snapshot.
+
+    The result is written before the id, ``{"jsonrpc":"2.0","result":{...},"id":``,
+    so everything but the id is shared between requests. Per encoding the
+    shared part is compressed once:
+
+        gzip  the compressor state after the shared part is kept and
+              copied for each request, giving a single gzip stream
+        zstd  the shared part is one cached frame; the id follows as a
+              second frame (multi-frame content is valid zstd)
+    """
+
+    def __init__(self, tools: list[dict], meta: Optional[dict] = None):
+        result = {"tools": tools, "_meta": meta} if meta else {"tools": tools}
+        self.prefix = (
+            b'{"jsonrpc":"2.0","result":'
+            + _dumps(result)
+            + b',"id":'
+        )
+        self._gzip: Optional[tuple[bytes, "zlib._Compress"]] = None
+        self._zstd: Optional[bytes] = None
+
+    def render(self, request_id, encoding: Optional[str] = None) -> bytes:
+        """Response body for a request id, encoded as requested"""
+        tail = _dumps(request_id) + b"}"
+        if encoding == "gzip":
+            if self._gzip is None:
+                compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+                self._gzip = (compressor.compress(self.prefix), compressor)
+            head, compressor = self._gzip
+            compressor = compressor.copy()
+            return head + compressor.compress(tail) + compressor.flush()
+        if encoding == "zstd":
+            if self._zstd is None:
+                self._zstd = compress(self.prefix, "zstd")
+            return self._zstd + compress(tail, "zstd")
+        return self.prefix + tail
+
+    def __len__(self) -> int:
+        return len(self.prefix)
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing /mcp and /api/* responses.
+
+    Only complete (single message) bodies are compressed; streamed
+    responses such as /api/events pass through untouched, as do responses
+    that already carry a Content-Encoding. The response start is only held
+    back for compressible types, so event streams send their headers at once.
+    """
+
+    def __init__(self, app, paths: tuple[str, ...] = ("/mcp", "/api/")):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression_min_bytes or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in headers
+                    or content_type.startswith(STREAMING_TYPES)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    # Event streams and other types we never compress: headers go out now
+                    await send(message)
+                else:
+                    start_message = message  # held until the body shows whether to compress
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = [(k, v) for k, v in start["headers"]]
+            body = message.get("body", b"")
+
+            if message.get("more_body") or len(body) < settings.compression_min_bytes:
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"etag")]
+            etag = next((v for k, v in start["headers"] if k.lower() == b"etag"), None)
+            if etag is not None:
+                # The representation changed; a strong validator becomes weak
+                headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
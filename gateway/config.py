@@ -3,10 +3,14 @@ BTR Gateway Configuration
 """
 import os
 import json
+import logging
 from pathlib import Path
-from typing import Optional, Literal
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Literal
 from pydantic_settings import BaseSettings
 
+if TYPE_CHECKING:
+    from catalog import ToolCatalog
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment"""
@@ -15,6 +19,8 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8090
     log_level: str = "INFO"
+    # Also listen on this unix socket for co-located clients (python main.py)
+    uds: Optional[Path] = None
 
     # Paths
     presets_dir: Path = Path("/app/presets")
@@ -24,8 +30,80 @@ class Settings(BaseSettings):
     # Default preset
     default_preset: str = "development"
 
-    # Transport mode: docker, local, http, or auto (tries in order)
-    transport_mode: Literal["docker", "local", "http", "auto"] = "auto"
+    # Transport mode: docker, local, http, uds, inproc, auto (races them), or replay (recorded cassettes)
+    transport_mode: Literal["docker", "local", "http", "uds", "inproc", "auto", "replay"] = "auto"
+
+    # Auto mode: probe all transports at once and keep the first healthy one;
+    # fail over after this many consecutive connection errors/timeouts (0 disables)
+    transport_race: bool = True
+    transport_failover_errors: int = 3
+
+    # Cassettes: record every upstream exchange to cassette_dir/<server>.jsonl, or replay them
+    record_cassettes: bool = False
+    cassette_dir: Optional[Path] = None  # default: data_dir/cassettes
+    replay_speed: float = 1.0  # 1 = recorded timing, 0 = no delay
+
+    # Servers discovered at once during startup (0 = all); the port opens before discovery ends
+    discovery_concurrency: int = 8
+
+    # Multi-worker mode: share enabled tools and catalog via SQLite in data_dir
+    workers: int = 1
+    shared_state: bool = False
+    shared_poll_interval: float = 1.0
+
+    # Enabled-tool persistence: json (enabled_tools.json) or sqlite (btr_state.db)
+    state_backend: Literal["json", "sqlite"] = "json"
+    state_profile: str = "default"
+    state_history_keep: int = 1000
+
+    # Hot reload: poll servers_dir and presets_dir for changes
+    watch_config: bool = True
+    watch_interval: float = 2.0
+
+    # Tool Selector UI served by the gateway itself (directory with templates/ and static/)
+    ui_dir: Optional[Path] = None
+    ui_cache_max_age: int = 300
+
+    # Federation: how often mounted gateways are re-synced (0 disables)
+    federation_sync_interval: float = 10.0
+
+    # Tool output budgets (0 = unlimited); servers can override in config.json output_limits
+    output_max_bytes: int = 0
+    output_max_tokens: int = 0
+    output_continuation_max_bytes: int = 16 * 1024 * 1024
+
+    # Text results larger than this are written to data_dir/spill and returned as resource links
+    # (0 disables; off by default so unlimited calls skip the streaming filter)
+    spill_threshold_bytes: int = 0
+    spill_ttl: float = 3600.0
+    spill_read_max_bytes: int = 256 * 1024
+
+    # gzip/zstd for /mcp and /api/* responses of at least this size (0 disables)
+    compression_min_bytes: int = 1024
+
+    # Concurrent tool calls per upstream server; more wait in a priority queue (0 = unlimited)
+    upstream_max_concurrency: int = 8
+
+    # Docker mode: pause containers with no enabled tools or idle this long (0 = only unused ones)
+    container_pause: bool = False
+    container_idle_ttl: float = 600.0
+    container_sweep_interval: float = 30.0
+    docker_socket: Path = Path("/var/run/docker.sock")
+
+    # Flight recorder: recent tools/call ring, slow calls (0 = off) to data_dir/calls/*.jsonl.gz
+    recorder_size: int = 1000
+    recorder_slow_ms: float = 2000.0
+    recorder_sample_args: float = 0.1
+    recorder_args_max_bytes: int = 4096
+    recorder_file_max_bytes: int = 10 * 1024 * 1024
+    recorder_file_keep: int = 5
+
+    # Per-server CPU/memory/fd/thread sampling (0 disables) and alert thresholds (0 = none)
+    resource_sample_interval: float = 15.0
+    resource_alert_rss_mb: float = 0
+    resource_alert_cpu_percent: float = 0
+    resource_alert_open_fds: int = 0
+    resource_alert_threads: int = 0
 
     class Config:
         env_prefix = "BTR_"
@@ -33,65 +111,208 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+logger = logging.getLogger(__name__)
+
 
 class ToolState:
-    """Manages the current state of enabled tools"""
+    """
+    Manages the current state of enabled tools.
+
+    Persistence is delegated to a StateBackend (BTR_STATE_BACKEND). Every
+    mutation bumps ``version``. With the sqlite backend, changes made by
+    other workers are picked up on the next read.
+    """
 
     def __init__(self):
         self.enabled_tools: set[str] = set()
+        self.version = 0
         self.state_file = settings.data_dir / "enabled_tools.json"
+        self.from_default_preset = False  # True until the first explicit change
+        self.shared = None  # SharedStore (catalog + leadership) in shared-state mode
+        self._listeners: list[Callable[[int, set[str], set[str]], None]] = []
+        self.backend = self._create_backend()
+        if settings.shared_state:
+            from shared_state import open_shared_store
+            self.shared = open_shared_store(settings.data_dir)
         self._load_state()
 
+    def _create_backend(self):
+        """Build the configured state backend"""
+        from state_backends import JsonStateBackend, SqliteStateBackend
+
+        backend = settings.state_backend
+        if settings.shared_state and backend != "sqlite":
+            logger.info("BTR_SHARED_STATE requires the sqlite state backend; using it")
+            backend = "sqlite"
+
+        if backend == "sqlite":
+            return SqliteStateBackend(
+                settings.data_dir / "btr_state.db",
+                profile=settings.state_profile,
+                keep_versions=settings.state_history_keep,
+                migrate_from=self.state_file
+            )
+        return JsonStateBackend(self.state_file)
+
     def _load_state(self):
         """Load enabled tools from persistent storage"""
-        if self.state_file.exists():
-            try:
-                with open(self.state_file) as f:
-                    data = json.load(f)
-                    self.enabled_tools = set(data.get("enabled_tools", []))
-            except (json.JSONDecodeError, IOError):
-                self._load_default_preset()
-        else:
+        if not self.backend.is_initialized():
             self._load_default_preset()
+            # First worker to get here seeds the store; the rest read it back
+            self.backend.seed(self.enabled_tools, from_default=True)
+        self._reload()
+
+    def _reload(self):
+        before = self.enabled_tools
+        self.version, self.enabled_tools, self.from_default_preset = self.backend.load()
+        added, removed = self.enabled_tools - before, before - self.enabled_tools
+        # The database also changes for other reasons (shared catalog, container use)
+        if added or removed:
+            self._notify(added, removed)
 
-    def _load_default_preset(self):
-        """Load the default preset"""
-        preset_file = settings.presets_dir / f"{settings.default_preset}.json"
-        if preset_file.exists():
+    def on_change(self, listener: Callable[[int, set[str], set[str]], None]):
+        """Call listener(version, added, removed) after every change"""
+        self._listeners.append(listener)
+
+    def _notify(self, added: set[str], removed: set[str]):
+        for listener in self._listeners:
             try:
-                with open(preset_file) as f:
-                    data = json.load(f)
-                    self.enabled_tools = set(data.get("tools", []))
-            except (json.JSONDecodeError, IOError):
-                self.enabled_tools = set()
+                listener(self.version, added, removed)
+            except Exception as e:
+                logger.error(f"State change listener failed: {e}")
+
+    def refresh(self) -> bool:
+        """
+        Pick up changes committed by other processes.
+
+        Returns:
+            True if the enabled set was re-read
+        """
+        if not self.backend.changed():
+            return False
+        self._reload()
+        return True
+
+    def _load_default_preset(self, catalog: Optional["ToolCatalog"] = None, catalog_version: int = 0):
+        """Load the default preset, expanding patterns against the catalog if given"""
+        from catalog import ToolCatalog
+        from presets import preset_index
+        from errors import BTRError
+
+        try:
+            self.enabled_tools = set(
+                preset_index.resolve(
+                    settings.default_preset,
+                    catalog if catalog is not None else ToolCatalog(),
+                    catalog_version
+                )
+            )
+        except BTRError:
+            self.enabled_tools = set()
+        self.from_default_preset = True
+
+    def reload_default_preset(self, catalog: "ToolCatalog", catalog_version: int):
+        """
+        Re-resolve the default preset once tools are discovered.
+
+        Only applies while no explicit selection has been made, so glob
+        patterns in the default preset pick up discovered tools.
+        """
+        self.refresh()
+        if not self.from_default_preset:
+            return
+
+        before = self.enabled_tools
+        self._load_default_preset(catalog, catalog_version)
+        if self.enabled_tools == before:
+            return  # runs per discovered server; most do not change the preset's expansion
+        self.version = self.backend.apply(add=self.enabled_tools, replace=True, from_default=True)
+        self._notify(self.enabled_tools - before, before - self.enabled_tools)
+
+    def _commit(self, add=(), remove=(), replace: bool = False, expected_version: Optional[int] = None):
+        """Persist a change that has already been applied to enabled_tools"""
+        self.version = self.backend.apply(
+            add=add, remove=remove, replace=replace, expected_version=expected_version
+        )
+        self.from_default_preset = False
 
     def save_state(self):
         """Save enabled tools to persistent storage"""
-        settings.data_dir.mkdir(parents=True, exist_ok=True)
-        with open(self.state_file, "w") as f:
-            json.dump({"enabled_tools": list(self.enabled_tools)}, f, indent=2)
+        self._commit(add=self.enabled_tools, replace=True)
 
     def enable_tool(self, tool: str):
         """Enable a specific tool"""
-        self.enabled_tools.add(tool)
-        self.save_state()
+        self.apply_delta(add=[tool])
 
     def disable_tool(self, tool: str):
         """Disable a specific tool"""
-        self.enabled_tools.discard(tool)
-        self.save_state()
+        self.apply_delta(remove=[tool])
+
+    def apply_delta(
+        self,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        expected_version: Optional[int] = None
+    ) -> tuple[set[str], set[str]]:
+        """
+        Enable and disable tools in one atomic change (add wins over remove).
+
+        Args:
+            add: Tools to enable
+            remove: Tools to disable
+            expected_version: Reject the change if the state has moved past this version
+
+        Returns:
+            (tools actually enabled, tools actually disabled)
+
+        Raises:
+            StateConflictError: If expected_version is stale
+        """
+        self.refresh()
+        if expected_version is not None and expected_version != self.version:
+            from errors import StateConflictError
+            raise StateConflictError(expected_version, self.version)
+
+        add = set(add)
+        added = add - self.enabled_tools
+        removed = (set(remove) - add) & self.enabled_tools
+        if not added and not removed:
+            return added, removed  # nothing changes: no new version, history row or notification
+        self._commit(add=added, remove=removed, expected_version=expected_version)
+        self.enabled_tools |= added
+        self.enabled_tools -= removed
+        self._notify(added, removed)
+        return added, removed
 
     def set_tools(self, tools: list[str]):
         """Replace all enabled tools"""
+        before = self.enabled_tools
         self.enabled_tools = set(tools)
-        self.save_state()
+        self._commit(add=self.enabled_tools, replace=True)
+        self._notify(self.enabled_tools - before, before - self.enabled_tools)
+
+    def history(self, limit: int = 50) -> list[dict]:
+        """Recent state versions, newest first (sqlite backend)"""
+        return self.backend.history(limit)
+
+    def rollback(self, version: Optional[int] = None, timestamp: Optional[float] = None):
+        """Restore the enabled set as of a version or point in time (sqlite backend)"""
+        self.backend.rollback(version=version, timestamp=timestamp)
+        self._reload()
 
     def is_enabled(self, tool: str) -> bool:
         """Check if a tool is enabled"""
+        self.refresh()
         return tool in self.enabled_tools
 
+    def enabled_set(self) -> set[str]:
+        """Get the live enabled set (do not mutate); one refresh per call"""
+        self.refresh()
+        return self.enabled_tools
+
     def get_enabled(self) -> list[str]:
         """Get list of enabled tools"""
+        self.refresh()
         return sorted(self.enabled_tools)
 
 
@@ -0,0 +1,321 @@
+"""
+BTR Containers - Pause idle docker-mode MCP containers, unpause on demand
+
+With ``BTR_CONTAINER_PAUSE=true`` the gateway pauses a DockerTransport's
+container (freezing its processes, so they stop using CPU and their memory
+can be reclaimed under pressure) when none of the server's tools is
+enabled, or when it has not been called for ``BTR_CONTAINER_IDLE_TTL``
+seconds. The next request to the container unpauses it first; how long
+that takes is recorded as the resume latency.
+
+Containers are paused and unpaused through the Docker Engine API on
+``BTR_DOCKER_SOCKET``; the gateway already mounts the socket for
+``docker exec``.
+
+With shared state only the leader sweeps. Every worker records when it
+last used a container in the shared store, so a container that only
+followers call is not considered idle, and the leader inspects containers
+it paused to notice when a follower has unpaused them.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+from config import settings, tool_state
+
+logger = logging.getLogger(__name__)
+
+DOCKER_API_TIMEOUT = 10.0
+
+# Recent resume latencies kept per container for percentiles
+RESUME_SAMPLES = 64
+
+# Shared-state mode: write a container's last use at most this often per worker
+SHARED_TOUCH_INTERVAL = 5.0
+
+
+class DockerAPIError(Exception):
+    """Docker Engine API request failed"""
+
+    def __init__(self, message: str, status: int = 0):
+        super().__init__(message)
+        self.status = status
+
+
+class DockerAPI:
+    """Minimal Docker Engine API client over the unix socket"""
+
+    def __init__(self, socket_path: Path):
+        self.socket_path = socket_path
+
+    async def _request(self, method: str, path: str) -> tuple[int, bytes]:
+        """
+        Send one request and read the whole response.
+
+        Returns:
+            (HTTP status, body)
+        """
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(str(self.socket_path)),
+                timeout=DOCKER_API_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise DockerAPIError(f"Cannot connect to Docker at {self.socket_path}: {e}")
+
+        try:
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\n"
+                f"Host: docker\r\n"
+                f"Content-Length: 0\r\n"
+                f"Connection: close\r\n\r\n".encode()
+            )
+            await writer.drain()
+            raw = await asyncio.wait_for(reader.read(), timeout=DOCKER_API_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise DockerAPIError(f"Docker API {method} {path} failed: {e}")
+        finally:
+            writer.close()
+
+        head, _, body = raw.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            status = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            raise DockerAPIError(f"Invalid response from Docker API: {lines[0]!r}")
+
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = _dechunk(body)
+        return status, body
+
+    async def _call(self, method: str, path: str, ok: tuple[int, ...] = (200, 204)) -> bytes:
+        status, body = await self._request(method, path)
+        if status not in ok:
+            try:
+                message = json.loads(body).get("message", "")
+            except (ValueError, AttributeError):
+                message = body.decode(errors="replace").strip()
+            raise DockerAPIError(f"Docker API {method} {path}: {status} {message}", status)
+        return body
+
+    async def inspect(self, container: str) -> dict:
+        """Container state (``Running``, ``Paused``, ...)"""
+        body = await self._call("GET", f"/containers/{quote(container)}/json")
+        return json.loads(body).get("State", {})
+
+    async def stats(self, container: str) -> dict:
+        """One cgroup stats sample (memory, CPU, pids) without streaming"""
+        body = await self._call("GET", f"/containers/{quote(container)}/stats?stream=false&one-shot=true")
+        return json.loads(body)
+
+    async def pause(self, container: str):
+        # 409: already paused (or not running)
+        await self._call("POST", f"/containers/{quote(container)}/pause", ok=(204, 409))
+
+    async def unpause(self, container: str):
+        # 409: not paused
+        await self._call("POST", f"/containers/{quote(container)}/unpause", ok=(204, 409))
+
+
+def _dechunk(body: bytes) -> bytes:
+    """Decode a chunked transfer-encoded body"""
+    out = bytearray()
+    while body:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line.split(b";")[0] or b"0", 16)
+        if size == 0:
+            break
+        out += body[:size]
+        body = body[size + 2:]
+    return bytes(out)
+
+
+@dataclass
+class ContainerState:
+    """What the gateway knows about one container"""
+    name: str
+    last_used: float = field(default_factory=time.monotonic)
+    paused: bool = False
+    active: int = 0  # requests currently using the container
+    pauses: int = 0
+    resumes: int = 0
+    last_resume: float = 0.0
+    last_shared_touch: float = 0.0  # monotonic time of the last write to the shared store
+    recent_resumes: deque = field(default_factory=lambda: deque(maxlen=RESUME_SAMPLES))
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def to_dict(self) -> dict:
+        recent = sorted(self.recent_resumes)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "paused": self.paused,
+            "idle_for": round(time.monotonic() - self.last_used, 1),
+            "active": self.active,
+            "pauses": self.pauses,
+            "resumes": self.resumes,
+            "resume_ms": {
+                "last": round(self.last_resume * 1000, 2),
+                "mean": round(sum(recent) / len(recent) * 1000, 2) if recent else 0.0,
+                "p95": round(p95 * 1000, 2),
+                "max": round(recent[-1] * 1000, 2) if recent else 0.0
+            }
+        }
+
+
+class ContainerManager:
+    """Pauses idle containers and unpauses them just in time"""
+
+    def __init__(self, api: DockerAPI, idle_ttl: float):
+        self.api = api
+        self.idle_ttl = idle_ttl
+        self._containers: dict[str, ContainerState] = {}
+
+    def _state(self, container: str) -> ContainerState:
+        state = self._containers.get(container)
+        if state is None:
+            state = self._containers[container] = ContainerState(container)
+        return state
+
+    @asynccontextmanager
+    async def in_use(self, container: str, force_unpause: bool = False) -> AsyncIterator[None]:
+        """
+        Hold a container running for the duration of a request.
+
+        Args:
+            container: Container name
+            force_unpause: Unpause even if this gateway did not pause it
+                (another worker or an operator did)
+
+        Raises:
+            DockerAPIError: If the container could not be unpaused
+        """
+        state = self._state(container)
+        state.active += 1  # before taking the lock, so a sweep cannot pause it
+        try:
+            if state.paused or force_unpause:
+                async with state.lock:
+                    if state.paused or force_unpause:
+                        started = time.monotonic()
+                        await self.api.unpause(container)
+                        elapsed = time.monotonic() - started
+                        state.paused = False
+                        state.resumes += 1
+                        state.last_resume = elapsed
+                        state.recent_resumes.append(elapsed)
+                        logger.info(f"Unpaused container {container} in {elapsed * 1000:.0f}ms")
+            yield
+        finally:
+            state.active -= 1
+            state.last_used = time.monotonic()
+            self._share_last_use(state)
+
+    def _share_last_use(self, state: ContainerState):
+        """Tell the sweeping worker that this one uses the container"""
+        store = tool_state.shared
+        if store is None or store.is_leader:
+            return
+        if state.last_used - state.last_shared_touch < SHARED_TOUCH_INTERVAL:
+            return
+        try:
+            store.touch_container(state.name, time.time())
+            state.last_shared_touch = state.last_used
+        except Exception as e:
+            logger.debug(f"Cannot record use of container {state.name}: {e}")
+
+    def _idle_for(self, state: ContainerState, shared_last_used: dict[str, float]) -> float:
+        """Seconds since this or any other worker used the container"""
+        idle_for = time.monotonic() - state.last_used
+        if state.name in shared_last_used:
+            idle_for = min(idle_for, time.time() - shared_last_used[state.name])
+        return idle_for
+
+    async def _still_paused(self, state: ContainerState) -> bool:
+        """Check a container this gateway paused; another worker may have unpaused it"""
+        try:
+            paused = bool((await self.api.inspect(state.name)).get("Paused"))
+        except DockerAPIError as e:
+            logger.debug(f"Cannot inspect container {state.name}: {e}")
+            return True
+        if not paused:
+            state.paused = False
+            state.resumes += 1
+            state.last_used = time.monotonic()
+            logger.info(f"Container {state.name} was unpaused by another worker")
+        return paused
+
+    async def sweep(self, containers: dict[str, bool]) -> list[str]:
+        """
+        Pause containers that are unused or idle past the TTL.
+
+        Args:
+            containers: Container name -> whether any of its tools is enabled
+
+        Returns:
+            Names of the containers paused by this sweep
+        """
+        shared_last_used = {}
+        if tool_state.shared is not None:
+            try:
+                shared_last_used = tool_state.shared.container_last_used()
+            except Exception as e:
+                logger.warning(f"Cannot read shared container use: {e}")
+
+        paused = []
+        for container, has_enabled_tools in containers.items():
+            state = self._state(container)
+            if state.paused and (tool_state.shared is None or await self._still_paused(state)):
+                continue
+            idle = self.idle_ttl > 0 and self._idle_for(state, shared_last_used) > self.idle_ttl
+            if state.paused or state.active or (has_enabled_tools and not idle):
+                continue
+
+            async with state.lock:
+                if state.paused or state.active:
+                    continue
+                try:
+                    await self.api.pause(container)
+                except DockerAPIError as e:
+                    logger.warning(f"Cannot pause container {container}: {e}")
+                    continue
+                state.paused = True
+                state.pauses += 1
+            paused.append(container)
+            logger.info(
+                f"Paused container {container} "
+                f"({'idle' if has_enabled_tools else 'no enabled tools'})"
+            )
+
+        # Forget containers that no longer back a server
+        for container in list(self._containers):
+            if container not in containers and not self._containers[container].active:
+                del self._containers[container]
+        return paused
+
+    async def resume_all(self):
+        """Unpause everything this gateway paused (on shutdown)"""
+        for container, state in list(self._containers.items()):
+            if state.paused:
+                try:
+                    await self.api.unpause(container)
+                    state.paused = False
+                except DockerAPIError as e:
+                    logger.warning(f"Cannot unpause container {container}: {e}")
+
+    def status(self, container: str) -> Optional[dict]:
+        state = self._containers.get(container)
+        return state.to_dict() if state is not None else None
+
+
+# Global container manager
+container_manager = ContainerManager(DockerAPI(settings.docker_socket), settings.container_idle_ttl)
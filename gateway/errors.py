@@ -187,6 +187,44 @@ class PresetNotFoundError(BTRError):
         )
 
 
+class StateConflictError(BTRError):
+    """
+    Enabled tools changed since the version a client based its edit on.
+    """
+    def __init__(self, expected_version: int, current_version: int):
+        hints = [
+            "Re-read the current state: GET /api/current",
+            "Re-apply the change against the new version, or omit expected_version"
+        ]
+
+        super().__init__(
+            f"State version conflict: expected {expected_version}, current is {current_version}",
+            {"expected_version": expected_version, "current_version": current_version},
+            hints
+        )
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+class RateLimitedError(BTRError):
+    """
+    Call rejected by the gateway's rate limiter before reaching the server.
+    """
+    def __init__(self, server_name: str, tool_name: str, retry_after: float):
+        hints = [
+            f"Retry in {retry_after:.1f}s",
+            f"Check limits and upstream signals: GET /api/status (servers.{server_name}.rate_limit)",
+            f"Adjust rate_limits in servers/{server_name}/config.json"
+        ]
+
+        super().__init__(
+            f"Rate limit for {server_name}__{tool_name} reached; retry in {retry_after:.1f}s",
+            {"server": server_name, "tool": tool_name, "retry_after": round(retry_after, 2)},
+            hints
+        )
+        self.retry_after = retry_after
+
+
 class ToolInvocationError(BTRError):
     """
     Tool execution failed.
@@ -0,0 +1,56 @@
+"""
+BTR Events - In-process fan-out of state changes to /api/events subscribers
+
+Events are (name, data) pairs:
+    state    {"version", "added", "removed", "count"}  enabled set changed
+    catalog  {"catalog_version", "total"}               available tools changed
+    resync   {}                                        subscriber fell behind
+
+A subscriber that stops reading has its backlog dropped and receives a
+single resync event, telling it to re-fetch instead of replaying deltas.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """Fan-out of events to asyncio queues, one per subscriber"""
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber; read (event, data) tuples from the queue"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: dict):
+        """
+        Queue an event for every subscriber.
+
+        Must be called from the event loop thread (all gateway handlers are
+        async, so state changes happen there).
+        """
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("resync", {}))
+                logger.debug("Event subscriber fell behind; sent resync")
+
+
+# Global event bus
+event_bus = EventBus()
@@ -2,20 +2,34 @@
 BTR Gateway - Main FastAPI application
 Serves MCP tools over HTTP with SSE transport
 """
+import asyncio
 import json
 import logging
 import time
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from pathlib import Path
+from typing import AsyncGenerator, Optional
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
 
+from compression import CompressionMiddleware, ToolsListBody, negotiate
 from config import settings, tool_state
+from containers import container_manager
+from errors import ConfigurationError, PresetNotFoundError, RateLimitedError, StateConflictError
+from events import event_bus
+from output import continuations
+from presets import preset_index
+from recorder import flight_recorder
+from resources import resource_sampler
 from router import router
+from spill import spill_store
+from transports.docker import DockerTransport
+from watcher import ConfigWatcher
 
 # Configure logging
 logging.basicConfig(level=getattr(logging, settings.log_level))
@@ -24,6 +38,40 @@ logger = logging.getLogger(__name__)
 # Track startup time
 _startup_time: float = 0
 
+# Config watcher (started by the discovery leader)
+_watcher: Optional[ConfigWatcher] = None
+
+# Shared-state sync (started once discovery has finished)
+_sync_task: Optional[asyncio.Task] = None
+
+# Idle container pausing (started by the discovery leader)
+_container_task: Optional[asyncio.Task] = None
+
+# How long a follower worker waits for the leader's first catalog
+SHARED_CATALOG_WAIT = 120.0
+
+# Serialized tools/list for the current snapshot: (ETag, body)
+_tools_list_body: Optional[tuple[str, ToolsListBody]] = None
+
+# /api/tools page sizes
+TOOLS_PAGE_DEFAULT = 100
+TOOLS_PAGE_MAX = 1000
+
+
+def publish_state_change(version: int, added: set[str], removed: set[str]):
+    """Forward enabled-tool deltas to /api/events subscribers"""
+    if not added and not removed:
+        return
+    event_bus.publish("state", {
+        "version": version,
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "count": len(tool_state.enabled_tools)
+    })
+
+
+tool_state.on_change(publish_state_change)
+
 
 def validate_configuration() -> list[str]:
     """
@@ -49,25 +97,122 @@ def validate_configuration() -> list[str]:
     except Exception as e:
         warnings.append(f"Data directory not writable: {e}")
 
+    # Check UI directory (optional)
+    if settings.ui_dir is not None and not (settings.ui_dir / "templates" / "index.html").exists():
+        warnings.append(f"UI directory has no templates/index.html: {settings.ui_dir}")
+
     return warnings
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan - validate config and discover tools on startup"""
-    global _startup_time
-    _startup_time = time.time()
+def start_watcher():
+    """Start watching servers/ and presets/ if enabled and not yet running"""
+    global _watcher
+    if not settings.watch_config or _watcher is not None:
+        return
+    _watcher = ConfigWatcher(router, interval=settings.watch_interval)
+    _watcher.on_presets_changed(lambda _: preset_index.refresh())
+    _watcher.start()
+
+
+def start_container_pausing():
+    """Start pausing idle containers if enabled and not yet running"""
+    global _container_task
+    if not settings.container_pause or _container_task is not None:
+        return
+    _container_task = asyncio.create_task(container_pause_loop())
+
+
+async def wait_for_shared_catalog():
+    """Follower startup: wait for the leader to publish a catalog"""
+    deadline = time.time() + SHARED_CATALOG_WAIT
+    while time.time() < deadline:
+        if router.load_shared_catalog():
+            return
+        await asyncio.sleep(settings.shared_poll_interval)
+    logger.warning(
+        f"No shared catalog after {SHARED_CATALOG_WAIT}s; "
+        "serving an empty catalog until the leader publishes one"
+    )
 
-    logger.info("BTR Gateway starting...")
-    logger.info(f"Transport mode: {settings.transport_mode}")
 
-    # Validate configuration
-    warnings = validate_configuration()
-    for warning in warnings:
-        logger.warning(f"Configuration: {warning}")
+async def shared_state_loop():
+    """Adopt other workers' changes; take over discovery if the leader exits"""
+    store = tool_state.shared
+    while True:
+        await asyncio.sleep(settings.shared_poll_interval)
+        try:
+            if event_bus.subscriber_count:
+                # Surface other workers' enabled-tool changes to /api/events
+                tool_state.refresh()
+            if store.is_leader:
+                continue
+            if store.try_acquire_leadership():
+                logger.info("Previous leader exited; this worker now runs discovery")
+                start_watcher()
+                start_container_pausing()
+                router.publish_catalog()
+            else:
+                router.load_shared_catalog()
+        except Exception as e:
+            logger.error(f"Shared state sync failed: {e}")
+
+
+async def federation_loop():
+    """Periodically re-sync mounted gateways and their remote health"""
+    while True:
+        await asyncio.sleep(settings.federation_sync_interval)
+        try:
+            await router.sync_upstreams()
+        except Exception as e:
+            logger.error(f"Federation sync failed: {e}")
+
+
+async def spill_cleanup_loop():
+    """Remove spilled results and shared continuations once their TTL has passed"""
+    while True:
+        await asyncio.sleep(min(settings.spill_ttl, 300.0))
+        try:
+            await asyncio.to_thread(spill_store.cleanup)
+            await asyncio.to_thread(continuations.cleanup)
+        except Exception as e:
+            logger.error(f"Spill cleanup failed: {e}")
+
+
+async def container_pause_loop():
+    """Pause docker-mode containers that are unused or idle"""
+    while True:
+        await asyncio.sleep(settings.container_sweep_interval)
+        try:
+            await container_manager.sweep(router.container_usage())
+        except Exception as e:
+            logger.error(f"Container sweep failed: {e}")
+
+
+async def resource_sample_loop():
+    """Sample CPU, memory, fds and threads of every local process and container"""
+    while True:
+        try:
+            await router.sample_resources()
+        except Exception as e:
+            logger.error(f"Resource sampling failed: {e}")
+        await asyncio.sleep(settings.resource_sample_interval)
+
+
+async def initial_discovery():
+    """
+    Discover tools from all servers, then start the leader's background jobs.
 
-    # Discover tools from all servers
-    await router.discover_tools()
+    In shared-state mode only the leader worker discovers; followers adopt
+    the catalog it publishes.
+    """
+    store = tool_state.shared
+    if store is None or store.try_acquire_leadership():
+        await router.discover_tools(
+            on_server=lambda _: tool_state.reload_default_preset(router.all_tools, router.catalog_version)
+        )
+    else:
+        await wait_for_shared_catalog()
+        router.discovery_complete = True
 
     # Report startup status
     healthy_count = sum(1 for s in router.servers.values() if s.healthy)
@@ -89,9 +234,75 @@ async def lifespan(app: FastAPI):
     startup_duration = time.time() - _startup_time
     logger.info(f"Gateway ready in {startup_duration:.2f}s")
 
+    # Hot reload of server configs and presets, and pausing idle containers
+    # (leader only in shared mode)
+    if store is None or store.is_leader:
+        start_watcher()
+        start_container_pausing()
+
+    global _sync_task
+    if store is not None:
+        _sync_task = asyncio.create_task(shared_state_loop())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan - validate config and discover tools on startup"""
+    global _startup_time
+    _startup_time = time.time()
+
+    logger.info("BTR Gateway starting...")
+    logger.info(f"Transport mode: {settings.transport_mode}")
+
+    # Validate configuration
+    warnings = validate_configuration()
+    for warning in warnings:
+        logger.warning(f"Configuration: {warning}")
+
+    if settings.workers > 1 and tool_state.shared is None:
+        logger.warning(
+            "Running with multiple workers without BTR_SHARED_STATE=true; "
+            "each worker keeps its own enabled tools"
+        )
+
+    # Discovery runs in the background so the port opens right away;
+    # /health/ready reports when it has finished
+    store = tool_state.shared
+    discovery_task = asyncio.create_task(initial_discovery())
+
+    federation_task = None
+    if settings.federation_sync_interval > 0:
+        federation_task = asyncio.create_task(federation_loop())
+
+    spill_task = asyncio.create_task(spill_cleanup_loop())
+
+    resource_task = None
+    if settings.resource_sample_interval > 0:
+        resource_task = asyncio.create_task(resource_sample_loop())
+
+    # Every worker unpauses on demand
+    if settings.container_pause:
+        DockerTransport.lifecycle = container_manager
+
     yield
 
     logger.info("BTR Gateway shutting down...")
+    discovery_task.cancel()
+    if _sync_task is not None:
+        _sync_task.cancel()
+    if federation_task is not None:
+        federation_task.cancel()
+    spill_task.cancel()
+    if resource_task is not None:
+        resource_task.cancel()
+    if _container_task is not None:
+        _container_task.cancel()
+        await container_manager.resume_all()
+    if _watcher is not None:
+        await _watcher.stop()
+    await asyncio.to_thread(flight_recorder.writer.close)
+    if store is not None:
+        store.close()
 
 
 app = FastAPI(
@@ -110,16 +321,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/zstd for /mcp and /api/* (added last, so it wraps CORS)
+app.add_middleware(CompressionMiddleware)
+
 
 # =============================================================================
 # MCP Protocol Endpoint (JSON-RPC over HTTP SSE)
 # =============================================================================
 
+def tools_list_response(request: Request, request_id) -> Response:
+    """
+    tools/list with an ETag, served from bytes serialized (and compressed)
+    once per catalog snapshot.
+    """
+    global _tools_list_body
+
+    # ETag lets a federating gateway skip unchanged catalogs
+    tools, etag = router.tools_list_snapshot()
+    if request.headers.get("if-none-match") in (etag, f"W/{etag}"):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if _tools_list_body is None or _tools_list_body[0] != etag:
+        # While servers are still being discovered the list is partial;
+        # notifications/tools/list_changed follows on GET /mcp as they answer
+        pending = sorted(router.discovery_pending)
+        meta = {"pending_servers": pending} if pending else None
+        _tools_list_body = (etag, ToolsListBody(tools, meta))
+    body = _tools_list_body[1]
+
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    encoding = None
+    if settings.compression_min_bytes and len(body) >= settings.compression_min_bytes:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        headers["ETag"] = f"W/{etag}"
+        headers["Content-Encoding"] = encoding
+    return Response(body.render(request_id, encoding), media_type="application/json", headers=headers)
+
+
+@app.get("/mcp")
+async def mcp_notifications():
+    """
+    Server-to-client stream (MCP streamable HTTP).
+
+    Sends notifications/tools/list_changed whenever the tools a client would
+    get from tools/list may have changed: a server finished discovery, a
+    config was reloaded, or the enabled set was edited.
+    """
+    queue = event_bus.subscribe()
+
+    async def stream():
+        try:
+            while True:
+                event, _ = await queue.get()
+                if event in ("catalog", "state", "resync"):
+                    yield {"event": "message", "data": json.dumps({
+                        "jsonrpc": "2.0",
+                        "method": "notifications/tools/list_changed"
+                    })}
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return EventSourceResponse(stream(), ping=15)
+
+
 @app.post("/mcp")
 async def mcp_endpoint(request: Request):
     """
     MCP JSON-RPC endpoint
-    Handles: initialize, tools/list, tools/call
+    Handles: initialize, tools/list, tools/call, resources/list, resources/read
     """
     try:
         body = await request.json()
@@ -137,7 +407,8 @@ async def mcp_endpoint(request: Request):
             result = {
                 "protocolVersion": "2024-11-05",
                 "capabilities": {
-                    "tools": {"listChanged": True}
+                    "tools": {"listChanged": True},
+                    "resources": {}
                 },
                 "serverInfo": {
                     "name": "mcp-btr",
@@ -146,17 +417,29 @@ async def mcp_endpoint(request: Request):
             }
 
         elif method == "tools/list":
-            tools = router.get_enabled_tools()
-            result = {"tools": tools}
+            return tools_list_response(request, request_id)
 
         elif method == "tools/call":
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
+            meta = params.get("_meta") or {}
 
             if not tool_name:
                 raise ValueError("Missing tool name")
 
-            result = await router.invoke_tool(tool_name, arguments)
+            result = await router.invoke_tool(tool_name, arguments, meta.get("priority"))
+
+        elif method == "resources/list":
+            # Spilled results are only reachable through the links in tools/call
+            result = {"resources": []}
+
+        elif method == "resources/read":
+            uri = params.get("uri")
+            if not uri:
+                raise ValueError("Missing resource uri")
+            result = await asyncio.to_thread(
+                spill_store.read, uri, params.get("offset"), params.get("length")
+            )
 
         else:
             return JSONResponse({
@@ -174,6 +457,16 @@ async def mcp_endpoint(request: Request):
             "result": result
         })
 
+    except RateLimitedError as e:
+        return JSONResponse({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32000,
+                "message": e.message,
+                "data": e.to_dict()
+            }
+        })
     except ValueError as e:
         return JSONResponse({
             "jsonrpc": "2.0",
@@ -207,28 +500,72 @@ class ToolToggle(BaseModel):
     tool: str
 
 
+class ToolDelta(BaseModel):
+    add: list[str] = []             # tool names or glob patterns
+    remove: list[str] = []
+    add_servers: list[str] = []     # every tool of these servers
+    remove_servers: list[str] = []
+    expected_version: Optional[int] = None
+
+
 class PresetLoad(BaseModel):
     name: str
 
 
+class StateRollback(BaseModel):
+    version: Optional[int] = None
+    timestamp: Optional[float] = None
+
+
 @app.get("/api/tools")
-async def get_all_tools():
-    """Get all available tools with enabled state"""
-    tools = router.get_all_tools()
-
-    # Group by server
-    by_server = {}
-    for tool in tools:
-        server = tool.get("server", "unknown")
-        if server not in by_server:
-            by_server[server] = []
-        by_server[server].append(tool)
+async def get_all_tools(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    server: Optional[str] = None,
+    prefix: Optional[str] = None,
+    enabled: Optional[bool] = None,
+    q: Optional[str] = None
+):
+    """
+    Get all available tools with enabled state.
+
+    Without parameters, returns every tool grouped by server. With any of
+    cursor, limit, server, prefix, enabled or q, returns one page of a
+    name-sorted list and a next_cursor (null on the last page).
+    """
+    if all(param is None for param in (cursor, limit, server, prefix, enabled, q)):
+        tools = router.get_all_tools()
+
+        # Group by server
+        by_server = {}
+        for tool in tools:
+            server = tool.get("server", "unknown")
+            if server not in by_server:
+                by_server[server] = []
+            by_server[server].append(tool)
 
+        return {
+            "success": True,
+            "total": len(tools),
+            "enabled_count": len(tool_state.get_enabled()),
+            "version": tool_state.version,
+            "catalog_version": router.catalog_version,
+            "servers": by_server
+        }
+
+    limit = max(1, min(limit or TOOLS_PAGE_DEFAULT, TOOLS_PAGE_MAX))
+    tools, next_cursor = router.list_tools_page(
+        cursor=cursor, limit=limit, server=server, prefix=prefix, enabled=enabled, query=q
+    )
     return {
         "success": True,
-        "total": len(tools),
-        "enabled_count": len(tool_state.get_enabled()),
-        "servers": by_server
+        "tools": tools,
+        "next_cursor": next_cursor,
+        "total": len(router.all_tools),
+        "enabled_count": len(tool_state.enabled_set()),
+        "version": tool_state.version,
+        "catalog_version": router.catalog_version,
+        "servers": router.server_summaries()
     }
 
 
@@ -238,7 +575,102 @@ async def get_current():
     return {
         "success": True,
         "tools": tool_state.get_enabled(),
-        "count": len(tool_state.get_enabled())
+        "count": len(tool_state.get_enabled()),
+        "version": tool_state.version
+    }
+
+
+@app.patch("/api/current")
+async def patch_current(delta: ToolDelta):
+    """
+    Enable and disable tools in one atomic change.
+
+    add/remove take tool names or glob patterns (``github__*``), and
+    add_servers/remove_servers select whole servers; add wins over remove.
+    With expected_version, the change is rejected with 409 if the enabled
+    set has moved past that version. Returns the applied delta and the new
+    version.
+    """
+    enabled = tool_state.enabled_set()
+    add, unknown_add = router.select_tools(delta.add, delta.add_servers)
+    remove, unknown_remove = router.select_tools(delta.remove, delta.remove_servers, extra=enabled)
+    unknown = unknown_add + [name for name in unknown_remove if name in delta.remove_servers]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown tools or servers: {', '.join(unknown)}")
+
+    try:
+        added, removed = tool_state.apply_delta(
+            add=add, remove=remove, expected_version=delta.expected_version
+        )
+    except StateConflictError as e:
+        raise HTTPException(status_code=409, detail=e.to_dict())
+
+    return {
+        "success": True,
+        "version": tool_state.version,
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "count": len(tool_state.enabled_tools)
+    }
+
+
+@app.get("/api/events")
+async def events():
+    """
+    Server-sent events stream of state changes.
+
+    Starts with a hello event carrying the current versions, followed by
+    state deltas, catalog changes and resync requests (see events.py).
+    """
+    queue = event_bus.subscribe()
+
+    async def stream():
+        try:
+            yield {"event": "hello", "data": json.dumps({
+                "version": tool_state.version,
+                "catalog_version": router.catalog_version,
+                "count": len(tool_state.enabled_tools)
+            })}
+            while True:
+                event, data = await queue.get()
+                yield {"event": event, "data": json.dumps(data)}
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return EventSourceResponse(stream(), ping=15)
+
+
+@app.get("/api/calls")
+async def get_calls(
+    server: Optional[str] = None,
+    tool: Optional[str] = None,
+    min_ms: Optional[float] = None,
+    errors: Optional[bool] = None,
+    since: Optional[float] = None,
+    limit: int = 100
+):
+    """
+    Recent tools/call executions from the flight recorder, newest first.
+
+    Filters: server, tool (name or glob), min_ms (duration), errors
+    (true/false), since (Unix time). Slow calls are also kept on disk in
+    data_dir/calls/.
+    """
+    calls = flight_recorder.query(
+        server=server,
+        tool=tool,
+        min_ms=min_ms,
+        errors=errors,
+        since=since,
+        limit=max(1, min(limit, settings.recorder_size))
+    )
+    return {
+        "success": True,
+        "calls": calls,
+        "count": len(calls),
+        "recorded": len(flight_recorder),
+        "slow_threshold_ms": flight_recorder.slow_ms,
+        "slow_dropped": flight_recorder.writer.dropped
     }
 
 
@@ -285,47 +717,68 @@ async def toggle_tool(toggle: ToolToggle):
     return {"success": True, "tool": toggle.tool, "enabled": enabled}
 
 
+@app.get("/api/state/history")
+async def state_history(limit: int = 50):
+    """List recent enabled-tool versions (sqlite state backend)"""
+    try:
+        history = tool_state.history(limit)
+    except ConfigurationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return {"success": True, "version": tool_state.version, "history": history}
+
+
+@app.post("/api/state/rollback")
+async def state_rollback(rollback: StateRollback):
+    """Restore the enabled tools as of a version or timestamp (sqlite state backend)"""
+    if rollback.version is None and rollback.timestamp is None:
+        raise HTTPException(status_code=400, detail="Provide a version or timestamp")
+    try:
+        tool_state.rollback(version=rollback.version, timestamp=rollback.timestamp)
+    except ConfigurationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return {
+        "success": True,
+        "version": tool_state.version,
+        "tools": tool_state.get_enabled(),
+        "count": len(tool_state.get_enabled())
+    }
+
+
+@app.get("/api/state/profiles")
+async def state_profiles():
+    """List state profiles (sqlite state backend)"""
+    return {
+        "success": True,
+        "active": settings.state_profile,
+        "profiles": tool_state.backend.profiles()
+    }
+
+
 @app.get("/api/presets")
 async def list_presets():
     """List available presets"""
-    presets = []
-    if settings.presets_dir.exists():
-        for f in settings.presets_dir.glob("*.json"):
-            try:
-                with open(f) as fp:
-                    data = json.load(fp)
-                    presets.append({
-                        "name": f.stem,
-                        "description": data.get("description", ""),
-                        "tool_count": len(data.get("tools", []))
-                    })
-            except (json.JSONDecodeError, IOError):
-                continue
-
+    presets = preset_index.summaries(router.all_tools, router.catalog_version)
     return {"success": True, "presets": presets}
 
 
 @app.post("/api/presets/load")
 async def load_preset(preset: PresetLoad):
     """Load a preset"""
-    preset_file = settings.presets_dir / f"{preset.name}.json"
-    if not preset_file.exists():
+    try:
+        tools = preset_index.resolve(preset.name, router.all_tools, router.catalog_version)
+    except PresetNotFoundError:
         raise HTTPException(status_code=404, detail=f"Preset not found: {preset.name}")
+    except ConfigurationError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load preset: {e.message}")
 
-    try:
-        with open(preset_file) as f:
-            data = json.load(f)
-            tools = data.get("tools", [])
-            tool_state.set_tools(tools)
+    tool_state.set_tools(tools)
 
-        return {
-            "success": True,
-            "preset": preset.name,
-            "tools": tool_state.get_enabled(),
-            "count": len(tool_state.get_enabled())
-        }
-    except (json.JSONDecodeError, IOError) as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load preset: {e}")
+    return {
+        "success": True,
+        "preset": preset.name,
+        "tools": tool_state.get_enabled(),
+        "count": len(tool_state.get_enabled())
+    }
 
 
 @app.get("/health")
@@ -344,10 +797,12 @@ async def health():
     healthy_servers = sum(1 for s in server_status.values() if s.get("healthy"))
     total_servers = len(server_status)
 
-    if total_servers == 0:
+    if not router.discovery_complete:
+        overall_status = "starting"
+    elif total_servers == 0:
         overall_status = "degraded"
     elif healthy_servers == total_servers:
-        overall_status = "healthy"
+        overall_status = "degraded" if resource_sampler.alerts() else "healthy"
     elif healthy_servers > 0:
         overall_status = "degraded"
     else:
@@ -362,10 +817,84 @@ async def health():
         "tools": {
             "available": len(router.all_tools),
             "enabled": len(tool_state.get_enabled())
+        },
+        "resource_alerts": resource_sampler.alerts(),
+        "discovery": {
+            "complete": router.discovery_complete,
+            "pending": sorted(router.discovery_pending)
         }
     }
 
 
+# (sample field, metric name, type, help) for /metrics
+RESOURCE_METRICS = [
+    ("rss_bytes", "btr_server_memory_bytes", "gauge", "Resident memory of the server's processes or container"),
+    ("cpu_seconds", "btr_server_cpu_seconds", "gauge", "CPU time used so far by the server's live processes or container"),
+    ("cpu_percent", "btr_server_cpu_percent", "gauge", "CPU use over the last sample interval"),
+    ("open_fds", "btr_server_open_fds", "gauge", "Open file descriptors of the server's processes"),
+    ("threads", "btr_server_threads", "gauge", "Threads of the server's processes or container"),
+    ("processes", "btr_server_processes", "gauge", "Live processes spawned for the server"),
+]
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of server health and resource samples"""
+    server_status = router.get_server_status()
+    lines = [
+        "# HELP btr_uptime_seconds Seconds since the gateway started",
+        "# TYPE btr_uptime_seconds gauge",
+        f"btr_uptime_seconds {time.time() - _startup_time if _startup_time > 0 else 0:.2f}",
+        "# HELP btr_tools Tools in the catalog by state",
+        "# TYPE btr_tools gauge",
+        f'btr_tools{{state="available"}} {len(router.all_tools)}',
+        f'btr_tools{{state="enabled"}} {len(tool_state.get_enabled())}',
+        "# HELP btr_server_healthy Whether the server answered discovery",
+        "# TYPE btr_server_healthy gauge",
+    ]
+    lines += [
+        f'btr_server_healthy{{server="{name}"}} {int(bool(status.get("healthy")))}'
+        for name, status in server_status.items()
+    ]
+
+    samples = resource_sampler.samples
+    for field, metric, kind, help_text in RESOURCE_METRICS:
+        values = [(name, sample[field]) for name, sample in samples.items() if sample.get(field) is not None]
+        if not values:
+            continue
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{server="{name}"}} {value}' for name, value in values]
+
+    lines += [
+        "# HELP btr_server_resource_alert Resource thresholds currently exceeded",
+        "# TYPE btr_server_resource_alert gauge",
+    ]
+    lines += [
+        f'btr_server_resource_alert{{server="{name}",threshold="{threshold}"}} 1'
+        for name, alerts in resource_sampler.alerts().items() for threshold in alerts
+    ]
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: initial discovery has finished (503 until then)"""
+    pending = sorted(router.discovery_pending)
+    body = {
+        "ready": router.discovery_complete,
+        "servers": len(router.servers),
+        "discovered": len(router.servers) - len(pending),
+        "pending": pending
+    }
+    return JSONResponse(body, status_code=200 if router.discovery_complete else 503)
+
+
 @app.get("/api/status")
 async def get_status():
     """
@@ -382,10 +911,7 @@ async def get_status():
         "tools": {
             "available": len(router.all_tools),
             "enabled": len(tool_state.get_enabled()),
-            "by_server": {
-                name: len([t for t in router.all_tools.values() if t["server"] == name])
-                for name in router.servers
-            }
+            "by_server": {name: router.all_tools.count(name) for name in router.servers}
         },
         "config": {
             "presets_dir": str(settings.presets_dir),
@@ -396,11 +922,80 @@ async def get_status():
     }
 
 
-if __name__ == "__main__":
+# =============================================================================
+# Tool Selector UI (optional; BTR_UI_DIR)
+# =============================================================================
+
+class CachedStaticFiles(StaticFiles):
+    """Static files with Cache-Control (Starlette adds ETag and Last-Modified)"""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = f"public, max-age={settings.ui_cache_max_age}"
+        return response
+
+
+if settings.ui_dir is not None and (settings.ui_dir / "static").is_dir():
+    app.mount("/static", CachedStaticFiles(directory=settings.ui_dir / "static"), name="static")
+
+    @app.get("/", include_in_schema=False)
+    async def ui_index():
+        """Tool selector page; the UI calls this gateway's /api/* directly"""
+        return FileResponse(
+            settings.ui_dir / "templates" / "index.html",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+
+def serve_tcp_and_uds(uds: Path):
+    """
+    Run uvicorn on the TCP port and a unix socket at once.
+
+    The uvicorn CLI binds one or the other (``--uds``); co-located agents
+    and pollers skip TCP on the socket while remote clients keep the port.
+    """
+    import inspect
+
     import uvicorn
-    uvicorn.run(
+    from uvicorn.supervisors import Multiprocess
+
+    config = uvicorn.Config(
         "main:app",
         host=settings.host,
         port=settings.port,
+        workers=settings.workers,
         log_level=settings.log_level.lower()
     )
+    sockets = [config.bind_socket()]
+    if uds.is_socket():
+        uds.unlink()  # left behind by an unclean exit
+    config.uds = str(uds)
+    sockets.append(config.bind_socket())
+    config.uds = None
+
+    server = uvicorn.Server(config)
+    try:
+        if config.workers > 1:
+            # Older uvicorn takes the worker function; newer versions build it themselves
+            if "target" in inspect.signature(Multiprocess).parameters:
+                Multiprocess(config, target=server.run, sockets=sockets).run()
+            else:
+                Multiprocess(config, sockets=sockets).run()
+        else:
+            server.run(sockets=sockets)
+    finally:
+        uds.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    if settings.uds is not None:
+        serve_tcp_and_uds(settings.uds)
+    else:
+        import uvicorn
+        uvicorn.run(
+            "main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=settings.workers,
+            log_level=settings.log_level.lower()
+        )
@@ -0,0 +1,509 @@
+"""
+BTR Output Budgets - Bounded tool results with continuations
+
+A tool's output budget is the smaller of ``max_bytes`` and ``max_tokens``
+(estimated at BYTES_PER_TOKEN bytes per token). Limits come from settings
+and can be overridden per server and per tool in config.json:
+
+    "output_limits": {
+        "max_bytes": 65536,
+        "tools": {"get_file_contents": {"max_tokens": 4000}}
+    }
+
+The transport feeds the raw tools/call response through a TruncatingFilter
+while it is read. Once the budget is spent, the rest of each ``"text"``
+value is diverted to the ContinuationStore and replaced by a marker naming
+a handle; the model reads further with the built-in ``btr__continue``
+tool. Only the kept part is parsed, so memory per call stays bounded by
+the budget plus the continuation store.
+
+Text values larger than the spill threshold are not truncated but streamed
+to the SpillStore and replaced by a ``resource_link`` (see spill.py).
+"""
+import json
+import os
+import re
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from config import settings
+from spill import SpillStore, SpillWriter
+
+# Rough bytes per token for English text and code
+BYTES_PER_TOKEN = 4
+
+CONTINUE_TOOL = "btr__continue"
+
+# Continuation handles (secrets.token_hex(8)); also the file names on disk
+HANDLE = re.compile(r"[0-9a-f]{16}")
+
+# Complete tokens inside a JSON string (stops before '"' or an incomplete escape)
+STRING_BODY = re.compile(rb'(?:[^"\\]+|\\u[0-9a-fA-F]{4}|\\[^u])*', re.S)
+ESCAPE = re.compile(rb'\\(?:u[0-9a-fA-F]{4}|.)', re.S)
+LOW_SURROGATE = re.compile(rb'\\u[dD][c-fC-F][0-9a-fA-F]{2}')
+STRUCTURE = re.compile(rb'[{}\[\],:]')
+
+
+@dataclass
+class OutputLimits:
+    """Output budget and spill threshold for one tool (0 means unlimited)"""
+    max_bytes: int = 0
+    max_tokens: int = 0
+    spill_bytes: int = 0
+
+    @property
+    def budget(self) -> int:
+        """Effective limit in bytes, or 0 if unlimited"""
+        limits = [limit for limit in (self.max_bytes, self.max_tokens * BYTES_PER_TOKEN) if limit > 0]
+        return min(limits) if limits else 0
+
+    @classmethod
+    def resolve(cls, server_config: dict, tool_name: str) -> "OutputLimits":
+        """
+        Limits for a tool: settings, then server, then per-tool overrides.
+
+        Args:
+            server_config: Raw config.json of the tool's server
+            tool_name: Tool name without server prefix
+        """
+        limits = cls(settings.output_max_bytes, settings.output_max_tokens, settings.spill_threshold_bytes)
+        server_limits = server_config.get("output_limits") or {}
+        for overrides in (server_limits, (server_limits.get("tools") or {}).get(tool_name) or {}):
+            limits.max_bytes = overrides.get("max_bytes", limits.max_bytes)
+            limits.max_tokens = overrides.get("max_tokens", limits.max_tokens)
+            limits.spill_bytes = overrides.get("spill_bytes", limits.spill_bytes)
+        return limits
+
+
+def truncation_marker(remaining: int, handle: str, offset: int) -> str:
+    """Text appended where content was cut"""
+    args = json.dumps({"handle": handle, "offset": offset})
+    return (
+        f"\n\n[truncated: {remaining} more bytes (~{remaining // BYTES_PER_TOKEN} tokens). "
+        f"Call {CONTINUE_TOOL} with {args} to read more.]"
+    )
+
+
+class ContinuationStore:
+    """
+    Text cut from tool results, kept for btr__continue.
+
+    Least recently used entries are evicted once the total size exceeds
+    ``max_bytes``. With a ``directory`` (several workers), every entry is
+    also written there, so a continuation routed to another worker is
+    loaded from disk; files are removed by cleanup() once idle past the TTL.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[Path] = None, ttl: float = 3600.0):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[bytes, int]] = OrderedDict()
+        self._size = 0
+
+    def put(self, text: bytes, budget: int) -> str:
+        """
+        Store cut text.
+
+        Args:
+            text: UTF-8 text that did not fit
+            budget: Bytes to return per continuation
+
+        Returns:
+            Handle for btr__continue
+        """
+        handle = secrets.token_hex(8)
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / handle).write_bytes(b"%d\n" % budget + text)
+        self._remember(handle, text, budget)
+        return handle
+
+    def _remember(self, handle: str, text: bytes, budget: int):
+        self._entries[handle] = (text, budget)
+        self._size += len(text)
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _entry(self, handle: str) -> tuple[bytes, int]:
+        """Entry from memory, or from the shared directory (written by another worker)"""
+        if handle in self._entries:
+            self._entries.move_to_end(handle)
+            return self._entries[handle]
+        if self.directory is None or not HANDLE.fullmatch(handle):
+            raise KeyError(handle)
+        path = self.directory / handle
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # restart the TTL
+        except FileNotFoundError:
+            raise KeyError(handle)
+        header, _, text = data.partition(b"\n")
+        self._remember(handle, text, int(header))
+        return text, int(header)
+
+    def cleanup(self) -> int:
+        """
+        Remove continuation files idle for longer than the TTL.
+
+        Returns:
+            Number of files removed
+        """
+        if self.directory is None or not self.directory.exists():
+            return 0
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def read(self, handle: str, offset: int = 0) -> tuple[str, Optional[int]]:
+        """
+        Next budget-sized slice of stored text.
+
+        Returns:
+            (text, next offset or None when nothing is left)
+
+        Raises:
+            KeyError: If the handle is unknown or was evicted
+        """
+        text, budget = self._entry(handle)
+
+        end = min(len(text), offset + budget)
+        while end < len(text) and (text[end] & 0xC0) == 0x80:
+            end -= 1
+        if end <= offset < len(text):
+            # Budget smaller than the next character: return that whole character
+            end = offset + 1
+            while end < len(text) and (text[end] & 0xC0) == 0x80:
+                end += 1
+        chunk = text[offset:end].decode("utf-8", errors="replace")
+        return chunk, (end if end < len(text) else None)
+
+    def call(self, arguments: dict) -> dict:
+        """Run the btr__continue tool"""
+        handle = arguments.get("handle")
+        offset = arguments.get("offset", 0)
+        if not isinstance(handle, str) or not isinstance(offset, int) or offset < 0:
+            raise ValueError(f"{CONTINUE_TOOL} requires a handle and a non-negative offset")
+
+        try:
+            text, next_offset = self.read(handle, offset)
+        except KeyError:
+            raise ValueError(f"Unknown or expired continuation handle: {handle}")
+
+        if next_offset is not None:
+            remaining = len(self._entry(handle)[0]) - next_offset
+            text += truncation_marker(remaining, handle, next_offset)
+        return {"content": [{"type": "text", "text": text}]}
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def continue_tool_schema() -> dict:
+    """tools/list entry for btr__continue"""
+    return {
+        "name": CONTINUE_TOOL,
+        "description": "Read more of a tool result that was truncated by the BTR gateway.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "Handle from the truncation marker"},
+                "offset": {"type": "integer", "description": "Offset from the truncation marker", "default": 0}
+            },
+            "required": ["handle"]
+        }
+    }
+
+
+class TruncatingFilter:
+    """
+    Streaming filter over a JSON-RPC response.
+
+    ``feed()`` returns the bytes to keep; the output is valid JSON with every
+    ``"text"`` value cut once ``budget`` bytes of text have been kept. Cut
+    text goes to the ContinuationStore (up to its size) and a marker is
+    appended in its place. Other values pass through untouched.
+
+    With a spill store, a ``"text"`` value is held until it ends or passes
+    ``spill_bytes``; past that it is written to disk and replaced by a
+    placeholder that link_spills() turns into a resource link.
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        store: ContinuationStore,
+        spill: Optional[SpillStore] = None,
+        spill_bytes: int = 0
+    ):
+        self.budget = budget
+        self.remaining = budget if budget else sys.maxsize
+        self.store = store
+        self.spill = spill if spill_bytes else None
+        self.spill_bytes = spill_bytes
+        self.truncated: list[tuple[str, int]] = []  # (handle, cut bytes)
+        self.spilled: list[tuple[str, dict]] = []  # (placeholder text, resource_link item)
+
+        self._stack: list[list] = []  # [ord("{") or ord("["), current key]
+        self._expect_key = False
+        self._in_string = False
+        self._string_kind: Optional[str] = None  # "key", "text" or "value"
+        self._key = bytearray()
+        self._overflow: Optional[bytearray] = None
+        self._cut_bytes = 0
+        self._held: Optional[bytearray] = None
+        self._writer: Optional[SpillWriter] = None
+        self._pending_surrogate = b""
+        self._carry = b""
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Process a chunk of the response; returns the bytes to keep"""
+        data = self._carry + chunk if self._carry else chunk
+        self._carry = b""
+        out = bytearray()
+        i, n = 0, len(data)
+
+        while i < n:
+            if not self._in_string:
+                j = data.find(b'"', i)
+                end = n if j < 0 else j
+                for m in STRUCTURE.finditer(data, i, end):
+                    self._structure(data[m.start()])
+                out += data[i:end]
+                if j < 0:
+                    break
+                out += b'"'
+                self._open_string()
+                i = j + 1
+                continue
+
+            end = STRING_BODY.match(data, i).end()
+            run = data[i:end]
+            if end == n:
+                hold = _incomplete_utf8(run)
+                if hold:
+                    self._carry = run[-hold:]
+                    run = run[:-hold]
+            self._string_bytes(run, out)
+
+            if end == n:
+                break
+            if data[end] == ord('"'):
+                self._close_string(out)
+                out += b'"'
+                i = end + 1
+            elif end + 6 > n:
+                # Escape split across chunks
+                self._carry = data[end:]
+                break
+            else:
+                # Malformed escape; pass it through
+                self._string_bytes(data[end:end + 2], out)
+                i = end + 2
+
+        return bytes(out)
+
+    def close(self) -> bytes:
+        """Flush anything held back at the end of the response"""
+        carry, self._carry = self._carry, b""
+        return carry
+
+    def abort(self):
+        """Discard a spill left unfinished by a failed or cut-off response"""
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+
+    def link_spills(self, result: Any) -> Any:
+        """Replace spill placeholders in a tools/call result's content with resource links"""
+        if not self.spilled or not isinstance(result, dict) or not isinstance(result.get("content"), list):
+            return result
+        links = dict(self.spilled)
+        result["content"] = [
+            links.get(item.get("text"), item)
+            if isinstance(item, dict) and item.get("type") == "text" else item
+            for item in result["content"]
+        ]
+        return result
+
+    def _structure(self, c: int):
+        if c == ord("{"):
+            self._stack.append([c, None])
+            self._expect_key = True
+        elif c == ord("["):
+            self._stack.append([c, None])
+            self._expect_key = False
+        elif c in (ord("}"), ord("]")):
+            if self._stack:
+                self._stack.pop()
+            self._expect_key = False
+        elif c == ord(","):
+            self._expect_key = bool(self._stack) and self._stack[-1][0] == ord("{")
+        else:  # ':'
+            self._expect_key = False
+
+    def _open_string(self):
+        self._in_string = True
+        if self._expect_key:
+            self._string_kind = "key"
+            self._key.clear()
+        elif self._stack and self._stack[-1][0] == ord("{") and self._stack[-1][1] == b"text":
+            self._string_kind = "text"
+            if self.spill is not None:
+                self._held = bytearray()
+        else:
+            self._string_kind = "value"
+
+    def _string_bytes(self, run: bytes, out: bytearray):
+        if not run:
+            return
+        if self._string_kind == "key":
+            if len(self._key) < 64:
+                self._key += run
+            out += run
+        elif self._string_kind == "value":
+            out += run
+        elif self._writer is not None:
+            self._spill_bytes(run)
+        elif self._held is not None:
+            self._held += run
+            if len(self._held) > self.spill_bytes:
+                self._writer = self.spill.writer()
+                self._spill_bytes(bytes(self._held))
+                self._held = None
+        else:
+            self._text_bytes(run, out)
+
+    def _text_bytes(self, run: bytes, out: bytearray):
+        if self._overflow is None and len(run) <= self.remaining:
+            out += run
+            self.remaining -= len(run)
+        else:
+            if self._overflow is None:
+                cut = _cut_point(run, self.remaining)
+                out += run[:cut]
+                self.remaining = max(0, self.remaining - cut)
+                self._overflow = bytearray()
+                run = run[cut:]
+            self._cut_bytes += len(run)
+            room = self.store.max_bytes - len(self._overflow)
+            if room > 0:
+                self._overflow += run[:_cut_point(run, room)] if len(run) > room else run
+
+    def _close_string(self, out: bytearray):
+        self._in_string = False
+        if self._string_kind == "key":
+            if self._stack:
+                self._stack[-1][1] = bytes(self._key)
+        elif self._writer is not None:
+            self._finish_spill(out)
+        elif self._held is not None:
+            held, self._held = self._held, None
+            self._text_bytes(bytes(held), out)
+
+        if self._overflow is not None:
+            try:
+                text = json.loads(b'"' + bytes(self._overflow) + b'"').encode("utf-8", errors="replace")
+            except ValueError:
+                text = b""
+            handle = self.store.put(text, self.budget)
+            self.truncated.append((handle, self._cut_bytes))
+            marker = truncation_marker(len(text), handle, 0)
+            out += json.dumps(marker)[1:-1].encode()
+            self._overflow = None
+            self._cut_bytes = 0
+        self._string_kind = None
+
+    def _spill_bytes(self, raw: bytes):
+        """Decode escaped string content and write it to the spill"""
+        raw = self._pending_surrogate + raw
+        try:
+            text = json.loads(b'"' + raw + b'"')
+        except ValueError:
+            text = raw.decode("utf-8", errors="replace")
+        # A surrogate pair may straddle two runs; decode its first half with the next run
+        if text and "\ud800" <= text[-1] <= "\udbff" and raw[-6:-4] == b"\\u":
+            text, self._pending_surrogate = text[:-1], raw[-6:]
+        else:
+            self._pending_surrogate = b""
+        self._writer.write(text.encode("utf-8", errors="replace"))
+
+    def _finish_spill(self, out: bytearray):
+        if self._pending_surrogate:
+            self._writer.write("\ufffd".encode())
+            self._pending_surrogate = b""
+        digest, size = self._writer.commit()
+        self._writer = None
+
+        uri = self.spill.uri(digest)
+        placeholder = f"[Result stored as {uri} ({size} bytes); read it with resources/read]"
+        self.spilled.append((placeholder, {
+            "type": "resource_link",
+            "uri": uri,
+            "name": f"result-{digest[:12]}",
+            "description": (
+                f"Tool result too large to return inline ({size} bytes). Read it with "
+                "resources/read; append ?offset=N&length=M to the URI for a byte range."
+            ),
+            "mimeType": "text/plain",
+            "size": size
+        }))
+        out += json.dumps(placeholder)[1:-1].encode()
+
+
+def _incomplete_utf8(run: bytes) -> int:
+    """Number of trailing bytes that start an incomplete UTF-8 character"""
+    for back in range(1, min(3, len(run)) + 1):
+        byte = run[-back]
+        if byte & 0xC0 == 0xC0:
+            length = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return back if length > back else 0
+        if byte & 0x80 == 0:
+            return 0
+    return 0
+
+
+def _cut_point(run: bytes, limit: int) -> int:
+    """
+    Largest safe cut at or near ``limit`` in a run of complete string tokens.
+
+    Never splits a UTF-8 character or an escape, and keeps surrogate pairs
+    together.
+    """
+    cut = min(limit, len(run))
+    while 0 < cut < len(run) and (run[cut] & 0xC0) == 0x80:
+        cut -= 1
+    for m in ESCAPE.finditer(run, 0, min(len(run), cut + 6)):
+        if m.start() >= cut:
+            break
+        if cut < m.end():
+            cut = m.start()
+            break
+    if LOW_SURROGATE.match(run, cut):
+        cut += 6
+    return cut
+
+
+# Global continuation store (on disk too when btr__continue may reach another worker)
+continuations = ContinuationStore(
+    settings.output_continuation_max_bytes,
+    settings.data_dir / "continuations" if settings.shared_state or settings.workers > 1 else None,
+    settings.spill_ttl
+)
@@ -0,0 +1,234 @@
+"""
+BTR Preset Index - In-memory preset cache with mtime invalidation
+
+Preset files may use glob patterns and inherit from other presets:
+
+{
+  "name": "github-readonly",
+  "description": "Read-only GitHub tools plus research",
+  "extends": "research",
+  "tools": ["github__get_*", "github__list_*", "github__search_*"],
+  "exclude": ["github__get_me"]
+}
+
+Resolved tool sets are compiled against the catalog once per
+(preset generation, catalog version) and reused until either changes.
+"""
+import fnmatch
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from catalog import GLOB_CHARS, ToolCatalog
+from config import settings
+from errors import ConfigurationError, PresetNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+def is_pattern(entry: str) -> bool:
+    """Check if a preset entry is a glob pattern rather than a tool name"""
+    return any(c in GLOB_CHARS for c in entry)
+
+
+@dataclass
+class Preset:
+    """A parsed preset file"""
+    name: str
+    description: str = ""
+    tools: list[str] = field(default_factory=list)
+    exclude: list[str] = field(default_factory=list)
+    extends: list[str] = field(default_factory=list)
+    mtime_ns: int = 0
+
+
+class PresetIndex:
+    """
+    Caches parsed presets and their resolved tool sets.
+
+    refresh() only stats the preset files; a file is re-parsed when its
+    mtime changes. Every change bumps the generation, which invalidates
+    compiled tool sets.
+    """
+
+    def __init__(self, presets_dir: Path):
+        self.presets_dir = presets_dir
+        self.generation = 0
+        self._presets: dict[str, Preset] = {}
+        self._invalid: dict[str, int] = {}  # name -> mtime of unparseable file
+        self._compiled: dict[str, tuple[int, int, frozenset[str]]] = {}
+
+    def refresh(self) -> bool:
+        """
+        Re-read preset files whose mtime changed.
+
+        Returns:
+            True if any preset was added, changed or removed
+        """
+        seen = set()
+        changed = False
+
+        if self.presets_dir.exists():
+            for preset_file in self.presets_dir.glob("*.json"):
+                name = preset_file.stem
+                try:
+                    mtime_ns = preset_file.stat().st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(name)
+
+                cached = self._presets.get(name)
+                if cached is not None and cached.mtime_ns == mtime_ns:
+                    continue
+                if self._invalid.get(name) == mtime_ns:
+                    seen.discard(name)
+                    continue
+
+                preset = self._parse(preset_file, mtime_ns)
+                if preset is None:
+                    self._invalid[name] = mtime_ns
+                    seen.discard(name)
+                    continue
+
+                self._invalid.pop(name, None)
+                self._presets[name] = preset
+                changed = True
+
+        for name in set(self._presets) - seen:
+            del self._presets[name]
+            changed = True
+
+        if changed:
+            self.generation += 1
+            self._compiled.clear()
+            logger.debug(f"Preset index refreshed (generation {self.generation})")
+        return changed
+
+    def _parse(self, preset_file: Path, mtime_ns: int) -> Optional[Preset]:
+        """Parse one preset file, or None if it is unreadable"""
+        try:
+            with open(preset_file) as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Skipping invalid preset {preset_file.name}: {e}")
+            return None
+
+        extends = data.get("extends", [])
+        if isinstance(extends, str):
+            extends = [extends]
+
+        return Preset(
+            name=preset_file.stem,
+            description=data.get("description", ""),
+            tools=list(data.get("tools", [])),
+            exclude=list(data.get("exclude", [])),
+            extends=list(extends),
+            mtime_ns=mtime_ns
+        )
+
+    def names(self) -> list[str]:
+        """Names of all known presets"""
+        self.refresh()
+        return sorted(self._presets)
+
+    def get(self, name: str) -> Preset:
+        """
+        Get a parsed preset.
+
+        Raises:
+            PresetNotFoundError: If no such preset exists
+        """
+        self.refresh()
+        if name not in self._presets:
+            raise PresetNotFoundError(name, sorted(self._presets))
+        return self._presets[name]
+
+    def _entries(self, name: str, chain: tuple[str, ...] = ()) -> tuple[list[str], list[str]]:
+        """Flatten a preset's (include, exclude) entries through its extends chain"""
+        if name in chain:
+            raise ConfigurationError(
+                f"preset '{chain[0]}'",
+                f"circular extends: {' -> '.join(chain + (name,))}"
+            )
+        preset = self._presets.get(name)
+        if preset is None:
+            raise PresetNotFoundError(name, sorted(self._presets))
+
+        include, exclude = [], []
+        for parent in preset.extends:
+            parent_include, parent_exclude = self._entries(parent, chain + (name,))
+            include.extend(parent_include)
+            exclude.extend(parent_exclude)
+        include.extend(preset.tools)
+        exclude.extend(preset.exclude)
+        return include, exclude
+
+    def resolve(self, name: str, catalog: ToolCatalog, catalog_version: int = 0) -> frozenset[str]:
+        """
+        Compile a preset into a concrete tool set.
+
+        Literal tool names are kept even if not (yet) in the catalog, so a
+        preset can be applied before every server is discovered. Patterns
+        are expanded against the catalog.
+
+        Args:
+            name: Preset name
+            catalog: The router's tool catalog
+            catalog_version: Version of the catalog; results are cached per version
+
+        Returns:
+            Frozen set of tool names
+
+        Raises:
+            PresetNotFoundError: If the preset or one it extends does not exist
+            ConfigurationError: If the extends chain is circular
+        """
+        self.refresh()
+        return self._resolve(name, catalog, catalog_version)
+
+    def _resolve(self, name: str, catalog: ToolCatalog, catalog_version: int) -> frozenset[str]:
+        """resolve() without the mtime refresh"""
+        cached = self._compiled.get(name)
+        if cached is not None and cached[0] == self.generation and cached[1] == catalog_version:
+            return cached[2]
+
+        include, exclude = self._entries(name)
+        tools = set()
+        for entry in include:
+            if is_pattern(entry):
+                tools.update(catalog.match(entry))
+            else:
+                tools.add(entry)
+        for entry in exclude:
+            if is_pattern(entry):
+                tools.difference_update(fnmatch.filter(tools, entry))
+            else:
+                tools.discard(entry)
+
+        resolved = frozenset(tools)
+        self._compiled[name] = (self.generation, catalog_version, resolved)
+        return resolved
+
+    def summaries(self, catalog: ToolCatalog, catalog_version: int = 0) -> list[dict]:
+        """Preset listing for the management API"""
+        summaries = []
+        for name in self.names():
+            preset = self._presets[name]
+            try:
+                tool_count = len(self._resolve(name, catalog, catalog_version))
+            except (PresetNotFoundError, ConfigurationError) as e:
+                logger.warning(f"Preset {name} cannot be resolved: {e}")
+                continue
+            summaries.append({
+                "name": name,
+                "description": preset.description,
+                "tool_count": tool_count,
+                "extends": preset.extends
+            })
+        return summaries
+
+
+# Global preset index
+preset_index = PresetIndex(settings.presets_dir)
@@ -0,0 +1,214 @@
+"""
+BTR Rate Limits - Token buckets per upstream server and per tool
+
+Configured in servers/<name>/config.json:
+
+    "rate_limits": {
+        "requests_per_minute": 60,
+        "burst": 10,
+        "mode": "queue",
+        "max_wait": 30,
+        "tools": {"search_code": {"requests_per_minute": 10, "burst": 2}}
+    }
+
+A call takes one token from the server bucket and one from its tool's
+bucket. In ``queue`` mode a call that finds a bucket empty reserves the
+next token and sleeps until it is due, so bursts are smoothed into the
+configured rate; calls that would wait longer than ``max_wait`` seconds,
+and every over-limit call in ``reject`` mode, fail immediately with
+RateLimitedError instead of being sent upstream to fail.
+
+Upstream rate-limit errors (HTTP 429, "rate limit exceeded", ...) pause the
+server for the advertised retry-after (or an exponential backoff) and halve
+its rates; successful calls restore them gradually. Signals are honoured
+for every server, configured or not.
+
+Buckets are per worker process.
+"""
+import asyncio
+import re
+import time
+from typing import Any, Optional
+
+from errors import RateLimitedError
+
+DEFAULT_MODE = "queue"
+DEFAULT_MAX_WAIT = 30.0
+
+# Pause after a rate-limit signal without a retry-after hint: doubles per signal;
+# advertised retry-afters are capped at BACKOFF_MAX too
+BACKOFF_INITIAL = 5.0
+BACKOFF_MAX = 300.0
+
+# Adaptive rate: halved on each signal, recovered by this fraction per success
+RATE_SCALE_MIN = 0.1
+RATE_SCALE_RECOVERY = 0.05
+
+# A bare 429 or "throttle" is too common in tool output (issue numbers, file
+# names); only count them as an HTTP status or a throttled/throttling error
+RATE_LIMIT_SIGNAL = re.compile(
+    r"rate[ _-]?limit|too many requests|quota exceeded|\bthrottl(?:ed|ing)"
+    r"|\b(?:http|status(?:[ _]?code)?)\b[^\d\n]{0,10}429\b|\bhttp/\d(?:\.\d)?\s+429\b",
+    re.IGNORECASE
+)
+RETRY_AFTER = re.compile(
+    r"(?:retry[ _-]?after|try again in|retry in|reset(?:s)? in)\D{0,10}?"
+    r"(\d+(?:\.\d+)?)\s*(ms|milliseconds?|s|secs?|seconds?|m|mins?|minutes?)?\b",
+    re.IGNORECASE
+)
+RESET_EPOCH = re.compile(r"reset\D{0,20}?(\d{10})\b", re.IGNORECASE)
+
+
+def parse_rate_limit_signal(message: str) -> tuple[bool, Optional[float]]:
+    """
+    Look for a rate-limit signal in an upstream error message.
+
+    Returns:
+        (is_rate_limited, retry_after seconds or None)
+    """
+    if not message or not RATE_LIMIT_SIGNAL.search(message):
+        return False, None
+
+    match = RETRY_AFTER.search(message)
+    if match:
+        unit = (match.group(2) or "s").lower()
+        if unit.startswith(("ms", "milli")):
+            scale = 0.001
+        elif unit.startswith("m"):
+            scale = 60.0
+        else:
+            scale = 1.0
+        return True, min(BACKOFF_MAX, float(match.group(1)) * scale)
+
+    match = RESET_EPOCH.search(message)
+    if match:
+        return True, min(BACKOFF_MAX, max(0.0, int(match.group(1)) - time.time()))
+
+    return True, None
+
+
+def result_error_text(result: Any) -> str:
+    """Text of a tools/call result flagged isError (tools often report 429s this way)"""
+    if not isinstance(result, dict) or not result.get("isError"):
+        return ""
+    return " ".join(
+        item.get("text", "") for item in result.get("content") or []
+        if isinstance(item, dict) and item.get("type") == "text"
+    )
+
+
+class TokenBucket:
+    """Tokens refill at ``rate`` per second up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+
+    def reserve(self, now: float, scale: float = 1.0) -> float:
+        """
+        Take a token, going into debt if none is left.
+
+        Returns:
+            Seconds until the reserved token is due (0 if available now)
+        """
+        rate = self.rate * scale
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * rate)
+        self._updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / rate
+
+    def refund(self):
+        self.tokens += 1
+
+
+class RateLimiter:
+    """Rate limits and adaptive backoff for one upstream server"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.mode = config.get("mode", DEFAULT_MODE)
+        self.max_wait = config.get("max_wait", DEFAULT_MAX_WAIT)
+        self.bucket = self._make_bucket(config)
+        self.tool_buckets = {
+            tool: bucket for tool, bucket in (
+                (tool, self._make_bucket(tool_config))
+                for tool, tool_config in (config.get("tools") or {}).items()
+            ) if bucket is not None
+        }
+
+        self.blocked_until = 0.0
+        self.rate_scale = 1.0
+        self._backoff = BACKOFF_INITIAL
+        self.queued = 0
+        self.rejected = 0
+        self.signals = 0
+
+    @staticmethod
+    def _make_bucket(config: dict) -> Optional[TokenBucket]:
+        if config.get("requests_per_second"):
+            rate = float(config["requests_per_second"])
+        elif config.get("requests_per_minute"):
+            rate = config["requests_per_minute"] / 60.0
+        else:
+            return None
+        return TokenBucket(rate, float(config.get("burst", max(1.0, rate))))
+
+    async def acquire(self, server_name: str, tool_name: str):
+        """
+        Wait for permission to call a tool, or fail early.
+
+        Raises:
+            RateLimitedError: If over the limit in reject mode, or the wait
+                would exceed max_wait
+        """
+        now = time.monotonic()
+        buckets = [b for b in (self.bucket, self.tool_buckets.get(tool_name)) if b is not None]
+        delay = max(
+            [self.blocked_until - now] + [bucket.reserve(now, self.rate_scale) for bucket in buckets]
+        )
+        if delay <= 0:
+            return
+
+        if self.mode == "reject" or delay > self.max_wait:
+            for bucket in buckets:
+                bucket.refund()
+            self.rejected += 1
+            raise RateLimitedError(server_name, tool_name, delay)
+
+        self.queued += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.queued -= 1
+
+    def record_signal(self, retry_after: Optional[float]):
+        """Upstream said we are over its limit: pause and slow down"""
+        self.signals += 1
+        pause = min(BACKOFF_MAX, retry_after) if retry_after is not None else self._backoff
+        self._backoff = min(BACKOFF_MAX, self._backoff * 2)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        self.rate_scale = max(RATE_SCALE_MIN, self.rate_scale / 2)
+
+    def record_success(self):
+        self._backoff = BACKOFF_INITIAL
+        if self.rate_scale < 1.0:
+            self.rate_scale = min(1.0, self.rate_scale + RATE_SCALE_RECOVERY)
+
+    @property
+    def configured(self) -> bool:
+        return self.bucket is not None or bool(self.tool_buckets)
+
+    def status(self) -> dict:
+        """Limits, adaptive state and counters"""
+        return {
+            "mode": self.mode,
+            "requests_per_second": self.bucket.rate if self.bucket else None,
+            "tools": {tool: bucket.rate for tool, bucket in self.tool_buckets.items()},
+            "rate_scale": round(self.rate_scale, 3),
+            "paused_for": round(max(0.0, self.blocked_until - time.monotonic()), 2),
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "upstream_signals": self.signals
+        }
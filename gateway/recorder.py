@@ -0,0 +1,262 @@
+"""
+BTR Flight Recorder - Recent and slow tool calls
+
+Every tools/call is recorded in a bounded in-memory ring
+(``BTR_RECORDER_SIZE`` calls) with its server, transport, priority,
+per-phase timings, result size and error class:
+
+    rate_limit  waiting for the server's or tool's rate limit
+    queue       waiting for a scheduler slot
+    upstream    the transport round trip (including unpausing a container)
+    post        linking spilled results into the response
+
+Calls taking at least ``BTR_RECORDER_SLOW_MS`` are also appended to
+``data_dir/calls/slow-calls.jsonl.gz`` by a background thread, so the
+event loop never waits on disk. The file is rotated at
+``BTR_RECORDER_FILE_MAX_BYTES`` keeping ``BTR_RECORDER_FILE_KEEP`` old
+files. Arguments are kept for a sampled fraction of calls
+(``BTR_RECORDER_SAMPLE_ARGS``), cut to ``BTR_RECORDER_ARGS_MAX_BYTES``.
+
+GET /api/calls lists the ring, newest first, with filters.
+"""
+import fnmatch
+import gzip
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SLOW_FILE = "slow-calls.jsonl.gz"
+
+# Records waiting for the writer thread before new ones are dropped
+WRITE_QUEUE_MAX = 10000
+
+ERROR_MESSAGE_MAX = 300
+
+
+def result_size(result: Any) -> int:
+    """Approximate size of a tools/call result in bytes (spilled results count in full)"""
+    if not isinstance(result, dict):
+        return 0
+    size = 0
+    for item in result.get("content") or []:
+        if not isinstance(item, dict):
+            continue
+        if item.get("type") == "text":
+            size += len(item.get("text", "").encode("utf-8", errors="replace"))
+        elif item.get("type") == "resource_link" and "size" in item:
+            size += item["size"]
+        else:
+            size += len(json.dumps(item))
+    return size
+
+
+class CallTrace:
+    """One tools/call in progress; ``mark`` closes the current phase"""
+
+    def __init__(self, seq: int, tool: str, server: str, transport: Optional[str], priority: str):
+        self.seq = seq
+        self.tool = tool
+        self.server = server
+        self.transport = transport
+        self.priority = priority
+        self.started_at = time.time()
+        self.phases: dict[str, float] = {}
+        self.truncated = False
+        self.spilled = False
+        self.arguments: Optional[str] = None
+        self._start = time.monotonic()
+        self._last = self._start
+
+    def mark(self, phase: str):
+        now = time.monotonic()
+        self.phases[phase] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def elapsed_ms(self) -> float:
+        return round((time.monotonic() - self._start) * 1000, 2)
+
+
+class SlowCallWriter:
+    """Appends records to a rotated gzip JSONL file from a background thread"""
+
+    def __init__(self, directory: Path, max_bytes: int, keep: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / SLOW_FILE
+
+    def submit(self, record: dict):
+        """Queue a record without blocking (dropped if the writer is behind)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="btr-slow-calls", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued records and stop the thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]
+            if records:
+                try:
+                    self._write(records)
+                except OSError as e:
+                    logger.error(f"Cannot write slow calls to {self.path}: {e}")
+            if len(records) < len(batch):
+                return
+
+    def _write(self, records: list[dict]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        # Each append is its own gzip member; readers (zcat, gzip.open) see one stream
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(lines)
+        if self.path.stat().st_size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """slow-calls.jsonl.gz -> .1.jsonl.gz -> ... dropping the oldest"""
+        def rotated(n: int) -> Path:
+            return self.directory / SLOW_FILE.replace(".jsonl.gz", f".{n}.jsonl.gz")
+
+        rotated(self.keep).unlink(missing_ok=True)
+        for n in range(self.keep - 1, 0, -1):
+            if rotated(n).exists():
+                rotated(n).rename(rotated(n + 1))
+        if self.keep > 0:
+            self.path.rename(rotated(1))
+        else:
+            self.path.unlink(missing_ok=True)
+
+
+class FlightRecorder:
+    """Ring buffer of recent tool calls; slow ones also go to disk"""
+
+    def __init__(self, size: int, slow_ms: float, writer: SlowCallWriter):
+        self.slow_ms = slow_ms
+        self.writer = writer
+        self._calls: deque[dict] = deque(maxlen=size)
+        self._seq = 0
+
+    def start(self, tool: str, server: str, transport: Optional[str], priority: str, arguments: dict) -> CallTrace:
+        self._seq += 1
+        trace = CallTrace(self._seq, tool, server, transport, priority)
+        if settings.recorder_sample_args and random.random() < settings.recorder_sample_args:
+            text = json.dumps(arguments, ensure_ascii=False, default=str)
+            if len(text) > settings.recorder_args_max_bytes:
+                text = text[:settings.recorder_args_max_bytes] + "..."
+            trace.arguments = text
+        return trace
+
+    def finish(self, trace: CallTrace, result: Any = None, error: Optional[BaseException] = None):
+        """Record a completed call"""
+        record = {
+            "id": trace.seq,
+            "started_at": round(trace.started_at, 3),
+            "tool": trace.tool,
+            "server": trace.server,
+            "transport": trace.transport,
+            "priority": trace.priority,
+            "duration_ms": trace.elapsed_ms(),
+            "phases_ms": trace.phases,
+            "result_bytes": result_size(result) if error is None else 0,
+            "is_error": error is not None or bool(isinstance(result, dict) and result.get("isError")),
+            "error": None,
+            "truncated": trace.truncated,
+            "spilled": trace.spilled,
+        }
+        if error is not None:
+            cause = error.__cause__ or error
+            record["error"] = {
+                "class": type(cause).__name__,
+                "message": str(error)[:ERROR_MESSAGE_MAX]
+            }
+        if trace.arguments is not None:
+            record["arguments"] = trace.arguments
+
+        self._calls.append(record)
+        if self.slow_ms and record["duration_ms"] >= self.slow_ms:
+            self.writer.submit(record)
+
+    def query(
+        self,
+        server: Optional[str] = None,
+        tool: Optional[str] = None,
+        min_ms: Optional[float] = None,
+        errors: Optional[bool] = None,
+        since: Optional[float] = None,
+        limit: int = 100
+    ) -> list[dict]:
+        """
+        Recent calls, newest first.
+
+        Args:
+            server: Only calls to this server
+            tool: Tool name or glob pattern (prefixed name)
+            min_ms: Only calls at least this slow
+            errors: True for failed calls only, False for successful only
+            since: Only calls started at or after this Unix time
+            limit: Maximum number of calls
+        """
+        matches = []
+        for record in reversed(self._calls):
+            # The ring is in finish order: a slow call that started earlier can follow newer ones
+            if since is not None and record["started_at"] < since:
+                continue
+            if server is not None and record["server"] != server:
+                continue
+            if tool is not None and not fnmatch.fnmatchcase(record["tool"], tool):
+                continue
+            if min_ms is not None and record["duration_ms"] < min_ms:
+                continue
+            if errors is not None and record["is_error"] != errors:
+                continue
+            matches.append(record)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+# Global flight recorder
+flight_recorder = FlightRecorder(
+    settings.recorder_size,
+    settings.recorder_slow_ms,
+    SlowCallWriter(
+        settings.data_dir / "calls",
+        settings.recorder_file_max_bytes,
+        settings.recorder_file_keep
+    )
+)
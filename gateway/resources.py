@@ -0,0 +1,225 @@
+"""
+BTR Resources - Per-server CPU, memory, fd and thread accounting
+
+Every ``BTR_RESOURCE_SAMPLE_INTERVAL`` seconds the gateway samples what
+each upstream server is using:
+
+    local   processes spawned by StdioTransport (and their children),
+            read from /proc/<pid>/stat and /proc/<pid>/fd
+    docker  the container's cgroup, from the Docker API stats endpoint
+            (open fds are not reported for containers)
+
+HTTP and gateway upstreams run elsewhere and are not sampled.
+
+Samples are compared against alert thresholds from settings, overridable
+per server in config.json:
+
+    "resource_alerts": {"rss_mb": 512, "cpu_percent": 80, "open_fds": 1000, "threads": 200}
+"""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import settings
+from containers import DockerAPIError, container_manager
+
+logger = logging.getLogger(__name__)
+
+PROC = Path("/proc")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Threshold name -> (sample field, scale from threshold unit to field unit)
+ALERT_FIELDS = {
+    "rss_mb": ("rss_bytes", 1024 * 1024),
+    "cpu_percent": ("cpu_percent", 1),
+    "open_fds": ("open_fds", 1),
+    "threads": ("threads", 1),
+}
+
+
+def alert_thresholds(server_config: dict) -> dict[str, float]:
+    """Thresholds for a server: settings, then config.json resource_alerts (0 = off)"""
+    thresholds = {
+        "rss_mb": settings.resource_alert_rss_mb,
+        "cpu_percent": settings.resource_alert_cpu_percent,
+        "open_fds": settings.resource_alert_open_fds,
+        "threads": settings.resource_alert_threads,
+    }
+    for name, value in (server_config.get("resource_alerts") or {}).items():
+        if name in thresholds:
+            thresholds[name] = value
+    return {name: value for name, value in thresholds.items() if value}
+
+
+def format_value(threshold: str, values: dict) -> str:
+    """Current value of a thresholded field, for log messages"""
+    field, scale = ALERT_FIELDS[threshold]
+    if threshold == "rss_mb":
+        return f"{values[field] / scale:.0f}MB"
+    if threshold == "cpu_percent":
+        return f"{values[field]}%"
+    return str(values[field])
+
+
+def read_process(pid: int) -> Optional[dict]:
+    """
+    CPU time, RSS, threads and open fds of one process.
+
+    Returns:
+        None if the process has exited
+    """
+    try:
+        stat = (PROC / str(pid) / "stat").read_text()
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    # Fields after the parenthesised command name, which may contain spaces
+    fields = stat[stat.rindex(")") + 2:].split()
+    try:
+        open_fds = len(os.listdir(PROC / str(pid) / "fd"))
+    except (FileNotFoundError, PermissionError):
+        open_fds = 0
+    return {
+        "ppid": int(fields[1]),
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "threads": int(fields[17]),
+        "rss_bytes": int(fields[21]) * PAGE_SIZE,
+        "open_fds": open_fds,
+    }
+
+
+def process_tree(roots: set[int]) -> set[int]:
+    """The given pids and all their live descendants"""
+    children: dict[int, list[int]] = {}
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    tree, stack = set(), list(roots)
+    while stack:
+        pid = stack.pop()
+        if pid not in tree:
+            tree.add(pid)
+            stack.extend(children.get(pid, ()))
+    return tree
+
+
+class ResourceSampler:
+    """Latest resource sample per server, with CPU rates and alerts"""
+
+    def __init__(self):
+        self.samples: dict[str, dict] = {}
+        self._cpu: dict[str, tuple[float, dict]] = {}  # server -> (time, cpu seconds by pid/container)
+        self._alerting: dict[str, set[str]] = {}
+
+    def _sample_processes(self, pids: set[int]) -> tuple[dict, dict[str, float]]:
+        """Sum the usage of spawned processes and their children (blocking)"""
+        totals = {"processes": 0, "rss_bytes": 0, "cpu_seconds": 0.0, "open_fds": 0, "threads": 0}
+        cpu = {}
+        if not pids:
+            return totals, cpu
+        for pid in process_tree(pids):
+            info = read_process(pid)
+            if info is None:
+                continue
+            totals["processes"] += 1
+            totals["rss_bytes"] += info["rss_bytes"]
+            totals["cpu_seconds"] += info["cpu_seconds"]
+            totals["open_fds"] += info["open_fds"]
+            totals["threads"] += info["threads"]
+            cpu[str(pid)] = info["cpu_seconds"]
+        return totals, cpu
+
+    async def _sample_container(self, container: str) -> tuple[dict, dict[str, float]]:
+        stats = await container_manager.api.stats(container)
+        memory = stats.get("memory_stats") or {}
+        # Like `docker stats`: page cache that can be reclaimed is not counted
+        cache = (memory.get("stats") or {}).get("inactive_file", 0)
+        cpu_seconds = ((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage", 0) / 1e9
+        totals = {
+            "processes": None,
+            "rss_bytes": max(0, memory.get("usage", 0) - cache),
+            "cpu_seconds": cpu_seconds,
+            "open_fds": None,
+            "threads": (stats.get("pids_stats") or {}).get("current", 0),
+        }
+        return totals, {container: cpu_seconds}
+
+    async def sample(self, targets: dict[str, tuple[str, object]], configs: dict[str, dict]):
+        """
+        Take one sample of every server with a local process or container.
+
+        Args:
+            targets: server_name -> ("docker", container name) or ("proc", set of pids)
+            configs: server_name -> raw config.json (for alert overrides)
+        """
+        now = time.monotonic()
+        for name, (source, target) in targets.items():
+            try:
+                if source == "docker":
+                    totals, cpu = await self._sample_container(target)
+                else:
+                    totals, cpu = await asyncio.to_thread(self._sample_processes, set(target))
+            except DockerAPIError as e:
+                logger.debug(f"Cannot sample container {target} for {name}: {e}")
+                continue
+
+            # CPU rate from the growth of each process's (or the container's) CPU time
+            previous = self._cpu.get(name)
+            cpu_percent = None
+            if previous is not None and now > previous[0]:
+                used = sum(seconds - previous[1].get(key, 0.0) for key, seconds in cpu.items())
+                cpu_percent = round(max(0.0, used) / (now - previous[0]) * 100, 1)
+            self._cpu[name] = (now, cpu)
+
+            totals["cpu_seconds"] = round(totals["cpu_seconds"], 3)
+            self.samples[name] = {
+                "source": source,
+                **totals,
+                "cpu_percent": cpu_percent,
+                "sampled_at": round(time.time(), 3),
+                "alerts": self._check(name, totals, cpu_percent, configs.get(name, {}))
+            }
+
+        for name in list(self.samples):
+            if name not in targets:
+                self.samples.pop(name)
+                self._cpu.pop(name, None)
+                self._alerting.pop(name, None)
+
+    def _check(self, name: str, totals: dict, cpu_percent: Optional[float], config: dict) -> list[str]:
+        """Thresholds exceeded by a sample; logs when an alert starts or clears"""
+        values = {**totals, "cpu_percent": cpu_percent}
+        alerts = []
+        for threshold, limit in alert_thresholds(config).items():
+            field, scale = ALERT_FIELDS[threshold]
+            value = values.get(field)
+            if value is not None and value > limit * scale:
+                alerts.append(threshold)
+
+        previous = self._alerting.get(name, set())
+        for threshold in set(alerts) - previous:
+            logger.warning(
+                f"Server {name} over {threshold} threshold ({format_value(threshold, values)})"
+            )
+        for threshold in previous - set(alerts):
+            logger.info(f"Server {name} back under {threshold} threshold")
+        self._alerting[name] = set(alerts)
+        return alerts
+
+    def alerts(self) -> dict[str, list[str]]:
+        """Servers currently over a threshold"""
+        return {name: sample["alerts"] for name, sample in self.samples.items() if sample["alerts"]}
+
+
+# Global resource sampler
+resource_sampler = ResourceSampler()
@@ -2,15 +2,35 @@
 BTR Tool Router - Filters tools based on enabled state
 Supports multiple transport modes for MCP server communication
 """
+import asyncio
+import bisect
+import fnmatch
+import hashlib
 import json
 import logging
+import time
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from dataclasses import dataclass, field
 
+from catalog import ToolCatalog, ToolEntry
 from config import settings, tool_state
+from containers import container_manager
+from events import event_bus
+from output import CONTINUE_TOOL, OutputLimits, TruncatingFilter, continuations, continue_tool_schema
+from spill import spill_store
+from presets import is_pattern
+from recorder import CallTrace, flight_recorder
+from resources import resource_sampler
+from ratelimit import RateLimiter, parse_rate_limit_signal, result_error_text
+from scheduler import UpstreamScheduler, resolve_priority
+from selection import AUTO_ORDER, RaceResult, TransportSelection, race_transports
 from transports import TransportMode, get_transport
-from transports.base import Transport, TransportError
+from transports.base import Transport, TransportConnectionError, TransportError, TransportTimeoutError
+from transports.cassette import RecordingTransport
+from transports.docker import DockerTransport
+from transports.inproc import InProcTransport
+from transports.stdio import StdioTransport
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +42,6 @@ class MCPServer:
     description: str
     default_transport: str
     transports: dict[str, dict] = field(default_factory=dict)
-    tools: list[dict] = field(default_factory=list)
     healthy: bool = False
     active_transport: Optional[str] = None
 
@@ -36,8 +55,20 @@ class ToolRouter:
 
     def __init__(self):
         self.servers: dict[str, MCPServer] = {}
-        self.all_tools: dict[str, dict] = {}  # tool_name -> {server, schema}
+        self.all_tools = ToolCatalog()  # prefixed tool name -> ToolEntry
         self._transports: dict[str, Transport] = {}  # server_name -> active transport
+        self._configs: dict[str, dict] = {}  # server_name -> raw config.json contents
+        self._config_files: dict[Path, str] = {}  # config path -> server_name
+        self._drain_tasks: set[asyncio.Task] = set()
+        self._schedulers: dict[str, UpstreamScheduler] = {}  # server_name -> call queue
+        self._rate_limiters: dict[str, RateLimiter] = {}  # server_name -> token buckets
+        self._selections: dict[str, TransportSelection] = {}  # server_name -> why (auto-mode race)
+        self._published_selections: dict[str, dict] = {}  # the leader's selections (followers)
+        self._failover_tasks: set[asyncio.Task] = set()
+        self.catalog_version: int = 0  # bumped whenever all_tools changes
+        self.discovery_pending: set[str] = set()  # servers not yet answered during discovery
+        self.discovery_complete = False  # initial discovery (or shared catalog load) finished
+        self._tools_list_cache: Optional[tuple[tuple[int, int], list[dict], str]] = None
         self._load_servers()
 
     def _load_servers(self):
@@ -46,51 +77,141 @@ class ToolRouter:
             logger.warning(f"Servers directory not found: {settings.servers_dir}")
             return
 
+        for config_file in self._scan_config_files():
+            parsed = self._parse_server_config(config_file)
+            if parsed is None:
+                continue
+
+            config, server = parsed
+            self.servers[server.name] = server
+            self._configs[server.name] = config
+            self._config_files[config_file] = server.name
+            logger.debug(f"Loaded server: {server.name}")
+
+    def _scan_config_files(self) -> list[Path]:
+        """List servers/<name>/config.json files present on disk"""
+        if not settings.servers_dir.exists():
+            return []
+
+        config_files = []
         for server_dir in settings.servers_dir.iterdir():
             if not server_dir.is_dir():
                 continue
 
             config_file = server_dir / "config.json"
-            if not config_file.exists():
-                continue
+            if config_file.exists():
+                config_files.append(config_file)
+        return config_files
 
-            try:
-                with open(config_file) as f:
-                    config = json.load(f)
-
-                # Check for new multi-transport schema
-                if "transports" in config:
-                    server = MCPServer(
-                        name=config["name"],
-                        description=config.get("description", ""),
-                        default_transport=config.get("default_transport", "docker"),
-                        transports=config.get("transports", {})
-                    )
-                # Legacy schema support
-                elif "command" in config:
-                    server = MCPServer(
-                        name=config["name"],
-                        description=config.get("description", ""),
-                        default_transport="docker",
-                        transports={},
-                        _legacy_command=config.get("command"),
-                        _legacy_env=config.get("env", {})
-                    )
-                    logger.info(f"Using legacy config for {server.name}")
-                else:
-                    logger.warning(f"Invalid config for {server_dir.name}: missing transports or command")
-                    continue
+    def _parse_server_config(self, config_file: Path) -> Optional[tuple[dict, MCPServer]]:
+        """
+        Parse a single server config file.
+
+        Args:
+            config_file: Path to servers/<name>/config.json
 
-                self.servers[server.name] = server
-                logger.debug(f"Loaded server: {server.name}")
+        Returns:
+            (raw config, MCPServer) tuple, or None if the config is invalid
+        """
+        try:
+            with open(config_file) as f:
+                config = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Failed to load server config {config_file}: {e}")
+            return None
+
+        server = self._server_from_config(config, config_file.parent.name)
+        if server is None:
+            return None
+        return config, server
+
+    def _server_from_config(self, config: dict, source: str) -> Optional[MCPServer]:
+        """
+        Build an MCPServer from raw config.json contents.
+
+        Args:
+            config: Parsed config.json
+            source: Where the config came from (for log messages)
+
+        Returns:
+            MCPServer, or None if the config is invalid
+        """
+        try:
+            # Check for new multi-transport schema
+            if "transports" in config:
+                return MCPServer(
+                    name=config["name"],
+                    description=config.get("description", ""),
+                    default_transport=config.get("default_transport", "docker"),
+                    transports=config.get("transports", {})
+                )
+            # Legacy schema support
+            elif "command" in config:
+                server = MCPServer(
+                    name=config["name"],
+                    description=config.get("description", ""),
+                    default_transport="docker",
+                    transports={},
+                    _legacy_command=config.get("command"),
+                    _legacy_env=config.get("env", {})
+                )
+                logger.info(f"Using legacy config for {server.name}")
+                return server
+            else:
+                logger.warning(f"Invalid config for {source}: missing transports or command")
+                return None
 
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.error(f"Failed to load server config {config_file}: {e}")
+        except KeyError as e:
+            logger.error(f"Failed to load server config {source}: missing {e}")
+            return None
 
     def _get_transport_mode(self) -> str:
         """Get the effective transport mode from settings"""
         return settings.transport_mode
 
+    def _cassette_path(self, server_name: str) -> Path:
+        return (settings.cassette_dir or settings.data_dir / "cassettes") / f"{server_name}.jsonl"
+
+    def _replay_config(self, server: MCPServer) -> dict:
+        """Replay transport config: the server's own, defaulting to its cassette"""
+        return {
+            "cassette": str(self._cassette_path(server.name)),
+            "speed": settings.replay_speed,
+            **server.transports.get("replay", {})
+        }
+
+    def _record(self, server: MCPServer, transport: Optional[Transport]) -> Optional[Transport]:
+        """Wrap a transport to record its traffic if BTR_RECORD_CASSETTES is set"""
+        if (
+            transport is None
+            or not settings.record_cassettes
+            or server.active_transport in ("gateway", "replay")
+        ):
+            return transport
+        return RecordingTransport(transport, self._cassette_path(server.name))
+
+    def _race_recorder(self, server: MCPServer) -> Optional[Callable[[str, Transport], Transport]]:
+        """Record raced candidates so the winner's tools/list handshake reaches the cassette"""
+        if not settings.record_cassettes:
+            return None
+        cassette = self._cassette_path(server.name)
+
+        def wrap(mode: str, transport: Transport) -> Transport:
+            if mode in ("gateway", "replay"):
+                return transport
+            return RecordingTransport(transport, cassette, hold=True)
+        return wrap
+
+    async def _race(self, server: MCPServer, modes: list[str]) -> RaceResult:
+        """Race some of a server's transports; the winner keeps recording if enabled"""
+        result = await race_transports(
+            {mode: server.transports[mode] for mode in modes},
+            self._race_recorder(server)
+        )
+        if isinstance(result.transport, RecordingTransport):
+            await result.transport.release()
+        return result
+
     def _select_transport(self, server: MCPServer) -> Optional[Transport]:
         """
         Select and create appropriate transport for a server.
@@ -101,8 +222,17 @@ class ToolRouter:
         Returns:
             Transport instance or None if no transport available
         """
+        return self._record(server, self._create_transport(server))
+
+    def _create_transport(self, server: MCPServer) -> Optional[Transport]:
+        """Create the transport for the configured mode (see _select_transport)"""
         mode = self._get_transport_mode()
 
+        # Replay never starts the real server, whatever its config looks like
+        if mode == "replay":
+            server.active_transport = "replay"
+            return get_transport(TransportMode.REPLAY, self._replay_config(server))
+
         # Legacy server support
         if server._legacy_command:
             # Detect if legacy command is docker-based
@@ -131,8 +261,9 @@ class ToolRouter:
 
         # New multi-transport schema
         if mode == "auto":
-            # Try transports in order: docker, local, http
-            for try_mode in ["docker", "local", "http"]:
+            # Without racing (BTR_TRANSPORT_RACE=false or a single transport),
+            # take the first that can be built, in AUTO_ORDER
+            for try_mode in AUTO_ORDER:
                 if try_mode in server.transports:
                     transport_config = server.transports[try_mode]
                     try:
@@ -159,6 +290,11 @@ class ToolRouter:
                 transport = get_transport(TransportMode(mode), transport_config)
                 server.active_transport = mode
                 return transport
+            elif "gateway" in server.transports:
+                # A mounted gateway has no docker/local/http alternative
+                transport = get_transport(TransportMode.GATEWAY, server.transports["gateway"])
+                server.active_transport = "gateway"
+                return transport
             else:
                 logger.warning(
                     f"Transport mode '{mode}' not available for {server.name}. "
@@ -167,103 +303,794 @@ class ToolRouter:
 
         return None
 
-    async def discover_tools(self) -> dict[str, list[dict]]:
-        """Discover all tools from all registered servers"""
-        tools_by_server = {}
+    def _race_modes(self, server: MCPServer) -> list[str]:
+        """Transports of a server that auto mode can choose between"""
+        return [mode for mode in AUTO_ORDER if mode in server.transports]
 
-        for name, server in self.servers.items():
-            try:
-                transport = self._select_transport(server)
-                if not transport:
-                    logger.warning(f"No transport available for {name}")
-                    server.healthy = False
-                    tools_by_server[name] = []
-                    continue
+    def _should_race(self, server: MCPServer) -> bool:
+        return (
+            settings.transport_race
+            and self._get_transport_mode() == "auto"
+            and not server._legacy_command
+            and len(self._race_modes(server)) > 1
+        )
+
+    async def _race_server(self, server: MCPServer) -> tuple[Optional[Transport], list[dict]]:
+        """Discover a server through whichever of its transports answers first"""
+        name = server.name
+        result = await self._race(server, self._race_modes(server))
+        selection = TransportSelection(result.mode, result.reason, result.candidates)
+        self._selections[name] = selection
+
+        if result.transport is None:
+            # As without racing: keep a transport so later calls are still attempted
+            logger.warning(f"No transport answered for {name}: {result.reason}")
+            transport = self._create_transport(server)
+            selection.mode = server.active_transport
+            if server.active_transport:
+                selection.reason += f"; using {server.active_transport}"
+            return self._record(server, transport), []
+
+        server.active_transport = result.mode
+        server.healthy = True
+        logger.info(
+            f"Discovered {len(result.tools)} tools from {name} "
+            f"(transport: {result.mode}, {result.reason})"
+        )
+        return result.transport, result.tools
+
+    async def discover_tools(
+        self,
+        on_server: Optional[Callable[[str], None]] = None
+    ) -> dict[str, list[dict]]:
+        """
+        Discover all tools from all registered servers, concurrently.
+
+        Each server's tools are indexed and published as soon as it answers,
+        so the catalog grows while slow servers are still starting.
 
+        Args:
+            on_server: Called with the server name after each server is indexed
+        """
+        tools_by_server = {}
+        servers = dict(self.servers)
+        self.discovery_pending = set(servers)
+        limit = settings.discovery_concurrency or len(servers) or 1
+        semaphore = asyncio.Semaphore(limit)
+
+        async def discover(name: str, server: MCPServer):
+            async with semaphore:
+                transport, tools = await self._discover_server(server)
+            if transport is not None:
                 self._transports[name] = transport
+            self.discovery_pending.discard(name)
+            self._index_server(name, tools)
+            tools_by_server[name] = tools
+            self.publish_catalog()
+            if on_server is not None:
+                on_server(name)
+
+        try:
+            await asyncio.gather(*(discover(name, server) for name, server in servers.items()))
+        finally:
+            self.discovery_pending = set()
+            self.discovery_complete = True
+        return tools_by_server
+
+    async def _discover_server(self, server: MCPServer) -> tuple[Optional[Transport], list[dict]]:
+        """
+        Select a transport for a server and discover its tools.
+
+        Updates server.healthy in place.
+
+        Args:
+            server: MCPServer instance
+
+        Returns:
+            (the transport that answered or None if discovery failed, tools)
+        """
+        name = server.name
+        server.healthy = False
+
+        try:
+            if self._should_race(server):
+                return await self._race_server(server)
+
+            self._selections.pop(name, None)
+            transport = self._select_transport(server)
+            if not transport:
+                logger.warning(f"No transport available for {name}")
+                return None, []
+
+            # Check availability
+            if not await transport.is_available():
+                logger.warning(f"Transport not available for {name}")
+                return transport, []
+
+            # Discover tools
+            tools = await transport.get_tools()
+            server.healthy = True
+
+            logger.info(
+                f"Discovered {len(tools)} tools from {name} "
+                f"(transport: {server.active_transport})"
+            )
+            return transport, tools
+
+        except Exception as e:
+            logger.error(f"Failed to discover tools from {name}: {e}")
+            server.healthy = False
+            return None, []
+
+    def _index_server(self, name: str, tools: list[dict]):
+        """Replace a server's entries in the catalog with freshly discovered tools"""
+        self.all_tools.replace_server(name, tools)
+        self.catalog_version += 1
+        self._catalog_changed()
+
+    def _catalog_changed(self):
+        """Tell /api/events subscribers that the available tools changed"""
+        event_bus.publish("catalog", {
+            "catalog_version": self.catalog_version,
+            "total": len(self.all_tools)
+        })
+
+    async def sync_upstreams(self) -> list[str]:
+        """
+        Re-sync mounted gateways (servers using the gateway transport).
+
+        Every worker refreshes remote health so routing can reject calls to
+        unhealthy remote servers. Only the discovery owner re-fetches the
+        remote catalog; an unchanged remote answers 304 and costs nothing.
+
+        Returns:
+            Names of servers whose tools changed
+        """
+        store = tool_state.shared
+        owns_catalog = store is None or store.is_leader
+        changed = []
+
+        for name, transport in list(self._transports.items()):
+            if not hasattr(transport, "sync_tools"):
+                continue
+            server = self.servers.get(name)
+            if server is None:
+                continue
+
+            healthy = await transport.refresh_health()
+            if not owns_catalog:
+                continue
+
+            if healthy:
+                try:
+                    tools, updated = await transport.sync_tools()
+                except TransportError as e:
+                    logger.warning(f"Catalog sync failed for {name}: {e}")
+                    healthy, updated = False, False
+                if updated:
+                    self._index_server(name, tools)
+                    changed.append(name)
+                    logger.info(f"Re-synced {len(tools)} tools from mounted gateway {name}")
+
+            if healthy != server.healthy:
+                logger.info(f"Mounted gateway {name} is now {'healthy' if healthy else 'unhealthy'}")
+                server.healthy = healthy
+                if name not in changed:
+                    changed.append(name)
+
+        if changed:
+            self.publish_catalog()
+        return changed
+
+    async def reload_server_config(self, config_file: Path) -> Optional[str]:
+        """
+        Re-read one server config and re-discover only that server.
+
+        The new transport is discovered while the old one keeps serving.
+        Once the new tools are indexed the old transport is drained in the
+        background, so in-flight calls finish on the transport they started on.
+
+        Args:
+            config_file: Path to the changed servers/<name>/config.json
+
+        Returns:
+            Name of the server that was reloaded, or None if nothing changed
+        """
+        parsed = self._parse_server_config(config_file)
+        if parsed is None:
+            return None
+
+        config, server = parsed
+        previous_name = self._config_files.get(config_file)
+        if previous_name == server.name and self._configs.get(server.name) == config:
+            logger.debug(f"Config for {server.name} unchanged, skipping re-discovery")
+            return None
+
+        # A renamed server leaves its old entries behind
+        if previous_name and previous_name != server.name:
+            await self.remove_server_config(config_file)
+
+        transport, tools = await self._discover_server(server)
+
+        old_transport = self._transports.pop(server.name, None)
+        self.servers[server.name] = server
+        self._configs[server.name] = config
+        self._config_files[config_file] = server.name
+        if transport is not None:
+            self._transports[server.name] = transport
+        self._index_server(server.name, tools)
+
+        if old_transport is not None and old_transport is not transport:
+            self._schedule_drain(server.name, old_transport)
+
+        self.publish_catalog()
+        logger.info(f"Reloaded server {server.name}: {len(tools)} tools")
+        return server.name
+
+    async def remove_server_config(self, config_file: Path) -> Optional[str]:
+        """
+        Forget the server defined by a deleted config file.
+
+        Args:
+            config_file: Path of the removed servers/<name>/config.json
+
+        Returns:
+            Name of the removed server, or None if the file was unknown
+        """
+        name = self._config_files.pop(config_file, None)
+        if name is None:
+            return None
 
-                # Check availability
-                if not await transport.is_available():
-                    logger.warning(f"Transport not available for {name}")
-                    server.healthy = False
-                    tools_by_server[name] = []
+        self.servers.pop(name, None)
+        self._configs.pop(name, None)
+        self._schedulers.pop(name, None)  # queued calls keep their reference and drain
+        self._rate_limiters.pop(name, None)
+        self._selections.pop(name, None)
+        self._index_server(name, [])
+
+        old_transport = self._transports.pop(name, None)
+        if old_transport is not None:
+            self._schedule_drain(name, old_transport)
+
+        self.publish_catalog()
+        logger.info(f"Removed server {name}")
+        return name
+
+    def publish_catalog(self):
+        """Share the catalog with other workers (shared-state leader only)"""
+        store = tool_state.shared
+        if store is None or not store.is_leader:
+            return
+
+        # Keep versions monotonic across leader changes
+        self.catalog_version = max(self.catalog_version, store.catalog_version() + 1)
+        statuses = {
+            name: {
+                "healthy": server.healthy,
+                "transport": server.active_transport,
+                "selection": self._selections[name].to_dict() if name in self._selections else None,
+                "config": self._configs.get(name, {})
+            }
+            for name, server in self.servers.items()
+        }
+        store.publish_catalog(self.all_tools, statuses, self.catalog_version)
+
+    def load_shared_catalog(self) -> bool:
+        """
+        Adopt the catalog published by the leader (shared-state followers).
+
+        Servers whose config is unchanged keep their transports; changed
+        servers get a new transport for the leader's active transport mode
+        and the old one is drained.
+
+        Returns:
+            True if a newer catalog was loaded
+        """
+        store = tool_state.shared
+        if store is None or store.is_leader:
+            return False
+        if store.catalog_version() in (0, self.catalog_version):
+            return False
+
+        version, published, statuses = store.read_catalog()
+
+        for name in list(self.servers):
+            if name not in statuses:
+                self.servers.pop(name)
+                self._configs.pop(name, None)
+                self._schedulers.pop(name, None)
+                self._rate_limiters.pop(name, None)
+                self._published_selections.pop(name, None)
+                old_transport = self._transports.pop(name, None)
+                if old_transport is not None:
+                    self._schedule_drain(name, old_transport)
+
+        tools_by_server: dict[str, list[dict]] = {name: [] for name in statuses}
+        for info in published.values():
+            tools_by_server.setdefault(info["server"], []).append(info["schema"])
+
+        for name, status in statuses.items():
+            server = self.servers.get(name)
+            if server is None or self._configs.get(name) != status["config"]:
+                server = self._server_from_config(status["config"], name)
+                if server is None:
                     continue
+                self.servers[name] = server
+                self._configs[name] = status["config"]
 
-                # Discover tools
-                tools = await transport.get_tools()
-                tools_by_server[name] = tools
-                server.tools = tools
-                server.healthy = True
-
-                # Index tools for routing
-                for tool in tools:
-                    tool_name = f"{name}__{tool['name']}"
-                    self.all_tools[tool_name] = {
-                        "server": name,
-                        "original_name": tool["name"],
-                        "schema": tool
-                    }
+            server.healthy = status["healthy"]
+            self._published_selections[name] = status.get("selection")
 
-                logger.info(
-                    f"Discovered {len(tools)} tools from {name} "
-                    f"(transport: {server.active_transport})"
-                )
+            current = self._transports.get(name)
+            if current is None or server.active_transport != status["transport"]:
+                transport = self._transport_for_mode(server, status["transport"])
+                if transport is not None:
+                    self._transports[name] = transport
+                    if current is not None:
+                        self._schedule_drain(name, current)
+
+        for name in self.all_tools.servers():
+            if name not in tools_by_server:
+                self.all_tools.remove_server(name)
+        for name, tools in tools_by_server.items():
+            self.all_tools.replace_server(name, tools)
 
+        self.catalog_version = version
+        self._catalog_changed()
+        logger.info(f"Loaded shared catalog v{version}: {len(self.all_tools)} tools")
+        return True
+
+    def _transport_for_mode(self, server: MCPServer, mode: Optional[str]) -> Optional[Transport]:
+        """Create a transport for a specific mode, falling back to normal selection"""
+        if mode and mode in server.transports:
+            try:
+                transport = get_transport(TransportMode(mode), server.transports[mode])
+                server.active_transport = mode
+                return self._record(server, transport)
             except Exception as e:
-                logger.error(f"Failed to discover tools from {name}: {e}")
-                server.healthy = False
-                tools_by_server[name] = []
+                logger.warning(f"Cannot create {mode} transport for {server.name}: {e}")
+        return self._select_transport(server)
 
-        return tools_by_server
+    def _schedule_drain(self, name: str, transport: Transport):
+        """Close a replaced transport once its in-flight calls have finished"""
+        task = asyncio.create_task(self._drain_transport(name, transport))
+        self._drain_tasks.add(task)
+        task.add_done_callback(self._drain_tasks.discard)
+
+    async def _drain_transport(self, name: str, transport: Transport):
+        """Wait for in-flight calls on a retired transport, then close it"""
+        deadline = time.monotonic() + transport.timeout
+        while transport.inflight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        if transport.inflight > 0:
+            logger.warning(
+                f"Closing old transport for {name} with {transport.inflight} calls still in flight"
+            )
+        try:
+            await transport.close()
+        except Exception as e:
+            logger.debug(f"Error closing old transport for {name}: {e}")
 
     def get_enabled_tools(self) -> list[dict]:
         """Get list of currently enabled tools with their schemas"""
         enabled = []
         for tool_name in tool_state.get_enabled():
-            if tool_name in self.all_tools:
-                tool_info = self.all_tools[tool_name]
-                schema = tool_info["schema"].copy()
-                schema["name"] = tool_name  # Use prefixed name
-                enabled.append(schema)
+            entry = self.all_tools.get(tool_name)
+            if entry is not None:
+                enabled.append(entry.to_tool())  # advertised with the prefixed name
+        if enabled and self.output_limits_active():
+            enabled.append(continue_tool_schema())
         return enabled
 
+    def output_limits_active(self) -> bool:
+        """Whether any tool has an output budget (and btr__continue is offered)"""
+        if settings.output_max_bytes or settings.output_max_tokens:
+            return True
+        return any(config.get("output_limits") for config in self._configs.values())
+
+    def _output_filter(self, server_name: str, tool_name: str) -> Optional[TruncatingFilter]:
+        """Streaming truncation/spill filter for a call, or None if unlimited"""
+        limits = OutputLimits.resolve(self._configs.get(server_name, {}), tool_name)
+        if not limits.budget and not limits.spill_bytes:
+            return None
+        return TruncatingFilter(limits.budget, continuations, spill_store, limits.spill_bytes)
+
+    def tools_list_snapshot(self) -> tuple[list[dict], str]:
+        """
+        tools/list result and its ETag, cached per catalog and state version.
+
+        The ETag is a hash of the content, so it stays stable across workers
+        and restarts and lets a federating gateway send If-None-Match.
+
+        Returns:
+            (enabled tool schemas, quoted ETag)
+        """
+        tool_state.refresh()
+        key = (self.catalog_version, tool_state.version)
+        if self._tools_list_cache is not None and self._tools_list_cache[0] == key:
+            return self._tools_list_cache[1], self._tools_list_cache[2]
+
+        tools = self.get_enabled_tools()
+        # Servers still being discovered are part of the response (and ETag)
+        content = [tools, sorted(self.discovery_pending)] if self.discovery_pending else tools
+        digest = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+        etag = f'"{digest[:20]}"'
+        self._tools_list_cache = (key, tools, etag)
+        return tools, etag
+
+    def _tool_entry(self, tool_name: str, enabled: set[str]) -> dict:
+        """Tool schema as shown by the management API"""
+        entry = self.all_tools[tool_name]
+        schema = entry.to_tool()
+        schema["server"] = entry.server
+        schema["enabled"] = tool_name in enabled
+        return schema
+
     def get_all_tools(self) -> list[dict]:
         """Get all available tools (for UI display)"""
-        all_tools = []
-        for tool_name, tool_info in self.all_tools.items():
-            schema = tool_info["schema"].copy()
-            schema["name"] = tool_name
-            schema["server"] = tool_info["server"]
-            schema["enabled"] = tool_state.is_enabled(tool_name)
-            all_tools.append(schema)
-        return sorted(all_tools, key=lambda t: t["name"])
-
-    async def invoke_tool(self, tool_name: str, arguments: dict) -> Any:
-        """Invoke a tool on its server"""
+        enabled = tool_state.enabled_set()
+        return [self._tool_entry(name, enabled) for name in self.all_tools.sorted_names()]
+
+    def list_tools_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        server: Optional[str] = None,
+        prefix: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        query: Optional[str] = None
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        One page of tools sorted by name, with optional filters.
+
+        Server and prefix narrow the catalog's sorted name lists with bisect,
+        so only the enabled and text filters scan, and only until the page
+        is full.
+
+        Args:
+            cursor: Name of the last tool on the previous page
+            limit: Maximum tools to return
+            server: Only tools from this server
+            prefix: Only tools whose prefixed name starts with this
+            enabled: Only enabled (True) or disabled (False) tools
+            query: Case-insensitive substring of name or description
+
+        Returns:
+            (tools, cursor for the next page or None)
+        """
+        catalog = self.all_tools
+        enabled_set = tool_state.enabled_set()
+        names = catalog.server_names(server) if server else catalog.sorted_names()
+
+        if enabled and len(enabled_set) < len(names):
+            # Small enabled set: walk it instead of the whole catalog
+            names = sorted(
+                name for name in enabled_set
+                if name in catalog and (not server or catalog[name].server == server)
+            )
+
+        lo, hi = catalog.prefix_range(names, prefix) if prefix else (0, len(names))
+        if cursor:
+            lo = max(lo, bisect.bisect_right(names, cursor))
+
+        needle = query.lower() if query else None
+        page: list[dict] = []
+        for i in range(lo, hi):
+            tool_name = names[i]
+            if enabled is not None and (tool_name in enabled_set) != enabled:
+                continue
+            if needle and needle not in catalog.search_text(tool_name):
+                continue
+            if len(page) == limit:
+                return page, page[-1]["name"]
+            page.append(self._tool_entry(tool_name, enabled_set))
+        return page, None
+
+    def select_tools(
+        self,
+        selectors: list[str],
+        servers: list[str] = (),
+        extra: Optional[set[str]] = None
+    ) -> tuple[set[str], list[str]]:
+        """
+        Expand tool names, glob patterns and server names into tool names.
+
+        Args:
+            selectors: Prefixed tool names or fnmatch patterns
+            servers: Server names, selecting all of their tools
+            extra: More names patterns may match (e.g. enabled tools that
+                are no longer in the catalog, so they can be removed)
+
+        Returns:
+            (selected tool names, unknown tool and server names)
+        """
+        selected: set[str] = set()
+        unknown: list[str] = []
+
+        for selector in selectors:
+            if not is_pattern(selector):
+                if selector in self.all_tools or (extra and selector in extra):
+                    selected.add(selector)
+                else:
+                    unknown.append(selector)
+                continue
+
+            selected.update(self.all_tools.match(selector))
+            if extra:
+                selected.update(fnmatch.filter(extra, selector))
+
+        for server in servers:
+            if server in self.servers or self.all_tools.count(server):
+                selected.update(self.all_tools.server_names(server))
+            else:
+                unknown.append(server)
+
+        return selected, unknown
+
+    def server_summaries(self) -> dict[str, dict]:
+        """Per-server total and enabled tool counts"""
+        summaries = {
+            name: {"total": self.all_tools.count(name), "enabled": 0}
+            for name in [*self.servers, *self.all_tools.servers()]
+        }
+        for tool_name in tool_state.enabled_set():
+            entry = self.all_tools.get(tool_name)
+            if entry is not None:
+                summaries[entry.server]["enabled"] += 1
+        return summaries
+
+    def _scheduler(self, server_name: str) -> UpstreamScheduler:
+        """Call queue for a server, sized from its config"""
+        scheduling = self._configs.get(server_name, {}).get("scheduling") or {}
+        max_concurrency = scheduling.get("max_concurrency", settings.upstream_max_concurrency)
+
+        scheduler = self._schedulers.get(server_name)
+        if scheduler is None:
+            scheduler = self._schedulers[server_name] = UpstreamScheduler(max_concurrency)
+        elif scheduler.max_concurrency != max_concurrency:
+            scheduler.resize(max_concurrency)
+        return scheduler
+
+    def container_usage(self) -> dict[str, bool]:
+        """Docker-mode containers and whether any of their server's tools is enabled"""
+        enabled_servers = {
+            self.all_tools[tool].server
+            for tool in tool_state.enabled_set() if tool in self.all_tools
+        }
+        return {
+            transport.container: name in enabled_servers
+            for name, transport in self._transports.items()
+            if getattr(transport, "container", None)
+        }
+
+    def resource_targets(self) -> dict[str, tuple[str, Any]]:
+        """What to sample per server: ("docker", container) or ("proc", live pids)"""
+        targets = {}
+        for name, transport in self._transports.items():
+            transport = getattr(transport, "inner", transport)  # unwrap RecordingTransport
+            if isinstance(transport, DockerTransport):
+                targets[name] = ("docker", transport.container)
+            elif isinstance(transport, StdioTransport):
+                targets[name] = ("proc", transport.pids)
+            elif isinstance(transport, InProcTransport) and transport.pool == "process":
+                targets[name] = ("proc", transport.pids)
+        return targets
+
+    async def sample_resources(self):
+        """Take a resource sample of every local process and container"""
+        await resource_sampler.sample(self.resource_targets(), self._configs)
+
+    def _rate_limiter(self, server_name: str) -> RateLimiter:
+        """Rate limiter for a server, rebuilt when its rate_limits config changes"""
+        config = self._configs.get(server_name, {}).get("rate_limits") or {}
+
+        limiter = self._rate_limiters.get(server_name)
+        if limiter is None or limiter.config != config:
+            new_limiter = RateLimiter(config)
+            if limiter is not None:
+                # Keep honouring upstream backoff across a config reload
+                new_limiter.blocked_until = limiter.blocked_until
+                new_limiter.rate_scale = limiter.rate_scale
+            limiter = self._rate_limiters[server_name] = new_limiter
+        return limiter
+
+    def _record_rate_limit(self, limiter: RateLimiter, server_name: str, message: str) -> bool:
+        """Back off if an upstream error is a rate-limit signal"""
+        limited, retry_after = parse_rate_limit_signal(message)
+        if not limited:
+            return False
+        limiter.record_signal(retry_after)
+        logger.warning(
+            f"Upstream {server_name} is rate limiting; pausing "
+            f"{'for %.1fs' % retry_after if retry_after is not None else 'with backoff'}"
+        )
+        return True
+
+    async def invoke_tool(self, tool_name: str, arguments: dict, priority: Optional[str] = None) -> Any:
+        """
+        Invoke a tool on its server.
+
+        Args:
+            tool_name: Prefixed tool name
+            arguments: Tool arguments
+            priority: Scheduling class (high, normal, low); defaults from server config
+
+        Raises:
+            RateLimitedError: If the server's or tool's rate limit rejects the call
+        """
+        if tool_name == CONTINUE_TOOL:
+            return continuations.call(arguments)
+
         if tool_name not in self.all_tools:
+            server_name = tool_name.split("__", 1)[0]
+            if server_name in self.discovery_pending:
+                raise ValueError(f"Server {server_name} is still starting; retry {tool_name} shortly")
             raise ValueError(f"Unknown tool: {tool_name}")
 
         if not tool_state.is_enabled(tool_name):
             raise ValueError(f"Tool not enabled: {tool_name}")
 
-        tool_info = self.all_tools[tool_name]
-        server_name = tool_info["server"]
+        entry = self.all_tools[tool_name]
+        server_name = entry.server
+        priority = resolve_priority(self._configs.get(server_name, {}), entry.original_name, priority)
+
+        server = self.servers.get(server_name)
+        trace = flight_recorder.start(
+            tool_name, server_name, server.active_transport if server else None, priority, arguments
+        )
+        try:
+            result = await self._call_tool(entry, arguments, priority, trace)
+        except Exception as e:
+            flight_recorder.finish(trace, error=e)
+            raise
+        flight_recorder.finish(trace, result=result)
+        return result
+
+    async def _call_tool(self, entry: ToolEntry, arguments: dict, priority: str, trace: CallTrace) -> Any:
+        """Rate limit, schedule and send a call, timing each phase in the trace"""
+        tool_name = entry.name
+        server_name = entry.server
+
+        limiter = self._rate_limiter(server_name)
+        await limiter.acquire(server_name, entry.original_name)
+        trace.mark("rate_limit")
 
         if server_name not in self._transports:
             raise ValueError(f"No transport available for server: {server_name}")
 
         transport = self._transports[server_name]
+        output_filter = None
 
+        transport.inflight += 1
         try:
-            result = await transport.call_tool(
-                tool_info["original_name"],
-                arguments
-            )
+            if not transport.is_routable(entry.original_name):
+                raise TransportConnectionError(
+                    f"Upstream for {tool_name} is reported unhealthy by {server_name}"
+                )
+
+            output_filter = self._output_filter(server_name, entry.original_name)
+            async with self._scheduler(server_name).slot(priority):
+                trace.mark("queue")
+                try:
+                    result = await transport.call_tool(
+                        entry.original_name,
+                        arguments,
+                        output_filter
+                    )
+                except (TransportConnectionError, TransportTimeoutError) as e:
+                    self._transport_failed(server_name, transport, e)
+                    raise
+            self._transport_succeeded(server_name)
+            trace.mark("upstream")
+            if output_filter is not None:
+                if output_filter.truncated:
+                    trace.truncated = True
+                    logger.info(
+                        f"Truncated {tool_name} output to {output_filter.budget} bytes "
+                        f"({sum(cut for _, cut in output_filter.truncated)} bytes cut)"
+                    )
+                trace.spilled = bool(output_filter.spilled)
+                result = output_filter.link_spills(result)
+            trace.mark("post")
+            if not self._record_rate_limit(limiter, server_name, result_error_text(result)):
+                limiter.record_success()
             return result
 
         except TransportError as e:
+            self._record_rate_limit(limiter, server_name, str(e))
             logger.error(f"Tool invocation failed for {tool_name}: {e}")
-            raise Exception(f"Tool call failed: {e}")
+            raise Exception(f"Tool call failed: {e}") from e
+        finally:
+            transport.inflight -= 1
+            if output_filter is not None:
+                output_filter.abort()
+
+    def _transport_succeeded(self, server_name: str):
+        selection = self._selections.get(server_name)
+        if selection is not None:
+            selection.consecutive_errors = 0
+
+    def _transport_failed(self, server_name: str, transport: Transport, error: TransportError):
+        """Count a connection error or timeout; fail over once there are enough in a row"""
+        selection = self._selections.get(server_name)
+        if selection is None or transport is not self._transports.get(server_name):
+            return  # not raced, or already replaced
+        selection.consecutive_errors += 1
+
+        threshold = settings.transport_failover_errors
+        if not threshold or selection.consecutive_errors < threshold or selection.failing_over:
+            return
+        store = tool_state.shared
+        if store is not None and not store.is_leader:
+            return  # followers switch when the leader publishes its choice
+
+        selection.failing_over = True
+        reason = f"{selection.consecutive_errors} consecutive errors (last: {error})"
+        task = asyncio.create_task(self._fail_over(server_name, transport, reason))
+        self._failover_tasks.add(task)
+        task.add_done_callback(self._failover_tasks.discard)
+
+    async def _fail_over(self, name: str, failed: Transport, reason: str):
+        """Race a server's other transports and switch to the winner"""
+        server = self.servers.get(name)
+        selection = self._selections.get(name)
+        if server is None or selection is None:
+            return
+
+        try:
+            previous = server.active_transport
+            modes = [mode for mode in self._race_modes(server) if mode != previous]
+            logger.warning(f"Transport {previous} for {name} is degraded: {reason}; trying {', '.join(modes)}")
+            result = await self._race(server, modes)
+
+            if self._transports.get(name) is not failed:
+                # Reloaded or removed while racing
+                if result.transport is not None:
+                    await result.transport.close()
+                return
+            if result.transport is None:
+                logger.warning(f"No other transport for {name} answered: {result.reason}")
+                return
+
+            server.active_transport = result.mode
+            server.healthy = True
+            self._transports[name] = result.transport
+            self._selections[name] = TransportSelection(
+                result.mode,
+                f"failed over from {previous} after {reason}; {result.reason}",
+                result.candidates,
+                failovers=selection.failovers + 1
+            )
+            self._schedule_drain(name, failed)
+            self._index_server(name, result.tools)
+            self.publish_catalog()
+            logger.warning(f"Failed over {name} from {previous} to {result.mode}")
+        finally:
+            selection.failing_over = False
+            selection.consecutive_errors = 0
+
+    def _selection_status(self, name: str, server: MCPServer) -> Optional[dict]:
+        """Which transport a server uses and why"""
+        if name in self._selections:
+            return self._selections[name].to_dict()
+        if self._published_selections.get(name):
+            return self._published_selections[name]
+        if server.active_transport is None:
+            return None
+
+        mode = self._get_transport_mode()
+        if server._legacy_command:
+            reason = "legacy command config"
+        elif server.active_transport == "gateway" and mode != "gateway":
+            reason = "mounted gateways always use the gateway transport"
+        elif mode != "auto":
+            reason = f"BTR_TRANSPORT_MODE={mode}"
+        elif len(self._race_modes(server)) == 1:
+            reason = "only configured transport"
+        else:
+            reason = f"first configured in {', '.join(AUTO_ORDER)} (racing disabled)"
+        return {"mode": server.active_transport, "reason": reason}
 
     def get_server_status(self) -> dict[str, dict]:
         """Get health and transport status for all servers"""
@@ -272,9 +1099,25 @@ class ToolRouter:
             status[name] = {
                 "healthy": server.healthy,
                 "transport": server.active_transport,
-                "tool_count": len(server.tools),
-                "available_transports": list(server.transports.keys())
+                "tool_count": self.all_tools.count(name),
+                "available_transports": list(server.transports.keys()),
+                "selection": self._selection_status(name, server)
             }
+            transport = self._transports.get(name)
+            if transport is not None and hasattr(transport, "sync_tools"):
+                status[name]["federation"] = transport.status()
+            if transport is not None and hasattr(transport, "pool_status"):
+                status[name]["connections"] = transport.pool_status()
+            if name in self._schedulers:
+                status[name]["scheduler"] = self._schedulers[name].status()
+            container = getattr(transport, "container", None)
+            if container and settings.container_pause:
+                status[name]["container"] = container_manager.status(container)
+            if name in resource_sampler.samples:
+                status[name]["resources"] = resource_sampler.samples[name]
+            limiter = self._rate_limiters.get(name)
+            if limiter is not None and (limiter.configured or limiter.signals):
+                status[name]["rate_limit"] = limiter.status()
         return status
 
 
@@ -0,0 +1,161 @@
+"""
+BTR Scheduler - Weighted fair queueing of tool calls per upstream server
+
+Each server accepts at most ``max_concurrency`` calls at a time. Calls
+beyond that wait in one queue per priority class and are started in
+weighted-fair order: every call gets a virtual finish tag of
+``max(virtual time, class's last tag) + 1 / weight``, and the smallest tag
+goes next. With weights high=8, normal=4, low=1 a saturated server gives
+interactive calls most slots while background calls still advance, so no
+class starves.
+
+A call's priority comes from ``params._meta.priority`` on tools/call, or
+from the server's config.json:
+
+    "scheduling": {
+        "max_concurrency": 4,
+        "default_priority": "normal",
+        "priorities": {"perplexity_research": "low"}
+    }
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+PRIORITY_WEIGHTS = {"high": 8, "normal": 4, "low": 1}
+DEFAULT_PRIORITY = "normal"
+
+# Recent waits kept per class for percentiles
+WAIT_SAMPLES = 256
+
+
+def resolve_priority(server_config: dict, tool_name: str, requested: Optional[str] = None) -> str:
+    """
+    Priority for a call: request metadata, then per-tool and server defaults.
+
+    Raises:
+        ValueError: If the priority is not a known class
+    """
+    scheduling = server_config.get("scheduling") or {}
+    priority = (
+        requested
+        or (scheduling.get("priorities") or {}).get(tool_name)
+        or scheduling.get("default_priority")
+        or DEFAULT_PRIORITY
+    )
+    if priority not in PRIORITY_WEIGHTS:
+        raise ValueError(
+            f"Unknown priority '{priority}' (expected one of: {', '.join(PRIORITY_WEIGHTS)})"
+        )
+    return priority
+
+
+class QueueStats:
+    """Queue-wait statistics for one priority class"""
+
+    def __init__(self):
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, wait: float):
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent.append(wait)
+
+    def to_dict(self, queued: int) -> dict:
+        recent = sorted(self._recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "queued": queued,
+            "dispatched": self.dispatched,
+            "wait_ms": {
+                "mean": round(self.total_wait / self.dispatched * 1000, 2) if self.dispatched else 0.0,
+                "p95": round(p95 * 1000, 2),
+                "max": round(self.max_wait * 1000, 2)
+            }
+        }
+
+
+class UpstreamScheduler:
+    """Concurrency limit and weighted fair queue for one upstream server"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self._queues: dict[str, deque] = {name: deque() for name in PRIORITY_WEIGHTS}
+        self._last_tag = {name: 0.0 for name in PRIORITY_WEIGHTS}
+        self._virtual_time = 0.0
+        self.stats = {name: QueueStats() for name in PRIORITY_WEIGHTS}
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @asynccontextmanager
+    async def slot(self, priority: str) -> AsyncIterator[None]:
+        """Wait for a free slot in weighted-fair order and hold it"""
+        enqueued = time.monotonic()
+
+        if not self.max_concurrency or (self.active < self.max_concurrency and not self.queued):
+            self.active += 1
+        else:
+            tag = max(self._virtual_time, self._last_tag[priority]) + 1 / PRIORITY_WEIGHTS[priority]
+            self._last_tag[priority] = tag
+            waiter = asyncio.get_running_loop().create_future()
+            self._queues[priority].append((tag, waiter))
+            self._dispatch()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted a slot just as we were cancelled; pass it on
+                    self._release()
+                raise
+
+        self.stats[priority].record(time.monotonic() - enqueued)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def resize(self, max_concurrency: int):
+        """Change the concurrency limit (after a config reload)"""
+        self.max_concurrency = max_concurrency
+        self._dispatch()
+
+    def _release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start waiting calls, smallest finish tag first"""
+        while not self.max_concurrency or self.active < self.max_concurrency:
+            best = None
+            for name, queue in self._queues.items():
+                while queue and queue[0][1].cancelled():
+                    queue.popleft()
+                if queue and (best is None or queue[0][0] < self._queues[best][0][0]):
+                    best = name
+            if best is None:
+                return
+
+            tag, waiter = self._queues[best].popleft()
+            self._virtual_time = tag
+            self.active += 1
+            waiter.set_result(None)
+
+    def status(self) -> dict:
+        """Concurrency and per-class queue-wait statistics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "classes": {
+                name: self.stats[name].to_dict(len(self._queues[name]))
+                for name in PRIORITY_WEIGHTS
+            }
+        }
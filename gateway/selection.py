@@ -0,0 +1,184 @@
+"""
+BTR Transport Selection - Race a server's transports in auto mode
+
+With ``BTR_TRANSPORT_MODE=auto`` and more than one transport configured,
+every transport is built and probed at once: ``is_available()`` and then
+a ``tools/list`` handshake. The first healthy answer wins, which makes it
+the fastest by measured handshake latency; its tools become the server's
+catalog, so the race costs no extra round trip. The slower candidates are
+left to finish in the background so their latency shows up in
+``/api/status``, then closed.
+
+At runtime, ``BTR_TRANSPORT_FAILOVER_ERRORS`` consecutive connection
+errors or timeouts on the active transport start a new race among the
+server's other transports; the winner replaces it and the old transport
+is drained.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from transports import TransportMode, get_transport
+from transports.base import Transport
+
+logger = logging.getLogger(__name__)
+
+# Transports considered in auto mode, in order of preference for ties
+AUTO_ORDER = ["inproc", "uds", "docker", "local", "http", "gateway"]
+
+# Losers still probing in the background (kept referenced until done)
+_background: set[asyncio.Task] = set()
+
+
+@dataclass
+class CandidateResult:
+    """Outcome of probing one transport"""
+    mode: str
+    available: Optional[bool] = None  # None while the probe is running
+    latency_ms: Optional[float] = None
+    tools: Optional[list[dict]] = None
+    error: Optional[str] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.available is True and self.tools is not None and self.error is None
+
+    def to_dict(self) -> dict:
+        return {
+            "available": self.available,
+            "latency_ms": self.latency_ms,
+            "tool_count": len(self.tools) if self.tools is not None else None,
+            "error": self.error
+        }
+
+
+@dataclass
+class RaceResult:
+    """The winning transport (None if nothing answered) and every candidate's outcome"""
+    mode: Optional[str]
+    transport: Optional[Transport]
+    candidates: dict[str, CandidateResult]
+    reason: str
+
+    @property
+    def tools(self) -> list[dict]:
+        if self.mode is None:
+            return []
+        return self.candidates[self.mode].tools or []
+
+
+@dataclass
+class TransportSelection:
+    """Why a server uses its transport, for /api/status"""
+    mode: Optional[str]
+    reason: str
+    candidates: dict[str, CandidateResult] = field(default_factory=dict)
+    selected_at: float = field(default_factory=time.time)
+    failovers: int = 0
+    consecutive_errors: int = 0
+    failing_over: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "reason": self.reason,
+            "selected_at": round(self.selected_at, 3),
+            "candidates": {mode: result.to_dict() for mode, result in self.candidates.items()},
+            "failovers": self.failovers,
+            "consecutive_errors": self.consecutive_errors
+        }
+
+
+async def probe(transport: Transport, result: CandidateResult):
+    """Time is_available() plus a tools/list handshake, within the transport's timeout"""
+    started = time.monotonic()
+
+    async def handshake():
+        if not await transport.is_available():
+            result.available = False
+            result.error = "not available"
+            return
+        result.available = True
+        result.tools = await transport.get_tools()
+
+    try:
+        await asyncio.wait_for(handshake(), timeout=transport.timeout)
+    except asyncio.TimeoutError:
+        result.error = f"timed out after {transport.timeout}s"
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        result.latency_ms = round((time.monotonic() - started) * 1000, 2)
+
+
+async def _close_when_done(task: asyncio.Task, transport: Transport):
+    await asyncio.wait([task])
+    try:
+        await transport.close()
+    except Exception as e:
+        logger.debug(f"Error closing probed transport: {e}")
+
+
+def _close_later(task: asyncio.Task, transport: Transport):
+    closer = asyncio.create_task(_close_when_done(task, transport))
+    _background.add(closer)
+    closer.add_done_callback(_background.discard)
+
+
+async def race_transports(
+    configs: dict[str, dict],
+    wrap: Optional[Callable[[str, Transport], Transport]] = None
+) -> RaceResult:
+    """
+    Probe transports concurrently; the first healthy one wins.
+
+    Args:
+        configs: mode -> transport config, in AUTO_ORDER
+        wrap: Applied to each transport before it is probed (mode, transport)
+
+    Returns:
+        RaceResult; transports that lost are closed once their probe ends
+    """
+    candidates = {mode: CandidateResult(mode) for mode in configs}
+    tasks: dict[asyncio.Task, tuple[str, Transport]] = {}
+    for mode, config in configs.items():
+        try:
+            transport = get_transport(TransportMode(mode), config)
+            if wrap is not None:
+                transport = wrap(mode, transport)
+        except Exception as e:
+            candidates[mode].available = False
+            candidates[mode].error = f"{type(e).__name__}: {e}"
+            continue
+        tasks[asyncio.create_task(probe(transport, candidates[mode]))] = (mode, transport)
+
+    winner: Optional[str] = None
+    pending = set(tasks)
+    while pending and winner is None:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        healthy = [tasks[task][0] for task in done if candidates[tasks[task][0]].healthy]
+        if healthy:
+            # Finished together: lowest latency, then AUTO_ORDER
+            winner = min(healthy, key=lambda mode: (candidates[mode].latency_ms, AUTO_ORDER.index(mode)))
+
+    transport = None
+    for task, (mode, candidate) in tasks.items():
+        if mode == winner:
+            transport = candidate
+        else:
+            _close_later(task, candidate)
+
+    failed = ", ".join(
+        f"{mode}: {result.error}" for mode, result in candidates.items() if result.error is not None
+    )
+    if winner is None:
+        reason = f"no transport answered ({failed})" if failed else "no transport configured"
+    else:
+        reason = (
+            f"first healthy answer of {', '.join(configs)} "
+            f"in {candidates[winner].latency_ms}ms"
+            + (f" ({failed})" if failed else "")
+        )
+    return RaceResult(winner, transport, candidates, reason)
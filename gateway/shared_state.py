@@ -0,0 +1,204 @@
+"""
+BTR Shared State - SQLite WAL store shared by uvicorn worker processes
+
+With BTR_SHARED_STATE=true every worker reads the tool catalog from one
+SQLite database in settings.data_dir. The enabled tool set lives in the
+same database through the sqlite state backend (state_backends.py), whose
+change detection uses PRAGMA data_version: it only changes when another
+connection commits, so checking for updates costs one tiny query.
+
+One worker holds an flock on discovery.lock and becomes the leader: it
+discovers tools, watches config files and publishes the catalog. The
+other workers load the published catalog instead of re-discovering.
+"""
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from catalog import ToolCatalog
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS catalog (
+    tool TEXT PRIMARY KEY,
+    server TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    schema TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS servers (
+    name TEXT PRIMARY KEY,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS container_use (
+    container TEXT PRIMARY KEY,
+    last_used REAL NOT NULL
+);
+"""
+
+
+class SharedStore:
+    """Process-shared catalog and discovery leadership"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(db_path),
+            isolation_level=None,  # explicit BEGIN/COMMIT
+            check_same_thread=False,
+            timeout=5.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock_file = None
+
+    def _get_meta(self, key: str, default: str = "0") -> str:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    # -------------------------------------------------------------------------
+    # Catalog
+    # -------------------------------------------------------------------------
+
+    def catalog_version(self) -> int:
+        """Version of the last published catalog (0 if none yet)"""
+        return int(self._get_meta("catalog_version"))
+
+    def publish_catalog(self, all_tools: "ToolCatalog", servers: dict[str, dict], catalog_version: int):
+        """
+        Replace the shared catalog with the leader's view.
+
+        Args:
+            all_tools: ToolRouter.all_tools
+            servers: Per-server status (healthy, active_transport, ...)
+            catalog_version: The leader's catalog version
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM catalog")
+            self._conn.executemany(
+                "INSERT INTO catalog (tool, server, original_name, schema) VALUES (?, ?, ?, ?)",
+                (
+                    (name, entry.server, entry.original_name, json.dumps(entry.schema))
+                    for name, entry in all_tools.items()
+                )
+            )
+            self._conn.execute("DELETE FROM servers")
+            self._conn.executemany(
+                "INSERT INTO servers (name, status) VALUES (?, ?)",
+                ((name, json.dumps(status)) for name, status in servers.items())
+            )
+            self._set_meta("catalog_version", catalog_version)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def read_catalog(self) -> tuple[int, dict[str, dict], dict[str, dict]]:
+        """
+        Read the published catalog.
+
+        Returns:
+            (catalog version, tool name -> {server, original_name, schema}, server status mapping)
+        """
+        self._conn.execute("BEGIN")
+        try:
+            version = int(self._get_meta("catalog_version"))
+            all_tools = {
+                name: {"server": server, "original_name": original, "schema": json.loads(schema)}
+                for name, server, original, schema in self._conn.execute(
+                    "SELECT tool, server, original_name, schema FROM catalog"
+                )
+            }
+            servers = {
+                name: json.loads(status)
+                for name, status in self._conn.execute("SELECT name, status FROM servers")
+            }
+        finally:
+            self._conn.execute("COMMIT")
+        return version, all_tools, servers
+
+    # -------------------------------------------------------------------------
+    # Container use
+    # -------------------------------------------------------------------------
+
+    def touch_container(self, container: str, when: float):
+        """Record that this worker used a container at ``when`` (Unix time)"""
+        self._conn.execute(
+            "INSERT INTO container_use (container, last_used) VALUES (?, ?) "
+            "ON CONFLICT(container) DO UPDATE SET last_used = MAX(last_used, excluded.last_used)",
+            (container, when)
+        )
+
+    def container_last_used(self) -> dict[str, float]:
+        """Container -> last use by any worker (Unix time)"""
+        return dict(self._conn.execute("SELECT container, last_used FROM container_use"))
+
+    # -------------------------------------------------------------------------
+    # Leadership
+    # -------------------------------------------------------------------------
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def try_acquire_leadership(self) -> bool:
+        """
+        Try to become the worker responsible for discovery.
+
+        The flock is released by the kernel when the process exits, so a
+        follower can take over from a dead leader on its next attempt.
+        """
+        if self._lock_file is not None:
+            return True
+
+        lock_path = self.db_path.parent / "discovery.lock"
+        lock_file = open(lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        logger.info(f"Worker {os.getpid()} is the discovery leader")
+        return True
+
+    def close(self):
+        """Release leadership and close the database"""
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self._conn.close()
+
+
+def open_shared_store(data_dir: Path) -> Optional[SharedStore]:
+    """Open the shared store, or None if SQLite cannot be used here"""
+    try:
+        return SharedStore(data_dir / "btr_state.db")
+    except sqlite3.Error as e:
+        logger.error(f"Cannot open shared state database in {data_dir}: {e}")
+        return None
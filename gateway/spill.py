@@ -0,0 +1,191 @@
+"""
+BTR Spill Store - Large tool results kept on disk as MCP resources
+
+Text values larger than ``BTR_SPILL_THRESHOLD_BYTES`` are streamed to
+``data_dir/spill`` instead of being held in memory or returned inline.
+Files are named by the SHA-256 of their content, so identical results are
+stored once and every worker can serve every spill. The tools/call
+response carries a ``resource_link`` to ``btr://spill/<sha256>``. Clients
+fetch it with ``resources/read``, optionally a byte range at a time:
+
+    btr://spill/<sha256>?offset=65536&length=65536
+
+Files not written or read for ``BTR_SPILL_TTL`` seconds are removed by
+cleanup().
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SPILL_SCHEME = "btr"
+SPILL_URI_PREFIX = f"{SPILL_SCHEME}://spill/"
+
+# Buffer for spill file writes
+WRITE_BUFFER = 1024 * 1024
+
+DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class SpillWriter:
+    """
+    One spill in progress.
+
+    Text is hashed and written through a buffered file as it arrives, so
+    memory stays flat however large the result is.
+    """
+
+    def __init__(self, store: "SpillStore"):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, path = tempfile.mkstemp(dir=store.directory, prefix=".spill-")
+        self._path = Path(path)
+        self._file = os.fdopen(fd, "wb", buffering=WRITE_BUFFER)
+
+    def write(self, data: bytes):
+        self._hash.update(data)
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self) -> tuple[str, int]:
+        """
+        Move the spill into place under its content hash.
+
+        Returns:
+            (sha256 hex digest, size in bytes)
+        """
+        self._file.close()
+        digest = self._hash.hexdigest()
+        target = self.store.path(digest)
+        if target.exists():
+            # Same content already spilled; keep it and restart its TTL
+            self._path.unlink(missing_ok=True)
+            os.utime(target)
+        else:
+            os.replace(self._path, target)
+        return digest, self.size
+
+    def abort(self):
+        self._file.close()
+        self._path.unlink(missing_ok=True)
+
+
+class SpillStore:
+    """Content-addressed files under data_dir/spill"""
+
+    def __init__(self, directory: Path, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+
+    def writer(self) -> SpillWriter:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return SpillWriter(self)
+
+    def path(self, digest: str) -> Path:
+        return self.directory / digest
+
+    def uri(self, digest: str) -> str:
+        return f"{SPILL_URI_PREFIX}{digest}"
+
+    def read(self, uri: str, offset: Optional[int] = None, length: Optional[int] = None) -> dict:
+        """
+        Serve resources/read for a spill URI.
+
+        The range comes from the arguments or the URI query (arguments win)
+        and is widened or narrowed to whole UTF-8 characters.
+
+        Returns:
+            resources/read result with the range in ``_meta``
+
+        Raises:
+            ValueError: If the URI is not a spill or has expired
+        """
+        parts = urlsplit(uri)
+        digest = parts.path.lstrip("/")
+        if parts.scheme != SPILL_SCHEME or parts.netloc != "spill" or not DIGEST.match(digest):
+            raise ValueError(f"Unknown resource: {uri}")
+
+        query = parse_qs(parts.query)
+        if offset is None:
+            offset = int(query.get("offset", ["0"])[0])
+        if length is None:
+            length = int(query.get("length", [str(settings.spill_read_max_bytes)])[0])
+        length = max(0, min(length, settings.spill_read_max_bytes))
+
+        path = self.path(digest)
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                offset = max(0, min(offset, size))
+                # Read a few extra bytes so the range can end on a character
+                f.seek(offset)
+                data = f.read(length + 3)
+        except FileNotFoundError:
+            raise ValueError(f"Resource expired or not found: {uri}")
+        os.utime(path)
+
+        # Skip a partial character at the start and stop before one at the end
+        start = 0
+        while start < len(data) and (data[start] & 0xC0) == 0x80:
+            start += 1
+        end = min(len(data), start + length)
+        while start < end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        if end == start < len(data) and length:
+            # Range shorter than the next character: return that whole character
+            end = start + 1
+            while end < len(data) and (data[end] & 0xC0) == 0x80:
+                end += 1
+        offset += start
+        next_offset = offset + (end - start)
+
+        return {
+            "contents": [{
+                "uri": self.uri(digest),
+                "mimeType": "text/plain",
+                "text": data[start:end].decode("utf-8", errors="replace")
+            }],
+            "_meta": {
+                "offset": offset,
+                "length": end - start,
+                "size": size,
+                "next_offset": next_offset if next_offset < size else None
+            }
+        }
+
+    def cleanup(self) -> int:
+        """
+        Remove spills idle for longer than the TTL, and abandoned temp files.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.directory.exists():
+            return 0
+
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for path in self.directory.iterdir():
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.debug(f"Removed {removed} expired spill files")
+        return removed
+
+
+# Global spill store
+spill_store = SpillStore(settings.data_dir / "spill", settings.spill_ttl)
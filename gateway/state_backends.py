@@ -0,0 +1,473 @@
+"""
+BTR State Backends - Persistence for the enabled tool set
+
+json    enabled_tools.json, rewritten in full on every change (default)
+sqlite  btr_state.db with incremental writes, a versioned change history,
+        point-in-time rollback and any number of named profiles
+
+Both backends hand out a monotonically increasing state version; the
+SQLite backend also records a timestamp and the added/removed tools for
+every version.
+"""
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable, Optional
+
+from errors import ConfigurationError, StateConflictError
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend(ABC):
+    """Abstract persistence for one profile's enabled tool set"""
+
+    @abstractmethod
+    def is_initialized(self) -> bool:
+        """True once the profile has a persisted or seeded state"""
+
+    @abstractmethod
+    def load(self) -> tuple[int, set[str], bool]:
+        """
+        Read the current state.
+
+        Returns:
+            (state version, enabled tools, still on the default preset)
+        """
+
+    @abstractmethod
+    def seed(self, tools: Iterable[str], from_default: bool) -> bool:
+        """
+        Set the initial state unless another process already did.
+
+        Returns:
+            True if this call seeded the state
+        """
+
+    @abstractmethod
+    def apply(
+        self,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        replace: bool = False,
+        from_default: bool = False,
+        expected_version: Optional[int] = None
+    ) -> int:
+        """
+        Apply a change atomically.
+
+        Args:
+            add: Tools to enable
+            remove: Tools to disable
+            replace: Treat ``add`` as the complete new set
+            from_default: Mark the new state as coming from the default preset
+            expected_version: Only apply if the state is still at this version
+
+        Returns:
+            The new state version
+
+        Raises:
+            StateConflictError: If expected_version is not the current version
+        """
+
+    def changed(self) -> bool:
+        """True if another process changed the state since the last check"""
+        return False
+
+    def history(self, limit: int = 50) -> list[dict]:
+        """Recent versions, newest first"""
+        raise ConfigurationError(
+            "BTR_STATE_BACKEND",
+            "state history requires the sqlite backend",
+            "Set BTR_STATE_BACKEND=sqlite"
+        )
+
+    def rollback(self, version: Optional[int] = None, timestamp: Optional[float] = None) -> int:
+        """Restore the state as of a version or a point in time"""
+        raise ConfigurationError(
+            "BTR_STATE_BACKEND",
+            "rollback requires the sqlite backend",
+            "Set BTR_STATE_BACKEND=sqlite"
+        )
+
+    def profiles(self) -> list[dict]:
+        """All known profiles with their version and tool count"""
+        return []
+
+    def close(self):
+        """Release resources"""
+
+
+class JsonStateBackend(StateBackend):
+    """The original enabled_tools.json file, rewritten on every change"""
+
+    def __init__(self, state_file: Path):
+        self.state_file = state_file
+        self._version = 0
+        self._tools: set[str] = set()
+        self._from_default = False
+        self._initialized = False
+
+        if state_file.exists():
+            try:
+                with open(state_file) as f:
+                    data = json.load(f)
+                self._tools = set(data.get("enabled_tools", []))
+                self._version = data.get("version", 0)
+                self._initialized = True
+            except (json.JSONDecodeError, IOError):
+                logger.warning(f"Ignoring unreadable state file {state_file}")
+
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    def load(self) -> tuple[int, set[str], bool]:
+        return self._version, set(self._tools), self._from_default
+
+    def seed(self, tools: Iterable[str], from_default: bool) -> bool:
+        # The default preset is not persisted, so edits to it apply on restart
+        self._tools = set(tools)
+        self._from_default = from_default
+        self._initialized = True
+        return True
+
+    def apply(self, add=(), remove=(), replace=False, from_default=False, expected_version=None) -> int:
+        if expected_version is not None and expected_version != self._version:
+            raise StateConflictError(expected_version, self._version)
+
+        tools = set() if replace else set(self._tools)
+        tools.difference_update(remove)
+        tools.update(add)
+        self._tools = tools
+        self._version += 1
+        self._from_default = from_default
+
+        if not from_default:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.state_file, "w") as f:
+                json.dump({"enabled_tools": list(tools), "version": self._version}, f, indent=2)
+        return self._version
+
+
+# Tools per "IN (...)" query; older SQLite builds allow 999 parameters
+SQLITE_IN_BATCH = 500
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    from_default INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS profile_tools (
+    profile TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    PRIMARY KEY (profile, tool)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_versions (
+    profile TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    note TEXT,
+    PRIMARY KEY (profile, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_changes (
+    profile TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    tool TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS state_changes_by_version ON state_changes (profile, version);
+"""
+
+
+class SqliteStateBackend(StateBackend):
+    """
+    SQLite backend with incremental writes and versioned history.
+
+    A mutation touches only the tools that changed: one row per added or
+    removed tool in profile_tools, plus the same rows in state_changes and
+    one row in state_versions. History older than ``keep_versions`` is
+    pruned as new versions are written.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        profile: str = "default",
+        keep_versions: int = 1000,
+        migrate_from: Optional[Path] = None
+    ):
+        self.db_path = db_path
+        self.profile = profile
+        self.keep_versions = keep_versions
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(db_path),
+            isolation_level=None,  # explicit BEGIN/COMMIT
+            check_same_thread=False,
+            timeout=5.0
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._seen_data_version = -1
+
+        if migrate_from is not None:
+            self._migrate_json(migrate_from)
+
+    def _migrate_json(self, state_file: Path):
+        """Import enabled_tools.json into an uninitialized profile"""
+        if self.is_initialized() or not state_file.exists():
+            return
+        source = JsonStateBackend(state_file)
+        if not source.is_initialized():
+            return
+        _, tools, _ = source.load()
+        if self._seed(tools, from_default=False, note=f"migrated from {state_file.name}"):
+            logger.info(f"Migrated {len(tools)} enabled tools from {state_file} to {self.db_path}")
+
+    def changed(self) -> bool:
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._seen_data_version:
+            self._seen_data_version = data_version
+            return True
+        return False
+
+    def _profile_row(self) -> Optional[tuple[int, int]]:
+        return self._conn.execute(
+            "SELECT version, from_default FROM profiles WHERE name = ?", (self.profile,)
+        ).fetchone()
+
+    def _current_tools(self) -> set[str]:
+        return {
+            row[0] for row in self._conn.execute(
+                "SELECT tool FROM profile_tools WHERE profile = ?", (self.profile,)
+            )
+        }
+
+    def is_initialized(self) -> bool:
+        return self._profile_row() is not None
+
+    def load(self) -> tuple[int, set[str], bool]:
+        self._conn.execute("BEGIN")
+        try:
+            row = self._profile_row()
+            tools = self._current_tools()
+        finally:
+            self._conn.execute("COMMIT")
+        if row is None:
+            return 0, set(), False
+        return row[0], tools, bool(row[1])
+
+    def seed(self, tools: Iterable[str], from_default: bool) -> bool:
+        return self._seed(tools, from_default, note="seed")
+
+    def _seed(self, tools: Iterable[str], from_default: bool, note: str) -> bool:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._profile_row() is not None:
+                self._conn.execute("COMMIT")
+                return False
+            self._conn.execute(
+                "INSERT INTO profiles (name, version, from_default) VALUES (?, 0, ?)",
+                (self.profile, int(from_default))
+            )
+            self._write(set(tools), set(), 0, from_default, note)
+            self._conn.execute("COMMIT")
+            return True
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def apply(
+        self, add=(), remove=(), replace=False, from_default=False,
+        expected_version=None, note: Optional[str] = None
+    ) -> int:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._profile_row()
+            if expected_version is not None and expected_version != (row[0] if row else 0):
+                raise StateConflictError(expected_version, row[0] if row else 0)
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO profiles (name, version, from_default) VALUES (?, 0, 0)",
+                    (self.profile,)
+                )
+                version = 0
+            else:
+                version = row[0]
+
+            add, remove = set(add), set(remove)
+            if replace:
+                current = self._current_tools()
+                remove = current - add
+                add = add - current
+            else:
+                # Only record tools whose state actually changes
+                current = self._enabled_among(add | remove)
+                remove = (remove - add) & current
+                add = add - current
+                if not add and not remove:
+                    self._conn.execute("COMMIT")
+                    return version
+
+            version = self._write(add, remove, version, from_default, note)
+            self._conn.execute("COMMIT")
+            return version
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _enabled_among(self, tools: set[str]) -> set[str]:
+        """Which of these tools are enabled (inside an open transaction)"""
+        tools = list(tools)
+        enabled = set()
+        for start in range(0, len(tools), SQLITE_IN_BATCH):
+            batch = tools[start:start + SQLITE_IN_BATCH]
+            enabled.update(
+                row[0] for row in self._conn.execute(
+                    f"SELECT tool FROM profile_tools WHERE profile = ? AND tool IN ({','.join('?' * len(batch))})",
+                    (self.profile, *batch)
+                )
+            )
+        return enabled
+
+    def _write(self, add: set[str], remove: set[str], version: int, from_default: bool, note: Optional[str]) -> int:
+        """Write one version inside an open transaction"""
+        version += 1
+        self._conn.executemany(
+            "DELETE FROM profile_tools WHERE profile = ? AND tool = ?",
+            ((self.profile, t) for t in remove)
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO profile_tools (profile, tool) VALUES (?, ?)",
+            ((self.profile, t) for t in add)
+        )
+        self._conn.executemany(
+            "INSERT INTO state_changes (profile, version, op, tool) VALUES (?, ?, ?, ?)",
+            [(self.profile, version, "remove", t) for t in remove]
+            + [(self.profile, version, "add", t) for t in add]
+        )
+        self._conn.execute(
+            "INSERT INTO state_versions (profile, version, ts, note) VALUES (?, ?, ?, ?)",
+            (self.profile, version, time.time(), note)
+        )
+        self._conn.execute(
+            "UPDATE profiles SET version = ?, from_default = ? WHERE name = ?",
+            (version, int(from_default), self.profile)
+        )
+
+        if self.keep_versions and version > self.keep_versions:
+            cutoff = version - self.keep_versions
+            self._conn.execute(
+                "DELETE FROM state_changes WHERE profile = ? AND version <= ?", (self.profile, cutoff)
+            )
+            self._conn.execute(
+                "DELETE FROM state_versions WHERE profile = ? AND version <= ?", (self.profile, cutoff)
+            )
+        return version
+
+    def history(self, limit: int = 50) -> list[dict]:
+        versions = self._conn.execute(
+            "SELECT version, ts, note FROM state_versions WHERE profile = ? "
+            "ORDER BY version DESC LIMIT ?",
+            (self.profile, limit)
+        ).fetchall()
+        if not versions:
+            return []
+
+        changes: dict[int, dict] = {
+            v: {"version": v, "timestamp": ts, "note": note, "added": [], "removed": []}
+            for v, ts, note in versions
+        }
+        for version, op, tool in self._conn.execute(
+            "SELECT version, op, tool FROM state_changes WHERE profile = ? AND version >= ?",
+            (self.profile, versions[-1][0])
+        ):
+            changes[version]["added" if op == "add" else "removed"].append(tool)
+
+        return [changes[v] for v, _, _ in versions]
+
+    def rollback(self, version: Optional[int] = None, timestamp: Optional[float] = None) -> int:
+        """
+        Restore an earlier state by undoing every later change.
+
+        The rollback is itself recorded as a new version.
+
+        Args:
+            version: Target version
+            timestamp: Target point in time (unix seconds); the latest
+                version written at or before it is used
+
+        Returns:
+            The new state version
+
+        Raises:
+            ConfigurationError: If the target is outside the kept history
+        """
+        if timestamp is not None:
+            row = self._conn.execute(
+                "SELECT MAX(version) FROM state_versions WHERE profile = ? AND ts <= ?",
+                (self.profile, timestamp)
+            ).fetchone()
+            version = row[0] if row else None
+        if version is None:
+            raise ConfigurationError("rollback", "no state version at or before the requested time")
+
+        # Read, compute and write in one transaction so a write from another
+        # worker cannot land between working out the delta and applying it
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            oldest = self._conn.execute(
+                "SELECT MIN(version) FROM state_versions WHERE profile = ?", (self.profile,)
+            ).fetchone()[0]
+            if oldest is None or version < oldest:
+                raise ConfigurationError(
+                    "rollback",
+                    f"version {version} is older than the kept history (oldest: {oldest})",
+                    "Increase BTR_STATE_HISTORY_KEEP to keep more versions"
+                )
+
+            row = self._profile_row()
+            current_version = row[0] if row else 0
+            if version > current_version:
+                raise ConfigurationError(
+                    "rollback", f"version {version} does not exist yet (current: {current_version})"
+                )
+
+            current = self._current_tools()
+            target = set(current)
+            for op, tool in self._conn.execute(
+                "SELECT op, tool FROM state_changes WHERE profile = ? AND version > ? "
+                "ORDER BY version DESC, rowid DESC",
+                (self.profile, version)
+            ):
+                if op == "add":
+                    target.discard(tool)
+                else:
+                    target.add(tool)
+
+            new_version = self._write(
+                target - current, current - target, current_version, False, f"rollback to v{version}"
+            )
+            self._conn.execute("COMMIT")
+            return new_version
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def profiles(self) -> list[dict]:
+        return [
+            {"name": name, "version": version, "tool_count": count}
+            for name, version, count in self._conn.execute(
+                "SELECT p.name, p.version, "
+                "(SELECT COUNT(*) FROM profile_tools t WHERE t.profile = p.name) "
+                "FROM profiles p ORDER BY p.name"
+            )
+        ]
+
+    def close(self):
+        self._conn.close()
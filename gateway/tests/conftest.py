@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Gateway modules use flat imports (run from gateway/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.py builds its settings and tool state on import; keep them out of /app
+_data = Path(tempfile.mkdtemp(prefix="btr-tests-"))
+for name in ("data", "presets", "servers"):
+    (_data / name).mkdir()
+os.environ.setdefault("BTR_DATA_DIR", str(_data / "data"))
+os.environ.setdefault("BTR_PRESETS_DIR", str(_data / "presets"))
+os.environ.setdefault("BTR_SERVERS_DIR", str(_data / "servers"))
+
+# Import order as in main.py: config first (its ToolState imports presets lazily)
+import config  # noqa: E402,F401
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from transports.base import Transport, TransportError, TransportTimeoutError
+from transports.cassette import RecordingTransport, ReplayTransport
+
+
+class FakeTransport(Transport):
+    """Answers tools/call with the tool name, or raises a queued error"""
+
+    def __init__(self):
+        super().__init__({})
+        self.errors = []
+
+    async def send_request(self, request, output_filter=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        params = request.get("params") or {}
+        return {"jsonrpc": "2.0", "id": request["id"], "result": {
+            "content": [{"type": "text", "text": f"{params.get('name')} {params.get('arguments')}"}]
+        }}
+
+    async def is_available(self):
+        return True
+
+
+def call(transport, name, arguments):
+    return transport.send_request({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                                   "params": {"name": name, "arguments": arguments}})
+
+
+def replay(path, **config):
+    return ReplayTransport({"cassette": str(path), "speed": 0, **config})
+
+
+def test_record_then_replay(tmp_path):
+    cassette = tmp_path / "server.jsonl"
+
+    async def scenario():
+        inner = FakeTransport()
+        recorder = RecordingTransport(inner, cassette)
+        live = [await call(recorder, "search", {"q": "a"}), await call(recorder, "search", {"q": "b"})]
+        inner.errors.append(TransportTimeoutError("upstream timed out"))
+        with pytest.raises(TransportTimeoutError):
+            await call(recorder, "fetch", {"url": "x"})
+        assert recorder.recorded == 3
+
+        player = replay(cassette)
+        assert await player.is_available()
+        assert [await call(player, "search", {"q": "a"}), await call(player, "search", {"q": "b"})] == live
+        with pytest.raises(TransportTimeoutError, match="upstream timed out"):
+            await call(player, "fetch", {"url": "x"})
+
+    asyncio.run(scenario())
+    assert [json.loads(line)["method"] for line in cassette.read_text().splitlines()] == ["tools/call"] * 3
+
+
+def test_replay_falls_back_to_the_same_tool_unless_exact(tmp_path):
+    cassette = tmp_path / "server.jsonl"
+
+    async def scenario():
+        await call(RecordingTransport(FakeTransport(), cassette), "search", {"q": "a"})
+        fallback = await call(replay(cassette), "search", {"q": "other"})
+        assert fallback["result"]["content"][0]["text"] == "search {'q': 'a'}"
+        with pytest.raises(TransportError, match="No recording"):
+            await call(replay(cassette, match="exact"), "search", {"q": "other"})
+        with pytest.raises(TransportError, match="No recording"):
+            await call(replay(cassette), "unknown", {})
+
+    asyncio.run(scenario())
+
+
+def test_held_entries_are_written_on_release(tmp_path):
+    cassette = tmp_path / "server.jsonl"
+
+    async def scenario():
+        recorder = RecordingTransport(FakeTransport(), cassette, hold=True)
+        await call(recorder, "search", {"q": "a"})
+        assert not cassette.exists()
+
+        await recorder.release()
+        await call(recorder, "search", {"q": "b"})
+        assert recorder.recorded == 2
+
+    asyncio.run(scenario())
+    assert len(cassette.read_text().splitlines()) == 2
+
+
+def test_missing_cassette_is_unavailable(tmp_path):
+    assert not asyncio.run(replay(tmp_path / "missing.jsonl").is_available())
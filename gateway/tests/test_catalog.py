@@ -0,0 +1,25 @@
+from catalog import ToolCatalog
+
+
+def test_repeated_tool_name_is_indexed_once():
+    catalog = ToolCatalog()
+    catalog.replace_server("s", [{"name": "a"}, {"name": "a"}])
+    assert list(catalog) == ["s__a"]
+
+    catalog.replace_server("s", [{"name": "b"}])
+    assert list(catalog) == ["s__b"]
+    catalog.remove_server("s")
+    assert len(catalog) == 0
+
+
+def test_prefixed_name_collision_keeps_first_owner():
+    catalog = ToolCatalog()
+    catalog.replace_server("a", [{"name": "b__c"}])
+    catalog.replace_server("a__b", [{"name": "c"}, {"name": "d"}])
+    assert catalog["a__b__c"].server == "a"
+    assert "a__b__d" in catalog
+
+    catalog.remove_server("a__b")
+    assert catalog["a__b__c"].server == "a"
+    catalog.remove_server("a")
+    assert len(catalog) == 0
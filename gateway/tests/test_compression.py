@@ -0,0 +1,90 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import compression
+from compression import CompressionMiddleware, ToolsListBody, negotiate
+
+
+@pytest.mark.parametrize("accept,expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("br, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("*", compression.SUPPORTED_ENCODINGS[0]),
+    ("gzip;q=1, zstd;q=0.5", "gzip"),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_zstd_preferred_when_installed():
+    pytest.importorskip("zstandard")
+    assert negotiate("gzip, zstd") == "zstd"
+    assert negotiate("gzip;q=1, zstd;q=0.5") == "gzip"
+
+
+def decode(body, encoding):
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    return gzip.decompress(body) if encoding == "gzip" else body
+
+
+@pytest.mark.parametrize("encoding", [None, *compression.SUPPORTED_ENCODINGS])
+def test_tools_list_body_renders_each_id(encoding):
+    tools = [{"name": f"server__tool{i}", "description": "d" * 100} for i in range(50)]
+    body = ToolsListBody(tools, {"version": 3})
+    for request_id in (1, "abc", 1):
+        response = json.loads(decode(body.render(request_id, encoding), encoding))
+        assert response == {"jsonrpc": "2.0", "result": {"tools": tools, "_meta": {"version": 3}}, "id": request_id}
+
+
+def run_middleware(content_type, body, accept=b"gzip", more_body=False, extra_headers=()):
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type), *extra_headers]})
+        sent.append("started")
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/mcp", "headers": [(b"accept-encoding", accept)]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+    return sent
+
+
+def test_middleware_compresses_large_json():
+    body = json.dumps({"data": "x" * 4096}).encode()
+    _, start, message = run_middleware(b"application/json", body, extra_headers=[(b"etag", b'"abc"')])
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"abc"'
+    assert int(headers[b"content-length"]) == len(message["body"])
+    assert gzip.decompress(message["body"]) == body
+
+
+def test_middleware_leaves_small_bodies_alone():
+    _, start, message = run_middleware(b"application/json", b"{}")
+    assert b"content-encoding" not in dict(start["headers"])
+    assert message["body"] == b"{}"
+
+
+def test_middleware_sends_event_stream_headers_at_once():
+    sent = run_middleware(b"text/event-stream", b"data: " + b"x" * 4096 + b"\n\n", more_body=True)
+    assert sent[0]["type"] == "http.response.start"
+    assert sent[1] == "started"
+    assert b"content-encoding" not in dict(sent[0]["headers"])
+
+
+def test_middleware_without_accept_encoding_passes_through():
+    body = b"x" * 4096
+    _, start, message = run_middleware(b"application/json", body, accept=b"identity")
+    assert message["body"] == body
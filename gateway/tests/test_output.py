@@ -0,0 +1,108 @@
+import json
+import re
+
+import pytest
+
+from output import ContinuationStore, OutputLimits, TruncatingFilter
+from spill import SpillStore
+
+
+def response(*texts):
+    return {"jsonrpc": "2.0", "id": 1, "result": {
+        "content": [{"type": "text", "text": text} for text in texts], "isError": False
+    }}
+
+
+def run_filter(output_filter, message, chunk_size=7):
+    raw = json.dumps(message).encode()
+    kept = b"".join(output_filter.feed(raw[i:i + chunk_size]) for i in range(0, len(raw), chunk_size))
+    return json.loads(kept + output_filter.close())
+
+
+def read_all(store, text):
+    """Follow truncation markers with btr__continue until the end"""
+    match = re.search(r'\{"handle": "(\w+)", "offset": (\d+)\}', text)
+    parts = [text[:text.index("\n\n[truncated")]]
+    while match:
+        result = store.call({"handle": match.group(1), "offset": int(match.group(2))})
+        text = result["content"][0]["text"]
+        match = re.search(r'\{"handle": "(\w+)", "offset": (\d+)\}', text)
+        parts.append(text[:text.index("\n\n[truncated")] if match else text)
+    return "".join(parts)
+
+
+def test_under_budget_passes_through():
+    message = response("short", "also short")
+    assert run_filter(TruncatingFilter(1000, ContinuationStore(1 << 20)), message) == message
+
+
+@pytest.mark.parametrize("text", ["x" * 500, "héllo wörld " * 40, "\U0001F600 emoji \"quoted\"\n" * 30])
+def test_cut_text_round_trips_through_continuations(text):
+    store = ContinuationStore(1 << 20)
+    output_filter = TruncatingFilter(64, store)
+
+    result = run_filter(output_filter, response(text))
+    kept = result["result"]["content"][0]["text"]
+
+    assert output_filter.truncated
+    assert len(kept.split("\n\n[truncated")[0].encode()) <= 64
+    assert read_all(store, kept) == text
+
+
+def test_budget_is_shared_across_content_items():
+    output_filter = TruncatingFilter(10, ContinuationStore(1 << 20))
+    result = run_filter(output_filter, response("a" * 8, "b" * 8))
+    first, second = (item["text"] for item in result["result"]["content"])
+    assert first == "a" * 8
+    assert second.startswith("bb\n\n[truncated")
+
+
+def test_continuation_smaller_than_a_character_still_advances():
+    store = ContinuationStore(1 << 20)
+    handle = store.put("\U0001F600\U0001F600".encode(), 2)
+    assert store.read(handle, 0) == ("\U0001F600", 4)
+    assert store.read(handle, 4) == ("\U0001F600", None)
+
+
+def test_continuations_are_evicted_oldest_first():
+    store = ContinuationStore(10)
+    first = store.put(b"123456", 4)
+    second = store.put(b"abcdef", 4)
+    with pytest.raises(ValueError):
+        store.call({"handle": first})
+    assert store.read(second)[0] == "abcd"
+
+
+def test_continuations_are_shared_through_the_directory(tmp_path):
+    handle = ContinuationStore(1 << 20, tmp_path).put(b"shared text", 6)
+    other = ContinuationStore(1 << 20, tmp_path)
+    assert other.read(handle, 7) == ("text", None)
+    with pytest.raises(ValueError):
+        other.call({"handle": "../" + handle})
+
+
+def test_large_text_is_spilled(tmp_path):
+    spill = SpillStore(tmp_path, ttl=60)
+    output_filter = TruncatingFilter(0, ContinuationStore(1 << 20), spill, spill_bytes=100)
+    text = "line\n" * 100
+
+    result = output_filter.link_spills(run_filter(output_filter, response("small", text))["result"])
+    small, link = result["content"]
+    assert small == {"type": "text", "text": "small"}
+    assert link["type"] == "resource_link"
+    assert spill.read(link["uri"])["contents"][0]["text"] == text
+
+
+def test_abort_removes_an_unfinished_spill(tmp_path):
+    output_filter = TruncatingFilter(0, ContinuationStore(1 << 20), SpillStore(tmp_path, ttl=60), spill_bytes=10)
+    output_filter.feed(b'{"result":{"content":[{"type":"text","text":"' + b"x" * 100)
+    assert list(tmp_path.iterdir())
+
+    output_filter.abort()
+    assert not list(tmp_path.iterdir())
+
+
+def test_limits_resolve_server_then_tool_overrides():
+    config = {"output_limits": {"max_bytes": 1000, "tools": {"big": {"max_tokens": 100}}}}
+    assert OutputLimits.resolve(config, "other").budget == 1000
+    assert OutputLimits.resolve(config, "big").budget == 400
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from catalog import ToolCatalog
+from errors import ConfigurationError, PresetNotFoundError
+from presets import PresetIndex
+
+
+def write_preset(directory, name, **data):
+    (directory / f"{name}.json").write_text(json.dumps({"name": name, **data}))
+
+
+@pytest.fixture
+def catalog():
+    catalog = ToolCatalog()
+    catalog.replace_server("github", [
+        {"name": "get_me"}, {"name": "get_issue"}, {"name": "list_issues"}, {"name": "create_issue"}
+    ])
+    catalog.replace_server("search", [{"name": "web"}])
+    return catalog
+
+
+def test_extends_globs_and_excludes(tmp_path, catalog):
+    write_preset(tmp_path, "research", tools=["search__*"])
+    write_preset(
+        tmp_path, "github-readonly",
+        extends="research",
+        tools=["github__get_*", "github__list_*"],
+        exclude=["github__get_me"]
+    )
+    index = PresetIndex(tmp_path)
+
+    assert index.resolve("github-readonly", catalog) == {
+        "search__web", "github__get_issue", "github__list_issues"
+    }
+
+
+def test_literal_names_are_kept_before_discovery(tmp_path):
+    write_preset(tmp_path, "dev", tools=["github__get_issue", "github__*"])
+    index = PresetIndex(tmp_path)
+
+    assert index.resolve("dev", ToolCatalog()) == {"github__get_issue"}
+
+
+def test_patterns_follow_the_catalog_version(tmp_path, catalog):
+    write_preset(tmp_path, "all-search", tools=["search__*"])
+    index = PresetIndex(tmp_path)
+    assert index.resolve("all-search", catalog, 1) == {"search__web"}
+
+    catalog.replace_server("search", [{"name": "web"}, {"name": "news"}])
+    assert index.resolve("all-search", catalog, 2) == {"search__web", "search__news"}
+
+
+def test_changed_file_is_reparsed(tmp_path, catalog):
+    write_preset(tmp_path, "p", tools=["search__web"])
+    index = PresetIndex(tmp_path)
+    assert index.resolve("p", catalog) == {"search__web"}
+
+    write_preset(tmp_path, "p", tools=["github__get_me"])
+    preset_file = tmp_path / "p.json"
+    stat = preset_file.stat()
+    os.utime(preset_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert index.resolve("p", catalog) == {"github__get_me"}
+
+
+def test_circular_extends_is_rejected(tmp_path, catalog):
+    write_preset(tmp_path, "a", extends="b")
+    write_preset(tmp_path, "b", extends="a")
+
+    with pytest.raises(ConfigurationError):
+        PresetIndex(tmp_path).resolve("a", catalog)
+
+
+def test_missing_parent_is_reported(tmp_path, catalog):
+    write_preset(tmp_path, "a", extends="nope")
+
+    with pytest.raises(PresetNotFoundError):
+        PresetIndex(tmp_path).resolve("a", catalog)
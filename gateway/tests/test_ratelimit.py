@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from errors import RateLimitedError
+from ratelimit import BACKOFF_MAX, RateLimiter, parse_rate_limit_signal
+
+
+def test_reject_mode_allows_the_burst_then_rejects():
+    limiter = RateLimiter({"requests_per_second": 1, "burst": 3, "mode": "reject"})
+
+    async def main():
+        for _ in range(3):
+            await limiter.acquire("s", "t")
+        with pytest.raises(RateLimitedError):
+            await limiter.acquire("s", "t")
+
+    asyncio.run(main())
+    assert limiter.rejected == 1
+
+
+def test_queue_mode_smooths_to_the_rate():
+    limiter = RateLimiter({"requests_per_second": 50, "burst": 1})
+
+    async def main():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire("s", "t") for _ in range(6)))
+        return time.monotonic() - started
+
+    # One token up front, then one every 20ms
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_queue_mode_rejects_past_max_wait():
+    limiter = RateLimiter({"requests_per_second": 1, "burst": 1, "max_wait": 0.5})
+
+    async def main():
+        await limiter.acquire("s", "t")
+        with pytest.raises(RateLimitedError):
+            await limiter.acquire("s", "t")
+
+    asyncio.run(main())
+
+
+def test_tool_bucket_is_separate_from_other_tools():
+    limiter = RateLimiter({"mode": "reject", "tools": {"search": {"requests_per_second": 1, "burst": 1}}})
+
+    async def main():
+        await limiter.acquire("s", "search")
+        with pytest.raises(RateLimitedError):
+            await limiter.acquire("s", "search")
+        await limiter.acquire("s", "other")
+
+    asyncio.run(main())
+
+
+def test_upstream_signal_pauses_and_slows_down():
+    limiter = RateLimiter({"mode": "reject"})
+    limiter.record_signal(30)
+    assert limiter.rate_scale == 0.5
+    assert 29 < limiter.status()["paused_for"] <= 30
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(limiter.acquire("s", "t"))
+
+    limiter.record_success()
+    assert limiter.rate_scale > 0.5
+
+
+def test_upstream_pause_is_capped():
+    limiter = RateLimiter({})
+    limiter.record_signal(10 ** 9)
+    assert limiter.status()["paused_for"] <= BACKOFF_MAX
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("HTTP error 429: slow down", (True, None)),
+    ("rate limit exceeded, retry after 30s", (True, 30.0)),
+    ("Too Many Requests; try again in 500ms", (True, 0.5)),
+    ("Request was throttled", (True, None)),
+    ("Issue #429 not found", (False, None)),
+    ("src/throttle.py: syntax error", (False, None)),
+])
+def test_parse_rate_limit_signal(message, expected):
+    assert parse_rate_limit_signal(message) == expected
+
+
+def test_reset_epoch_is_capped():
+    assert parse_rate_limit_signal("rate limit reset at 1999999999") == (True, BACKOFF_MAX)
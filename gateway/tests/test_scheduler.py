@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from scheduler import UpstreamScheduler, resolve_priority
+
+
+async def hold(scheduler, priority, order, release):
+    async with scheduler.slot(priority):
+        order.append(priority)
+        await release.wait()
+
+
+def test_concurrency_limit():
+    async def main():
+        scheduler = UpstreamScheduler(2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with scheduler.slot("normal"):
+                peak = max(peak, scheduler.active)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(call() for _ in range(20)))
+        return peak, scheduler.active, scheduler.queued
+
+    assert asyncio.run(main()) == (2, 0, 0)
+
+
+def test_weighted_fair_order_without_starvation():
+    async def main():
+        scheduler = UpstreamScheduler(1)
+        order = []
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(hold(scheduler, "normal", [], gate))
+        await asyncio.sleep(0)
+
+        async def call(priority):
+            async with scheduler.slot(priority):
+                order.append(priority)
+
+        tasks = [asyncio.create_task(call("low")) for _ in range(10)]
+        tasks += [asyncio.create_task(call("high")) for _ in range(10)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        return order
+
+    order = asyncio.run(main())
+    first = order[:9]
+    assert first.count("high") >= 7
+    assert "low" in order[:10]
+    assert sorted(order) == ["high"] * 10 + ["low"] * 10
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        scheduler = UpstreamScheduler(1)
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(hold(scheduler, "normal", [], gate))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold(scheduler, "high", [], asyncio.Event()))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        gate.set()
+        await blocker
+        await asyncio.gather(waiter, return_exceptions=True)
+        return scheduler.active, scheduler.queued
+
+    assert asyncio.run(main()) == (0, 0)
+
+
+def test_resolve_priority():
+    config = {"scheduling": {"default_priority": "low", "priorities": {"search": "high"}}}
+    assert resolve_priority(config, "search") == "high"
+    assert resolve_priority(config, "other") == "low"
+    assert resolve_priority(config, "other", "high") == "high"
+    assert resolve_priority({}, "other") == "normal"
+    with pytest.raises(ValueError):
+        resolve_priority({}, "other", "urgent")
@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from spill import SpillStore
+
+
+def spill(store, text):
+    writer = store.writer()
+    writer.write(text.encode())
+    return writer.commit()
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = SpillStore(tmp_path, ttl=60)
+    first = spill(store, "same result")
+    assert spill(store, "same result") == first
+    assert [path.name for path in tmp_path.iterdir()] == [first[0]]
+
+
+def test_read_ranges_follow_next_offset(tmp_path):
+    store = SpillStore(tmp_path, ttl=60)
+    text = "aé\U0001F600" * 50
+    digest, size = spill(store, text)
+
+    parts, offset = [], 0
+    while offset is not None:
+        result = store.read(f"{store.uri(digest)}?offset={offset}&length=5")
+        parts.append(result["contents"][0]["text"])
+        assert result["_meta"]["size"] == size
+        offset = result["_meta"]["next_offset"]
+    assert "".join(parts) == text
+
+
+@pytest.mark.parametrize("length", [1, 2, 3])
+def test_range_shorter_than_a_character_still_advances(tmp_path, length):
+    store = SpillStore(tmp_path, ttl=60)
+    digest, _ = spill(store, "\U0001F600\U0001F600")
+    result = store.read(store.uri(digest), offset=0, length=length)
+    assert result["contents"][0]["text"] == "\U0001F600"
+    assert result["_meta"]["next_offset"] == 4
+
+
+def test_arguments_override_the_uri_range(tmp_path):
+    store = SpillStore(tmp_path, ttl=60)
+    digest, _ = spill(store, "0123456789")
+    result = store.read(f"{store.uri(digest)}?offset=2&length=2", offset=5, length=3)
+    assert result["contents"][0]["text"] == "567"
+
+
+@pytest.mark.parametrize("uri", ["btr://spill/../../etc/passwd", "file:///etc/passwd", "btr://spill/" + "0" * 64])
+def test_unknown_uris_are_rejected(tmp_path, uri):
+    with pytest.raises(ValueError):
+        SpillStore(tmp_path, ttl=60).read(uri)
+
+
+def test_cleanup_removes_idle_spills_and_abandoned_writes(tmp_path):
+    store = SpillStore(tmp_path, ttl=60)
+    old, _ = spill(store, "old")
+    fresh, _ = spill(store, "fresh")
+    abandoned = store.writer()
+    abandoned.write(b"partial")
+    stale = time.time() - 120
+    os.utime(store.path(old), (stale, stale))
+    os.utime(abandoned._path, (stale, stale))
+
+    assert store.cleanup() == 2
+    assert [path.name for path in tmp_path.iterdir()] == [fresh]
@@ -0,0 +1,77 @@
+import pytest
+
+from errors import ConfigurationError, StateConflictError
+from state_backends import SQLITE_IN_BATCH, SqliteStateBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SqliteStateBackend(tmp_path / "state.db")
+    backend.seed({"a"}, from_default=False)
+    yield backend
+    backend.close()
+
+
+def test_apply_records_only_real_changes(backend):
+    assert backend.apply(add={"b"}, remove={"x"}) == 2
+    assert backend.load() == (2, {"a", "b"}, False)
+
+    # Nothing changes: no new version
+    assert backend.apply(add={"a"}, remove={"x"}) == 2
+    assert [entry["version"] for entry in backend.history()] == [2, 1]
+
+
+def test_replace_and_history(backend):
+    backend.apply(add={"c", "d"}, replace=True)
+    latest = backend.history(1)[0]
+    assert sorted(latest["added"]) == ["c", "d"]
+    assert latest["removed"] == ["a"]
+
+
+def test_expected_version_conflict(backend):
+    with pytest.raises(StateConflictError):
+        backend.apply(add={"b"}, expected_version=0)
+    assert backend.load()[1] == {"a"}
+
+
+def test_large_delta_is_batched(backend):
+    tools = {f"t{i}" for i in range(SQLITE_IN_BATCH * 3)}
+    backend.apply(add=tools)
+    backend.apply(remove=tools, add={"z"})
+    assert backend.load()[1] == {"a", "z"}
+
+
+def test_rollback_restores_and_is_versioned(backend):
+    backend.apply(add={"b"})
+    backend.apply(add={"c"}, remove={"a"})
+
+    version = backend.rollback(version=1)
+    assert backend.load() == (version, {"a"}, False)
+    assert backend.history(1)[0]["note"] == "rollback to v1"
+
+
+def test_rollback_outside_history(tmp_path):
+    backend = SqliteStateBackend(tmp_path / "state.db", keep_versions=2)
+    backend.seed(set(), from_default=False)
+    for tool in ("a", "b", "c"):
+        backend.apply(add={tool})
+
+    with pytest.raises(ConfigurationError):
+        backend.rollback(version=1)
+    with pytest.raises(ConfigurationError):
+        backend.rollback(version=99)
+    backend.close()
+
+
+def test_changes_are_seen_by_other_connections(tmp_path):
+    first = SqliteStateBackend(tmp_path / "state.db")
+    second = SqliteStateBackend(tmp_path / "state.db")
+    first.seed({"a"}, from_default=False)
+    second.changed()
+
+    first.apply(add={"b"})
+    assert second.changed()
+    assert second.load()[1] == {"a", "b"}
+    assert not second.changed()
+    first.close()
+    second.close()
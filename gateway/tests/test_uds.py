@@ -0,0 +1,106 @@
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from transports.base import TransportConnectionError
+from transports.uds import UdsTransport
+
+
+def request(i):
+    return {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "echo", "arguments": {}}}
+
+
+async def serve(handler):
+    """Unix socket server on a short path (tmp_path can exceed the sun_path limit)"""
+    socket = Path(tempfile.mkdtemp(prefix="btr-")) / "s"
+    server = await asyncio.start_unix_server(handler, str(socket))
+    return server, str(socket)
+
+
+def test_sequential_requests_reuse_one_connection():
+    async def handler(reader, writer):
+        while line := await reader.readline():
+            writer.write(json.dumps({"jsonrpc": "2.0", "id": json.loads(line)["id"], "result": {}}).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server, socket = await serve(handler)
+        transport = UdsTransport({"socket": socket, "timeout": 2})
+        assert await transport.is_available()
+        for i in range(5):
+            assert (await transport.send_request(request(i)))["id"] == i
+        status = transport.pool_status()
+        await transport.close()
+        server.close()
+        return status
+
+    status = asyncio.run(scenario())
+    assert (status["opened"], status["reused"], status["idle"]) == (1, 5, 1)
+
+
+def test_concurrent_requests_open_at_most_max_connections():
+    async def handler(reader, writer):
+        while line := await reader.readline():
+            await asyncio.sleep(0.01)
+            writer.write(json.dumps({"jsonrpc": "2.0", "id": json.loads(line)["id"], "result": {}}).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server, socket = await serve(handler)
+        transport = UdsTransport({"socket": socket, "timeout": 2, "max_connections": 3})
+        responses = await asyncio.gather(*(transport.send_request(request(i)) for i in range(12)))
+        await transport.close()
+        server.close()
+        return transport, responses
+
+    transport, responses = asyncio.run(scenario())
+    assert [response["id"] for response in responses] == list(range(12))
+    assert transport.opened == 3
+
+
+def test_idle_connection_closed_by_server_is_retried():
+    async def handler(reader, writer):
+        line = await reader.readline()
+        writer.write(json.dumps({"jsonrpc": "2.0", "id": json.loads(line)["id"], "result": {}}).encode() + b"\n")
+        await writer.drain()
+        writer.close()  # one request per connection
+
+    async def scenario():
+        server, socket = await serve(handler)
+        transport = UdsTransport({"socket": socket, "timeout": 2})
+        await transport.send_request(request(1))
+        await asyncio.sleep(0.05)
+        response = await transport.send_request(request(2))
+        server.close()
+        return transport, response
+
+    transport, response = asyncio.run(scenario())
+    assert response["id"] == 2
+    assert transport.opened == 2
+
+
+def test_connection_lost_mid_response_is_not_retried():
+    calls = []
+
+    async def handler(reader, writer):
+        await reader.readline()
+        calls.append(1)
+        writer.write(b'{"jsonrpc": "2.0", "id": 1, "res')
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server, socket = await serve(handler)
+        transport = UdsTransport({"socket": socket, "timeout": 2})
+        assert await transport.is_available()  # the request goes out on a reused connection
+        with pytest.raises(TransportConnectionError, match="lost mid-response"):
+            await transport.send_request(request(1))
+        server.close()
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
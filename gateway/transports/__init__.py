@@ -1,6 +1,7 @@
 """
 BTR Transport Layer - Abstracts MCP server communication
-Supports multiple transport modes: Docker exec, local stdio, HTTP
+Supports multiple transport modes: Docker exec, local stdio, HTTP, unix sockets,
+BTR gateway, in-process Python servers and replay of recorded cassettes
 """
 from enum import Enum
 from typing import TYPE_CHECKING
@@ -16,6 +17,10 @@ class TransportMode(Enum):
     DOCKER = "docker"    # docker exec -i container command
     LOCAL = "local"      # direct subprocess (npx, python -m, etc.)
     HTTP = "http"        # HTTP-based MCP servers
+    UDS = "uds"          # JSON-RPC lines over a unix socket, pooled connections
+    GATEWAY = "gateway"  # another BTR gateway mounted as an upstream
+    INPROC = "inproc"    # Python server imported into the gateway or a worker pool
+    REPLAY = "replay"    # answers recorded in a cassette (offline tests and benchmarks)
 
 
 def get_transport(mode: TransportMode, config: dict) -> "Transport":
@@ -38,5 +43,17 @@ def get_transport(mode: TransportMode, config: dict) -> "Transport":
     elif mode == TransportMode.HTTP:
         from .http import HttpTransport
         return HttpTransport(config)
+    elif mode == TransportMode.UDS:
+        from .uds import UdsTransport
+        return UdsTransport(config)
+    elif mode == TransportMode.GATEWAY:
+        from .gateway import GatewayTransport
+        return GatewayTransport(config)
+    elif mode == TransportMode.INPROC:
+        from .inproc import InProcTransport
+        return InProcTransport(config)
+    elif mode == TransportMode.REPLAY:
+        from .cassette import ReplayTransport
+        return ReplayTransport(config)
     else:
         raise ValueError(f"Unknown transport mode: {mode}")
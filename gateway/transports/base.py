@@ -1,11 +1,15 @@
 """
 Base Transport class - Abstract interface for MCP server communication
 """
+import asyncio
 import json
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, Optional, Protocol
 from dataclasses import dataclass
 
+# Read size for streamed responses
+STREAM_CHUNK = 64 * 1024
+
 
 @dataclass
 class TransportConfig:
@@ -13,6 +17,22 @@ class TransportConfig:
     timeout: float = 30.0
 
 
+class OutputFilter(Protocol):
+    """Streaming filter applied to a response body while it is read"""
+
+    def feed(self, chunk: bytes) -> bytes: ...
+
+    def close(self) -> bytes: ...
+
+
+def apply_filter(response: dict, output_filter: Optional[OutputFilter]) -> dict:
+    """Run a complete response through an output filter, as if it had streamed"""
+    if output_filter is None:
+        return response
+    raw = json.dumps(response).encode()
+    return json.loads(output_filter.feed(raw) + output_filter.close())
+
+
 class Transport(ABC):
     """
     Abstract base class for MCP transport implementations.
@@ -30,14 +50,17 @@ class Transport(ABC):
         """
         self.config = config
         self.timeout = config.get("timeout", 30.0)
+        self.inflight = 0  # calls currently using this transport (for draining)
+        self.pids: set[int] = set()  # live subprocesses (for resource accounting)
 
     @abstractmethod
-    async def send_request(self, request: dict) -> dict:
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
         """
         Send a JSON-RPC request to the MCP server.
 
         Args:
             request: JSON-RPC request dict with method, params, id
+            output_filter: Applied to the raw response before it is parsed
 
         Returns:
             JSON-RPC response dict
@@ -57,6 +80,27 @@ class Transport(ABC):
         """
         pass
 
+    async def close(self):
+        """
+        Release any resources held by the transport.
+
+        Called when a transport is retired after a config reload.
+        Subprocess-per-request transports hold nothing between calls.
+        """
+        pass
+
+    def is_routable(self, name: str) -> bool:
+        """
+        Whether a call to this tool should be attempted at all.
+
+        Args:
+            name: Tool name (without server prefix)
+
+        Returns:
+            False to reject the call without contacting the server
+        """
+        return True
+
     async def get_tools(self) -> list[dict]:
         """
         Convenience method to get tools from MCP server.
@@ -72,13 +116,19 @@ class Transport(ABC):
         response = await self.send_request(request)
         return response.get("result", {}).get("tools", [])
 
-    async def call_tool(self, name: str, arguments: dict) -> Any:
+    async def call_tool(
+        self,
+        name: str,
+        arguments: dict,
+        output_filter: Optional[OutputFilter] = None
+    ) -> Any:
         """
         Convenience method to call a tool on the MCP server.
 
         Args:
             name: Tool name (without server prefix)
             arguments: Tool arguments
+            output_filter: Applied to the raw response before it is parsed
 
         Returns:
             Tool result
@@ -92,7 +142,7 @@ class Transport(ABC):
                 "arguments": arguments
             }
         }
-        response = await self.send_request(request)
+        response = await self.send_request(request, output_filter)
 
         if "error" in response:
             raise TransportError(
@@ -101,6 +151,52 @@ class Transport(ABC):
 
         return response.get("result")
 
+    async def _communicate(
+        self,
+        proc: asyncio.subprocess.Process,
+        input_bytes: bytes,
+        output_filter: Optional[OutputFilter] = None
+    ) -> tuple[bytes, bytes]:
+        """
+        Write a request to a subprocess and collect stdout and stderr.
+
+        Without a filter this is ``proc.communicate()``. With one, stdout is
+        read in chunks and only what the filter keeps is buffered.
+        """
+        self.pids.add(proc.pid)
+        try:
+            return await self._collect(proc, input_bytes, output_filter)
+        finally:
+            self.pids.discard(proc.pid)
+
+    async def _collect(
+        self,
+        proc: asyncio.subprocess.Process,
+        input_bytes: bytes,
+        output_filter: Optional[OutputFilter]
+    ) -> tuple[bytes, bytes]:
+        if output_filter is None:
+            return await proc.communicate(input_bytes)
+
+        async def write_stdin():
+            try:
+                proc.stdin.write(input_bytes)
+                await proc.stdin.drain()
+                proc.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # exited early; the exit code reports why
+
+        async def read_stdout() -> bytes:
+            kept = bytearray()
+            while chunk := await proc.stdout.read(STREAM_CHUNK):
+                kept += output_filter.feed(chunk)
+            kept += output_filter.close()
+            return bytes(kept)
+
+        _, stdout, stderr = await asyncio.gather(write_stdin(), read_stdout(), proc.stderr.read())
+        await proc.wait()
+        return stdout, stderr
+
 
 class TransportError(Exception):
     """Base exception for transport errors"""
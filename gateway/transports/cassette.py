@@ -0,0 +1,222 @@
+"""
+Cassette Transports - Record upstream traffic and replay it offline
+
+A cassette is a JSONL file of request/response pairs for one server:
+
+    {"method": "tools/call", "params": {...}, "latency_ms": 182.4, "response": {...}}
+    {"method": "tools/call", "params": {...}, "latency_ms": 30000.0, "error": {"class": "TransportTimeoutError", "message": "..."}}
+
+RecordingTransport wraps any transport and appends every exchange.
+ReplayTransport answers from a cassette, optionally sleeping for the
+recorded latency, so real traffic becomes a repeatable offline load test.
+
+Responses are recorded before output filters run; replay applies the
+filter to the recorded response, so truncation and spilling behave as they
+did live. Cassettes contain tool arguments and results verbatim - treat
+them like logs of the upstream's data.
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .base import (
+    OutputFilter, Transport, TransportConnectionError, TransportError, TransportTimeoutError, apply_filter
+)
+
+ERROR_CLASSES = {
+    cls.__name__: cls
+    for cls in (TransportError, TransportConnectionError, TransportTimeoutError)
+}
+
+
+def request_key(method: str, params: Optional[dict]) -> str:
+    """Match key for a request: method plus canonical params"""
+    return f"{method} {json.dumps(params or {}, sort_keys=True, separators=(',', ':'))}"
+
+
+class RecordingTransport(Transport):
+    """
+    Wraps a transport and appends each request/response pair to a cassette.
+
+    Everything else (availability, routing, subprocess pids, federation
+    status) is delegated to the wrapped transport.
+
+    With ``hold``, entries are kept in memory until release() writes them
+    (a raced candidate's handshake is only recorded if it wins).
+    """
+
+    def __init__(self, inner: Transport, cassette: Path, hold: bool = False):
+        super().__init__(inner.config)
+        self.inner = inner
+        self.cassette = cassette
+        self.recorded = 0
+        self._held: Optional[list[str]] = [] if hold else None
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the wrapper
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    @property
+    def pids(self) -> set[int]:
+        return self.inner.pids
+
+    @pids.setter
+    def pids(self, value: set[int]):
+        pass  # the wrapped transport tracks its own subprocesses
+
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
+        entry = {"method": request.get("method"), "params": request.get("params")}
+        started = time.monotonic()
+        try:
+            response = await self.inner.send_request(request)
+        except TransportError as e:
+            entry["latency_ms"] = round((time.monotonic() - started) * 1000, 2)
+            entry["error"] = {"class": type(e).__name__, "message": str(e)}
+            await self._append(entry)
+            raise
+
+        entry["latency_ms"] = round((time.monotonic() - started) * 1000, 2)
+        entry["response"] = response
+        await self._append(entry)
+        return apply_filter(response, output_filter)
+
+    async def _append(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        if self._held is not None:
+            self._held.append(line)
+            return
+        await asyncio.to_thread(self._write, line)
+        self.recorded += 1
+
+    async def release(self):
+        """Write the held entries and record directly from now on"""
+        held, self._held = self._held, None
+        if held:
+            await asyncio.to_thread(self._write, "".join(held))
+            self.recorded += len(held)
+
+    def _write(self, line: str):
+        self.cassette.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cassette, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    async def is_available(self) -> bool:
+        return await self.inner.is_available()
+
+    def is_routable(self, name: str) -> bool:
+        return self.inner.is_routable(name)
+
+    async def close(self):
+        await self.inner.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers from a recorded cassette.
+
+    Requests are matched on method and params. Repeated identical requests
+    cycle through their recordings in order. A tools/call with no exact
+    match falls back to recordings of the same tool, unless ``match`` is
+    ``"exact"``.
+
+    Config schema:
+    {
+        "cassette": "/app/data/cassettes/github.jsonl",
+        "speed": 1.0,
+        "match": "tool"
+    }
+
+    ``speed`` scales the recorded latencies: 1.0 reproduces the original
+    timing, 2.0 replays twice as fast, 0 answers immediately.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        if not config.get("cassette"):
+            raise ValueError("Replay transport requires 'cassette' in config")
+
+        self.cassette = Path(config["cassette"])
+        self.speed = float(config.get("speed", 1.0))
+        self.match = config.get("match", "tool")
+        self.replayed = 0
+
+        self._entries: Optional[dict[str, list[dict]]] = None
+        self._by_tool: dict[str, list[dict]] = {}
+        self._cursors: dict[str, int] = {}
+
+    def _load(self) -> dict[str, list[dict]]:
+        if self._entries is None:
+            entries: dict[str, list[dict]] = {}
+            try:
+                with open(self.cassette, encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        entry = json.loads(line)
+                        entries.setdefault(request_key(entry["method"], entry.get("params")), []).append(entry)
+                        if entry["method"] == "tools/call":
+                            name = (entry.get("params") or {}).get("name")
+                            self._by_tool.setdefault(name, []).append(entry)
+            except FileNotFoundError:
+                raise TransportConnectionError(
+                    f"Cassette not found: {self.cassette}",
+                    {"cassette": str(self.cassette)}
+                )
+            except (json.JSONDecodeError, KeyError) as e:
+                raise TransportError(
+                    f"Invalid cassette {self.cassette}: {e}",
+                    {"cassette": str(self.cassette)}
+                )
+            self._entries = entries
+        return self._entries
+
+    def _next(self, key: str, recordings: list[dict]) -> dict:
+        """Cycle through the recordings for a key"""
+        index = self._cursors.get(key, 0)
+        self._cursors[key] = index + 1
+        return recordings[index % len(recordings)]
+
+    def _lookup(self, request: dict) -> dict:
+        method = request.get("method")
+        params = request.get("params")
+        key = request_key(method, params)
+        entries = self._load()
+
+        if key in entries:
+            return self._next(key, entries[key])
+        if method == "tools/call" and self.match != "exact":
+            name = (params or {}).get("name")
+            if name in self._by_tool:
+                return self._next(f"tool {name}", self._by_tool[name])
+        raise TransportError(
+            f"No recording for {method}"
+            + (f" {params.get('name')}" if method == "tools/call" and params else "")
+            + f" in {self.cassette.name}",
+            {"cassette": str(self.cassette)}
+        )
+
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
+        """
+        Answer a request from the cassette.
+
+        Returns:
+            The recorded JSON-RPC response, with the request's id
+        """
+        entry = self._lookup(request)
+        if self.speed > 0 and entry.get("latency_ms"):
+            await asyncio.sleep(entry["latency_ms"] / 1000.0 / self.speed)
+        self.replayed += 1
+
+        if "error" in entry:
+            error_class = ERROR_CLASSES.get(entry["error"].get("class"), TransportError)
+            raise error_class(entry["error"].get("message", "Recorded error"), {"cassette": str(self.cassette)})
+
+        response = {**entry["response"], "id": request.get("id")}
+        return apply_filter(response, output_filter)
+
+    async def is_available(self) -> bool:
+        return self.cassette.exists()
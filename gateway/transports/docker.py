@@ -4,9 +4,18 @@ Docker Transport - Communicates with MCP servers via docker exec
 import os
 import json
 import asyncio
-from typing import Any
+from typing import Any, AsyncContextManager, Optional, Protocol
 
-from .base import Transport, TransportError, TransportConnectionError, TransportTimeoutError
+from .base import OutputFilter, Transport, TransportError, TransportConnectionError, TransportTimeoutError
+
+# docker exec error for a paused container
+PAUSED_ERROR = "is paused"
+
+
+class ContainerLifecycle(Protocol):
+    """Keeps a container running while requests use it (see containers.py)"""
+
+    def in_use(self, container: str, force_unpause: bool = False) -> AsyncContextManager[None]: ...
 
 
 class DockerTransport(Transport):
@@ -20,8 +29,14 @@ class DockerTransport(Transport):
         "env": {"VAR": "value"},
         "timeout": 30.0
     }
+
+    When ``lifecycle`` is set, every request runs inside
+    ``lifecycle.in_use(container)`` so a paused container is unpaused first.
     """
 
+    # Set by the gateway when idle containers are paused (BTR_CONTAINER_PAUSE)
+    lifecycle: Optional[ContainerLifecycle] = None
+
     def __init__(self, config: dict):
         super().__init__(config)
         self.container = config.get("container")
@@ -53,16 +68,48 @@ class DockerTransport(Transport):
 
         return cmd
 
-    async def send_request(self, request: dict) -> dict:
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
         """
         Send JSON-RPC request via docker exec.
 
         Args:
             request: JSON-RPC request dict
+            output_filter: Applied to stdout while it is read
 
         Returns:
             JSON-RPC response dict
         """
+        if self.lifecycle is None:
+            return await self._exec_request(request, output_filter)
+
+        try:
+            return await self._lifecycle_request(request, output_filter)
+        except TransportConnectionError as e:
+            if PAUSED_ERROR not in str(e):
+                raise
+        # Paused behind our back (another worker, or by hand): unpause and retry once
+        return await self._lifecycle_request(request, output_filter, force_unpause=True)
+
+    async def _lifecycle_request(
+        self,
+        request: dict,
+        output_filter: Optional[OutputFilter],
+        force_unpause: bool = False
+    ) -> dict:
+        """Send a request with the container held running"""
+        try:
+            async with self.lifecycle.in_use(self.container, force_unpause):
+                return await self._exec_request(request, output_filter)
+        except TransportError:
+            raise
+        except Exception as e:
+            raise TransportConnectionError(
+                f"Cannot unpause container: {e}",
+                {"container": self.container}
+            )
+
+    async def _exec_request(self, request: dict, output_filter: Optional[OutputFilter]) -> dict:
+        """Run one docker exec round trip"""
         cmd = self._build_exec_command()
 
         try:
@@ -76,7 +123,7 @@ class DockerTransport(Transport):
             request_bytes = json.dumps(request).encode() + b"\n"
 
             stdout, stderr = await asyncio.wait_for(
-                proc.communicate(request_bytes),
+                self._communicate(proc, request_bytes, output_filter),
                 timeout=self.timeout
             )
 
@@ -0,0 +1,169 @@
+"""
+Gateway Transport - Mounts another BTR gateway as an upstream MCP server
+"""
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from .base import TransportConnectionError, TransportError, TransportTimeoutError
+from .http import HttpTransport
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayTransport(HttpTransport):
+    """
+    Transport that federates a remote BTR gateway.
+
+    The remote gateway's enabled tools are mounted under this server's
+    name, so a remote ``github__search_code`` mounted as server ``hostb``
+    becomes ``hostb__github__search_code`` locally.
+
+    Catalog sync sends the last ETag as If-None-Match; an unchanged remote
+    answers 304 and nothing is re-parsed. Remote /health is polled on each
+    sync and calls to tools whose remote server is unhealthy are rejected
+    locally instead of making the round trip.
+
+    Config schema:
+    {
+        "url": "http://hostb:8090",
+        "headers": {"Authorization": "Bearer ${TOKEN}"},
+        "timeout": 30.0,
+        "max_connections": 20,
+        "keepalive_expiry": 60.0,
+        "uds": "/run/btr/hostb.sock"
+    }
+
+    ``uds`` reaches a gateway on the same host through its unix socket
+    listener (``BTR_UDS``).
+    """
+
+    def __init__(self, config: dict):
+        base_url = config.get("url", "").rstrip("/")
+        if base_url.endswith("/mcp"):
+            base_url = base_url[:-len("/mcp")]
+        super().__init__({**config, "url": f"{base_url}/mcp" if base_url else ""})
+
+        self.base_url = base_url
+        self.max_connections = config.get("max_connections", 20)
+        self.keepalive_expiry = config.get("keepalive_expiry", 60.0)
+
+        self.etag: Optional[str] = None
+        self._tools: list[dict] = []
+        self.remote_status: Optional[str] = None
+        self.remote_servers: dict[str, dict] = {}
+        self.last_sync: Optional[float] = None
+
+    async def _get_client(self) -> "httpx.AsyncClient":
+        """Get or create the pooled keep-alive client"""
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry
+            )
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                headers=self.headers,
+                limits=limits,
+                transport=self._client_transport(limits=limits)
+            )
+        return self._client
+
+    async def refresh_health(self) -> bool:
+        """
+        Fetch the remote gateway's /health.
+
+        Returns:
+            True if the remote answered and is not unhealthy
+        """
+        client = await self._get_client()
+        try:
+            response = await client.get(f"{self.base_url}/health", timeout=5.0)
+            data = response.json()
+        except (httpx.HTTPError, ValueError):
+            self.remote_status = "unreachable"
+            self.remote_servers = {}
+            return False
+
+        self.remote_status = data.get("status", "unknown")
+        self.remote_servers = data.get("servers", {})
+        return response.status_code < 500 and self.remote_status != "unhealthy"
+
+    async def is_available(self) -> bool:
+        """Check the remote gateway is reachable and not unhealthy"""
+        return await self.refresh_health()
+
+    async def get_tools(self) -> list[dict]:
+        """Fetch the remote tools/list, or reuse the cached list on 304"""
+        tools, _ = await self.sync_tools()
+        return tools
+
+    async def sync_tools(self) -> tuple[list[dict], bool]:
+        """
+        Conditionally re-fetch the remote catalog.
+
+        Returns:
+            (tools, changed) - changed is False when the remote answered 304
+        """
+        client = await self._get_client()
+        headers = {"Content-Type": "application/json"}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+
+        try:
+            response = await client.post(
+                self.url,
+                json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                headers=headers
+            )
+        except httpx.TimeoutException:
+            raise TransportTimeoutError(
+                f"Request timed out after {self.timeout}s",
+                {"url": self.url}
+            )
+        except httpx.HTTPError as e:
+            raise TransportConnectionError(
+                f"Failed to connect to {self.url}: {e}",
+                {"url": self.url}
+            )
+
+        self.last_sync = time.time()
+        if response.status_code == 304:
+            return self._tools, False
+        if response.status_code >= 400:
+            raise TransportConnectionError(
+                f"HTTP error {response.status_code}: {response.text}",
+                {"url": self.url, "status": response.status_code}
+            )
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise TransportError(f"Invalid JSON response: {e}", {"url": self.url})
+
+        self._tools = data.get("result", {}).get("tools", [])
+        self.etag = response.headers.get("ETag")
+        return self._tools, True
+
+    def is_routable(self, name: str) -> bool:
+        """Reject calls whose remote server reports unhealthy"""
+        if self.remote_status == "unreachable":
+            return False
+        remote_server = name.split("__", 1)[0]
+        status = self.remote_servers.get(remote_server)
+        return status is None or status.get("healthy", True)
+
+    def status(self) -> dict:
+        """Federation details for server status"""
+        return {
+            "remote_url": self.base_url,
+            "remote_status": self.remote_status,
+            "remote_servers": {
+                name: bool(info.get("healthy")) for name, info in self.remote_servers.items()
+            },
+            "etag": self.etag,
+            "last_sync": self.last_sync
+        }
@@ -11,7 +11,7 @@ try:
 except ImportError:
     HTTPX_AVAILABLE = False
 
-from .base import Transport, TransportError, TransportConnectionError, TransportTimeoutError
+from .base import STREAM_CHUNK, OutputFilter, Transport, TransportError, TransportConnectionError, TransportTimeoutError
 
 
 class HttpTransport(Transport):
@@ -22,8 +22,12 @@ class HttpTransport(Transport):
     {
         "url": "http://localhost:3000/mcp",
         "headers": {"Authorization": "Bearer ${TOKEN}"},
+        "uds": "/run/mcp/server.sock",
         "timeout": 30.0
     }
+
+    With ``uds`` the requests go over that unix socket; the url's host is
+    only used for the Host header.
     """
 
     def __init__(self, config: dict):
@@ -36,6 +40,7 @@ class HttpTransport(Transport):
         super().__init__(config)
         self.url = config.get("url")
         self.headers = self._expand_headers(config.get("headers", {}))
+        self.uds = config.get("uds")
 
         if not self.url:
             raise ValueError("HTTP transport requires 'url' in config")
@@ -57,21 +62,29 @@ class HttpTransport(Transport):
             expanded[key] = value
         return expanded
 
+    def _client_transport(self, **kwargs) -> Optional["httpx.AsyncHTTPTransport"]:
+        """Connection pool over the unix socket, if one is configured"""
+        if not self.uds:
+            return None
+        return httpx.AsyncHTTPTransport(uds=self.uds, **kwargs)
+
     async def _get_client(self) -> "httpx.AsyncClient":
         """Get or create HTTP client"""
         if self._client is None:
             self._client = httpx.AsyncClient(
                 timeout=httpx.Timeout(self.timeout),
-                headers=self.headers
+                headers=self.headers,
+                transport=self._client_transport()
             )
         return self._client
 
-    async def send_request(self, request: dict) -> dict:
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
         """
         Send JSON-RPC request via HTTP POST.
 
         Args:
             request: JSON-RPC request dict
+            output_filter: Applied to the response body while it streams
 
         Returns:
             JSON-RPC response dict
@@ -79,19 +92,29 @@ class HttpTransport(Transport):
         client = await self._get_client()
 
         try:
-            response = await client.post(
+            if output_filter is None:
+                response = await client.post(
+                    self.url,
+                    json=request,
+                    headers={"Content-Type": "application/json"}
+                )
+                self._raise_for_status(response)
+                return response.json()
+
+            async with client.stream(
+                "POST",
                 self.url,
                 json=request,
                 headers={"Content-Type": "application/json"}
-            )
-
-            if response.status_code >= 400:
-                raise TransportConnectionError(
-                    f"HTTP error {response.status_code}: {response.text}",
-                    {"url": self.url, "status": response.status_code}
-                )
-
-            return response.json()
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self._raise_for_status(response)
+                body = bytearray()
+                async for chunk in response.aiter_bytes(STREAM_CHUNK):
+                    body += output_filter.feed(chunk)
+                body += output_filter.close()
+            return json.loads(body)
 
         except httpx.TimeoutException:
             raise TransportTimeoutError(
@@ -109,6 +132,13 @@ class HttpTransport(Transport):
                 {"url": self.url}
             )
 
+    def _raise_for_status(self, response: "httpx.Response"):
+        if response.status_code >= 400:
+            raise TransportConnectionError(
+                f"HTTP error {response.status_code}: {response.text}",
+                {"url": self.url, "status": response.status_code}
+            )
+
     async def is_available(self) -> bool:
         """Check if the HTTP endpoint is reachable"""
         try:
@@ -0,0 +1,350 @@
+"""
+In-process Transport - Calls a Python MCP server's handlers directly
+
+For trusted first-party Python servers, the stdio transport's interpreter
+start and JSON-over-pipe round trip dominate the cost of a call. This
+transport imports the server once and calls it without any of that:
+
+    thread   imported into the gateway. Async handlers are awaited on the
+             event loop; plain functions run in a thread pool so a slow
+             handler does not stall other requests.
+    process  imported once into each worker of a process pool, so a crash
+             or a leak stays out of the gateway. Requests and results are
+             pickled, which is still far cheaper than spawning a process.
+
+The entry point (``module:object``) is either:
+
+    - a JSON-RPC handler: ``handle(request: dict) -> dict``, sync or async
+    - a server object with ``list_tools()`` and ``call_tool(name, arguments)``
+      (sync or async), such as an MCP SDK ``FastMCP`` instance. Pydantic
+      results are dumped to plain JSON.
+
+Handlers run with the gateway's privileges - only configure code you trust.
+"""
+import asyncio
+import functools
+import importlib
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Optional
+
+from .base import OutputFilter, Transport, TransportConnectionError, TransportError, TransportTimeoutError, apply_filter
+
+logger = logging.getLogger(__name__)
+
+POOLS = ("thread", "process")
+
+
+def load_entry_point(entry_point: str, sys_path: list[str]) -> Any:
+    """
+    Import ``module:object`` (the object may be a dotted attribute path).
+
+    Args:
+        entry_point: e.g. ``"perplexity_mcp.server:mcp"``
+        sys_path: Directories to add to sys.path first
+    """
+    module_name, _, attribute = entry_point.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Entry point must look like 'module:object', got {entry_point!r}")
+
+    # Appended, so a server directory can never shadow the gateway's own modules
+    for path in sys_path:
+        if path not in sys.path:
+            sys.path.append(path)
+
+    target = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def is_async(fn: Any) -> bool:
+    """Whether calling fn returns a coroutine (functions and objects with async __call__)"""
+    return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None))
+
+
+def to_jsonable(value: Any) -> Any:
+    """Dump pydantic models (MCP SDK types) to plain JSON values"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", by_alias=True, exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    return value
+
+
+def tool_result(value: Any) -> dict:
+    """Normalise what a server's call_tool returned to a tools/call result"""
+    # FastMCP with structured output returns (content, structured)
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], dict):
+        return {"content": to_jsonable(value[0]), "structuredContent": value[1]}
+    value = to_jsonable(value)
+    if isinstance(value, dict) and "content" in value:
+        return value
+    if isinstance(value, list):
+        return {"content": value}
+    text = value if isinstance(value, str) else json.dumps(value)
+    return {"content": [{"type": "text", "text": text}]}
+
+
+Call = Callable[..., Awaitable[Any]]
+
+
+async def call_direct(fn: Callable, *args) -> Any:
+    """Call a handler in the current thread, awaiting it if it is async"""
+    result = fn(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def dispatch(server: Any, request: dict, call: Call) -> dict:
+    """
+    Answer one JSON-RPC request from a loaded server.
+
+    Args:
+        server: The loaded entry point
+        request: JSON-RPC request
+        call: How to invoke a handler (directly, or via a thread pool)
+
+    Returns:
+        JSON-RPC response; a handler exception becomes a -32603 error
+    """
+    request_id = request.get("id")
+    method = request.get("method")
+    params = request.get("params") or {}
+    try:
+        if not (hasattr(server, "list_tools") and hasattr(server, "call_tool")):
+            return await call(server, request)
+
+        if method == "tools/list":
+            tools = to_jsonable(await call(server.list_tools))
+            result = tools if isinstance(tools, dict) else {"tools": tools}
+        elif method == "tools/call":
+            result = tool_result(await call(server.call_tool, params.get("name"), params.get("arguments") or {}))
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32601, "message": f"Method not found: {method}"}
+            }
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+    except Exception as e:
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": -32603, "message": f"{type(e).__name__}: {e}"}
+        }
+
+
+# Process pool workers: the server is loaded once per worker by the initializer
+_worker_server: Any = None
+_worker_error: Optional[str] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker(entry_point: str, sys_path: list[str], env: dict):
+    global _worker_server, _worker_error, _worker_loop
+    os.environ.update(env)
+    _worker_loop = asyncio.new_event_loop()
+    try:
+        _worker_server = load_entry_point(entry_point, sys_path)
+    except Exception as e:
+        # Raising here would only surface as an opaque BrokenProcessPool
+        _worker_error = f"Cannot load {entry_point}: {type(e).__name__}: {e}"
+
+
+def _worker_ping() -> Optional[str]:
+    """The load error of this worker, if any"""
+    return _worker_error
+
+
+def _worker_handle(request: dict) -> dict:
+    if _worker_error is not None:
+        raise RuntimeError(_worker_error)
+    return _worker_loop.run_until_complete(dispatch(_worker_server, request, call_direct))
+
+
+class InProcTransport(Transport):
+    """
+    Transport that calls a Python MCP server without a subprocess per request.
+
+    Config schema:
+    {
+        "entry_point": "perplexity_mcp.server:mcp",
+        "sys_path": ["/app/servers/perplexity/src"],
+        "pool": "thread",
+        "workers": 4,
+        "env": {"PERPLEXITY_API_KEY": "${PERPLEXITY_API_KEY}"},
+        "timeout": 30.0
+    }
+
+    ``env`` is only applied with ``"pool": "process"``; in thread mode the
+    server shares the gateway's environment. A timed-out call is abandoned,
+    not interrupted: its thread or worker stays busy until the handler
+    returns.
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.entry_point = config.get("entry_point", "")
+        self.sys_path = list(config.get("sys_path", []))
+        self.pool = config.get("pool", "thread")
+        self.workers = int(config.get("workers", 4))
+        self.env = config.get("env", {})
+
+        if ":" not in self.entry_point:
+            raise ValueError("In-process transport requires 'entry_point' (module:object) in config")
+        if self.pool not in POOLS:
+            raise ValueError(f"In-process transport 'pool' must be one of {POOLS}, got {self.pool!r}")
+
+        self._server: Any = None
+        self._executor: Optional[Executor] = None
+
+    @property
+    def pids(self) -> set[int]:
+        """Process pool workers (thread mode runs inside the gateway)"""
+        if isinstance(self._executor, ProcessPoolExecutor):
+            # No public API lists a pool's workers
+            return set(getattr(self._executor, "_processes", None) or ())
+        return set()
+
+    @pids.setter
+    def pids(self, value: set[int]):
+        pass  # derived from the pool
+
+    def _build_env(self) -> dict:
+        """Expand ${VAR} and ${VAR:-default} in the configured env"""
+        env = {}
+        for key, value in self.env.items():
+            if isinstance(value, str) and value.startswith("${") and value.endswith("}"):
+                env_name = value[2:-1]
+                if ":-" in env_name:
+                    env_name, default = env_name.split(":-", 1)
+                    value = os.environ.get(env_name, default)
+                else:
+                    value = os.environ.get(env_name, "")
+            env[key] = str(value)
+        return env
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool == "process":
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.entry_point, self.sys_path, self._build_env())
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=f"btr-inproc-{self.entry_point.partition(':')[0]}"
+                )
+        return self._executor
+
+    async def _load(self) -> Any:
+        """Import the entry point into the gateway (thread mode), once"""
+        if self._server is None:
+            try:
+                # Imports can be slow; keep them off the event loop
+                self._server = await asyncio.to_thread(load_entry_point, self.entry_point, self.sys_path)
+            except Exception as e:
+                raise TransportConnectionError(
+                    f"Cannot load {self.entry_point}: {type(e).__name__}: {e}",
+                    {"entry_point": self.entry_point}
+                )
+        return self._server
+
+    async def _call_threaded(self, fn: Callable, *args) -> Any:
+        """Await async handlers on the event loop; run plain ones in the pool"""
+        if is_async(fn):
+            return await fn(*args)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _handle(self, request: dict) -> dict:
+        if self.pool == "thread":
+            return await dispatch(await self._load(), request, self._call_threaded)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), _worker_handle, request)
+        except BrokenProcessPool as e:
+            # A worker died; start a fresh pool on the next call
+            self._executor = None
+            raise TransportConnectionError(
+                f"In-process worker for {self.entry_point} died: {e}",
+                {"entry_point": self.entry_point}
+            )
+        except RuntimeError as e:
+            raise TransportConnectionError(str(e), {"entry_point": self.entry_point})
+
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
+        """
+        Answer a JSON-RPC request by calling the server's handlers.
+
+        Args:
+            request: JSON-RPC request dict
+            output_filter: Applied to the serialized response
+
+        Returns:
+            JSON-RPC response dict
+        """
+        try:
+            response = await asyncio.wait_for(self._handle(request), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise TransportTimeoutError(
+                f"Request timed out after {self.timeout}s",
+                {"entry_point": self.entry_point}
+            )
+
+        if not isinstance(response, dict):
+            raise TransportError(
+                f"Invalid response from {self.entry_point}: expected a dict, got {type(response).__name__}",
+                {"entry_point": self.entry_point}
+            )
+        try:
+            return apply_filter(response, output_filter)
+        except (TypeError, ValueError) as e:
+            raise TransportError(
+                f"Response from {self.entry_point} is not JSON-serializable: {e}",
+                {"entry_point": self.entry_point}
+            )
+
+    async def is_available(self) -> bool:
+        """Check that the entry point imports (in a worker, for the process pool)"""
+        if self.pool == "thread":
+            try:
+                await self._load()
+            except TransportConnectionError as e:
+                logger.warning(str(e))
+                return False
+            return True
+
+        loop = asyncio.get_running_loop()
+        try:
+            error = await loop.run_in_executor(self._get_executor(), _worker_ping)
+        except BrokenProcessPool as e:
+            logger.warning(f"In-process worker for {self.entry_point} died: {e}")
+            self._executor = None
+            return False
+        if error is not None:
+            logger.warning(error)
+        return error is None
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -5,9 +5,9 @@ import os
 import json
 import asyncio
 import shutil
-from typing import Any
+from typing import Any, Optional
 
-from .base import Transport, TransportError, TransportConnectionError, TransportTimeoutError
+from .base import OutputFilter, Transport, TransportError, TransportConnectionError, TransportTimeoutError
 
 
 class StdioTransport(Transport):
@@ -56,12 +56,13 @@ class StdioTransport(Transport):
 
         return env
 
-    async def send_request(self, request: dict) -> dict:
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
         """
         Send JSON-RPC request via subprocess stdin/stdout.
 
         Args:
             request: JSON-RPC request dict
+            output_filter: Applied to stdout while it is read
 
         Returns:
             JSON-RPC response dict
@@ -81,7 +82,7 @@ class StdioTransport(Transport):
             request_bytes = json.dumps(request).encode() + b"\n"
 
             stdout, stderr = await asyncio.wait_for(
-                proc.communicate(request_bytes),
+                self._communicate(proc, request_bytes, output_filter),
                 timeout=self.timeout
             )
 
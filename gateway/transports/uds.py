@@ -0,0 +1,215 @@
+"""
+Unix Socket Transport - Communicates with MCP servers listening on a unix socket
+"""
+import asyncio
+import json
+import os
+import stat
+import time
+from typing import Optional
+
+from .base import STREAM_CHUNK, OutputFilter, Transport, TransportError, TransportConnectionError, TransportTimeoutError
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class UdsTransport(Transport):
+    """
+    Transport for MCP servers that serve newline-delimited JSON-RPC on a
+    unix socket (the stdio framing, without a process per request).
+
+    Connections are kept open and reused; each carries one request at a
+    time, so up to ``max_connections`` requests run concurrently and the
+    rest wait for a free connection. A connection is dropped when a request
+    on it fails or times out, so a late response can never be read as the
+    answer to the next request. Connections idle for longer than
+    ``keepalive_expiry`` seconds are closed instead of reused.
+
+    For HTTP MCP servers on a unix socket, use the http transport with
+    ``"uds"`` instead.
+
+    Config schema:
+    {
+        "socket": "/run/mcp/github.sock",
+        "max_connections": 8,
+        "keepalive_expiry": 60.0,
+        "timeout": 30.0
+    }
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.socket_path = config.get("socket", "")
+        self.max_connections = config.get("max_connections", 8)
+        self.keepalive_expiry = config.get("keepalive_expiry", 60.0)
+
+        if not self.socket_path:
+            raise ValueError("Unix socket transport requires 'socket' in config")
+
+        self._idle: list[tuple[float, Connection]] = []  # (idle since, connection)
+        self._slots = asyncio.Semaphore(self.max_connections)
+        self.opened = 0
+        self.reused = 0
+
+    async def _connect(self) -> Connection:
+        try:
+            connection = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise TransportTimeoutError(
+                f"Connecting to {self.socket_path} timed out after {self.timeout}s",
+                {"socket": self.socket_path}
+            )
+        except OSError as e:
+            raise TransportConnectionError(
+                f"Failed to connect to {self.socket_path}: {e}",
+                {"socket": self.socket_path}
+            )
+        self.opened += 1
+        return connection
+
+    def _take_idle(self) -> Optional[Connection]:
+        """Most recently used idle connection that is still open"""
+        now = time.monotonic()
+        while self._idle:
+            idle_since, (reader, writer) = self._idle.pop()
+            if now - idle_since <= self.keepalive_expiry and not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return None
+
+    async def _exchange(
+        self,
+        connection: Connection,
+        request_bytes: bytes,
+        output_filter: Optional[OutputFilter]
+    ) -> tuple[bytes, bool]:
+        """
+        Write one request line and read one response line.
+
+        Returns:
+            (response body, whether the connection can be reused)
+        """
+        reader, writer = connection
+        writer.write(request_bytes)
+        await writer.drain()
+
+        kept = bytearray()
+        received = False
+        try:
+            while True:
+                chunk = await reader.read(STREAM_CHUNK)
+                if not chunk:
+                    raise ConnectionResetError("connection closed before a complete response")
+                received = True
+                end = chunk.find(b"\n")
+                part = chunk if end < 0 else chunk[:end]
+                kept += output_filter.feed(part) if output_filter is not None else part
+                if end >= 0:
+                    if output_filter is not None:
+                        kept += output_filter.close()
+                    # Anything after the newline was not asked for; do not trust the stream
+                    return bytes(kept), end == len(chunk) - 1
+        except OSError as e:
+            if not received:
+                raise  # nothing was read (or fed to the filter): safe to retry
+            raise TransportConnectionError(
+                f"Connection to {self.socket_path} lost mid-response: {e}",
+                {"socket": self.socket_path}
+            )
+
+    async def send_request(self, request: dict, output_filter: Optional[OutputFilter] = None) -> dict:
+        """
+        Send a JSON-RPC request over a pooled socket connection.
+
+        Args:
+            request: JSON-RPC request dict
+            output_filter: Applied to the response line while it is read
+
+        Returns:
+            JSON-RPC response dict
+        """
+        request_bytes = json.dumps(request).encode() + b"\n"
+
+        async with self._slots:
+            connection = self._take_idle()
+            reused = connection is not None
+            if connection is None:
+                connection = await self._connect()
+
+            reusable = False
+            try:
+                try:
+                    body, reusable = await asyncio.wait_for(
+                        self._exchange(connection, request_bytes, output_filter),
+                        timeout=self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise
+                except OSError:
+                    if not reused:
+                        raise
+                    # The server closed the idle connection before answering; retry once on a fresh one
+                    connection[1].close()
+                    connection = await self._connect()
+                    body, reusable = await asyncio.wait_for(
+                        self._exchange(connection, request_bytes, output_filter),
+                        timeout=self.timeout
+                    )
+            except asyncio.TimeoutError:
+                raise TransportTimeoutError(
+                    f"Request timed out after {self.timeout}s",
+                    {"socket": self.socket_path}
+                )
+            except OSError as e:
+                raise TransportConnectionError(
+                    f"Connection to {self.socket_path} failed: {e}",
+                    {"socket": self.socket_path}
+                )
+            finally:
+                if reusable:
+                    self._idle.append((time.monotonic(), connection))
+                else:
+                    connection[1].close()
+
+        if reused:
+            self.reused += 1
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError as e:
+            raise TransportError(
+                f"Invalid JSON response: {e}",
+                {"socket": self.socket_path, "raw": body[:1000].decode(errors="replace")}
+            )
+
+    def pool_status(self) -> dict:
+        """Connection reuse counters for /api/status"""
+        return {
+            "socket": self.socket_path,
+            "idle": len(self._idle),
+            "opened": self.opened,
+            "reused": self.reused,
+            "max_connections": self.max_connections
+        }
+
+    async def is_available(self) -> bool:
+        """Check that the socket exists and accepts a connection (kept for reuse)"""
+        try:
+            if not stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+                return False
+        except OSError:
+            return False
+        try:
+            connection = await self._connect()
+        except TransportError:
+            return False
+        self._idle.append((time.monotonic(), connection))
+        return True
+
+    async def close(self):
+        """Close idle connections"""
+        while self._idle:
+            _, (_, writer) = self._idle.pop()
+            writer.close()
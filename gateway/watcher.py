@@ -0,0 +1,113 @@
+"""
+BTR Config Watcher - Hot reload of servers/ and presets/
+Polls file mtimes so it works on read-only bind mounts without inotify
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Union
+
+from config import settings
+from router import ToolRouter
+
+logger = logging.getLogger(__name__)
+
+PresetListener = Callable[[set[Path]], Union[Awaitable[None], None]]
+
+
+def _snapshot(paths: list[Path]) -> dict[Path, int]:
+    """Map each existing path to its mtime in nanoseconds"""
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = path.stat().st_mtime_ns
+        except OSError:
+            continue
+    return mtimes
+
+
+def _diff(old: dict[Path, int], new: dict[Path, int]) -> tuple[set[Path], set[Path]]:
+    """Return (changed or added, removed) paths between two snapshots"""
+    changed = {p for p, mtime in new.items() if old.get(p) != mtime}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+class ConfigWatcher:
+    """
+    Watches settings.servers_dir and settings.presets_dir for changes.
+
+    Server config changes are applied per server through the router, so
+    unaffected servers keep their transports and catalog entries. Preset
+    changes are forwarded to registered listeners.
+    """
+
+    def __init__(self, router: ToolRouter, interval: float = 2.0):
+        self.router = router
+        self.interval = interval
+        self._server_mtimes: dict[Path, int] = {}
+        self._preset_mtimes: dict[Path, int] = {}
+        self._preset_listeners: list[PresetListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on_presets_changed(self, listener: PresetListener):
+        """Register a callback receiving the set of changed preset files"""
+        self._preset_listeners.append(listener)
+
+    def _scan_servers(self) -> dict[Path, int]:
+        return _snapshot(self.router._scan_config_files())
+
+    def _scan_presets(self) -> dict[Path, int]:
+        if not settings.presets_dir.exists():
+            return {}
+        return _snapshot(list(settings.presets_dir.glob("*.json")))
+
+    def start(self):
+        """Take the baseline snapshot and start polling in the background"""
+        self._server_mtimes = self._scan_servers()
+        self._preset_mtimes = self._scan_presets()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Watching {settings.servers_dir} and {settings.presets_dir} "
+            f"(every {self.interval}s)"
+        )
+
+    async def stop(self):
+        """Stop polling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Config watcher error: {e}")
+
+    async def check(self):
+        """Compare mtimes against the last snapshot and apply any changes"""
+        servers = self._scan_servers()
+        changed, removed = _diff(self._server_mtimes, servers)
+        self._server_mtimes = servers
+
+        for config_file in sorted(removed):
+            await self.router.remove_server_config(config_file)
+        for config_file in sorted(changed):
+            await self.router.reload_server_config(config_file)
+
+        presets = self._scan_presets()
+        changed, removed = _diff(self._preset_mtimes, presets)
+        self._preset_mtimes = presets
+
+        if changed or removed:
+            logger.info(f"Presets changed: {', '.join(sorted(p.stem for p in changed | removed))}")
+            for listener in self._preset_listeners:
+                result = listener(changed | removed)
+                if asyncio.iscoroutine(result):
+                    await result
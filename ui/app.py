@@ -3,29 +3,81 @@ BTR Tool Selector UI
 Flask-based web interface for managing MCP tool selection
 """
 import os
-import json
 import requests
-from flask import Flask, render_template, jsonify, request
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 
 app = Flask(__name__)
 
 # Gateway API URL - configurable via environment
 GATEWAY_URL = os.getenv("BTR_GATEWAY_URL", "http://gateway:8090")
 
+# One keep-alive connection pool to the gateway, shared by all request threads
+POOL_SIZE = int(os.getenv("BTR_UI_POOL_SIZE", 32))
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+
+# Request headers passed through to the gateway
+FORWARD_HEADERS = ("Content-Type", "Accept", "Accept-Encoding", "If-None-Match")
+
+# Response headers that describe the proxy hop rather than the body
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade"
+}
+
 
 def gateway_request(method: str, endpoint: str, data: dict = None) -> dict:
-    """Make a request to the BTR Gateway API"""
+    """Make a request to the BTR Gateway API and decode the JSON answer"""
     url = f"{GATEWAY_URL}{endpoint}"
     try:
-        if method == "GET":
-            response = requests.get(url, timeout=10)
-        else:
-            response = requests.post(url, json=data, timeout=10)
+        response = session.request(method, url, json=data, timeout=10)
         return response.json()
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         return {"success": False, "error": str(e)}
 
 
+def proxy(endpoint: str, read_timeout: float = 10) -> Response:
+    """
+    Relay the current request to the gateway.
+
+    Bodies are passed through as raw bytes in both directions (still
+    compressed if the gateway compressed them), so nothing is decoded and
+    re-encoded here.
+
+    Args:
+        endpoint: Gateway path
+        read_timeout: Seconds to wait between bytes (None for event streams)
+    """
+    headers = {name: request.headers[name] for name in FORWARD_HEADERS if name in request.headers}
+    headers.setdefault("Accept-Encoding", "identity")
+    try:
+        upstream = session.request(
+            request.method,
+            f"{GATEWAY_URL}{endpoint}",
+            params=request.args,
+            data=request.get_data(),
+            headers=headers,
+            stream=True,
+            timeout=(5, read_timeout)
+        )
+    except requests.RequestException as e:
+        return jsonify({"success": False, "error": str(e)}), 502
+
+    def relay():
+        try:
+            yield from upstream.raw.stream(64 * 1024, decode_content=False)
+        finally:
+            upstream.close()
+
+    return Response(
+        stream_with_context(relay()),
+        status=upstream.status_code,
+        headers=[(k, v) for k, v in upstream.headers.items() if k.lower() not in HOP_BY_HOP]
+    )
+
+
 # =============================================================================
 # Web UI Routes
 # =============================================================================
@@ -43,54 +95,57 @@ def index():
 @app.route("/api/tools")
 def get_tools():
     """Get all available tools"""
-    return jsonify(gateway_request("GET", "/api/tools"))
+    return proxy("/api/tools")
+
+
+@app.route("/api/current", methods=["GET", "PATCH"])
+def current():
+    """Get enabled tools, or enable/disable tools by delta"""
+    return proxy("/api/current")
 
 
-@app.route("/api/current")
-def get_current():
-    """Get currently enabled tools"""
-    return jsonify(gateway_request("GET", "/api/current"))
+@app.route("/api/events")
+def events():
+    """Stream state change events from the gateway"""
+    response = proxy("/api/events", read_timeout=None)
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @app.route("/api/update", methods=["POST"])
 def update_tools():
     """Update enabled tools"""
-    data = request.get_json()
-    return jsonify(gateway_request("POST", "/api/update", data))
+    return proxy("/api/update")
 
 
 @app.route("/api/tools/enable", methods=["POST"])
 def enable_tool():
     """Enable a specific tool"""
-    data = request.get_json()
-    return jsonify(gateway_request("POST", "/api/tools/enable", data))
+    return proxy("/api/tools/enable")
 
 
 @app.route("/api/tools/disable", methods=["POST"])
 def disable_tool():
     """Disable a specific tool"""
-    data = request.get_json()
-    return jsonify(gateway_request("POST", "/api/tools/disable", data))
+    return proxy("/api/tools/disable")
 
 
 @app.route("/api/tools/toggle", methods=["POST"])
 def toggle_tool():
     """Toggle a tool's enabled state"""
-    data = request.get_json()
-    return jsonify(gateway_request("POST", "/api/tools/toggle", data))
+    return proxy("/api/tools/toggle")
 
 
 @app.route("/api/presets")
 def list_presets():
     """List available presets"""
-    return jsonify(gateway_request("GET", "/api/presets"))
+    return proxy("/api/presets")
 
 
 @app.route("/api/presets/load", methods=["POST"])
 def load_preset():
     """Load a preset"""
-    data = request.get_json()
-    return jsonify(gateway_request("POST", "/api/presets/load", data))
+    return proxy("/api/presets/load")
 
 
 @app.route("/health")
@@ -3,11 +3,24 @@
  */
 
 // State
-let allTools = {};
-let enabledTools = new Set();
+let rows = [];            // loaded tools for the current filters, sorted by name
+let rowIndex = {};        // tool name -> index in rows
+let servers = {};         // server -> {total, enabled}
+let nextCursor = null;    // cursor for the next /api/tools page, null when done
+let pageRequest = null;   // in-flight page fetch
+let listGeneration = 0;   // bumped when filters change; stale pages are dropped
+let totalTools = 0;
+let stateVersion = 0;     // enabled-set version the UI reflects
+let catalogVersion = 0;
+let eventsConnected = false;
 
 // DOM Elements
 const toolsContainer = document.getElementById('tools-container');
+const toolsSpacer = document.getElementById('tools-spacer');
+const serverList = document.getElementById('server-list');
+const searchInput = document.getElementById('tool-search');
+const serverFilter = document.getElementById('server-filter');
+const enabledFilter = document.getElementById('enabled-filter');
 const enabledCount = document.getElementById('enabled-count');
 const totalCount = document.getElementById('total-count');
 const budgetStatus = document.getElementById('budget-status');
@@ -18,6 +31,11 @@ const presetSelect = document.getElementById('preset-select');
 const BUDGET_OK = 30;
 const BUDGET_WARNING = 40;
 
+// Virtual list: fixed row height, rows rendered beyond the viewport, page size
+const ROW_HEIGHT = 62;
+const OVERSCAN = 10;
+const PAGE_SIZE = 200;
+
 /**
  * Initialize the application
  */
@@ -31,31 +49,147 @@ async function init() {
     document.getElementById('load-preset-btn').addEventListener('click', loadSelectedPreset);
     document.getElementById('select-none-btn').addEventListener('click', disableAll);
     document.getElementById('refresh-btn').addEventListener('click', loadTools);
+
+    let searchTimer = null;
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(loadTools, 200);
+    });
+    serverFilter.addEventListener('change', loadTools);
+    enabledFilter.addEventListener('change', loadTools);
+
+    let framePending = false;
+    toolsContainer.addEventListener('scroll', () => {
+        if (framePending) return;
+        framePending = true;
+        requestAnimationFrame(() => {
+            framePending = false;
+            renderTools();
+        });
+    });
+
+    subscribeEvents();
 }
 
 /**
- * Load all tools from the API
+ * Follow gateway state changes over server-sent events
  */
-async function loadTools() {
-    toolsContainer.innerHTML = '<p class="loading">Loading tools...</p>';
+function subscribeEvents() {
+    const source = new EventSource('/api/events');
+
+    // Sent on every (re)connect: re-fetch if we missed anything meanwhile
+    source.addEventListener('hello', event => {
+        const data = JSON.parse(event.data);
+        eventsConnected = true;
+        if (data.version !== stateVersion || data.catalog_version !== catalogVersion) {
+            loadTools();
+        }
+    });
 
-    try {
-        const response = await fetch('/api/tools');
-        const data = await response.json();
+    source.addEventListener('state', event => {
+        applyDelta(JSON.parse(event.data));
+    });
 
-        if (!data.success) {
-            throw new Error(data.error || 'Failed to load tools');
+    source.addEventListener('catalog', event => {
+        const data = JSON.parse(event.data);
+        if (data.catalog_version !== catalogVersion) {
+            loadTools();
         }
+    });
+
+    source.addEventListener('resync', () => loadTools());
+
+    source.onerror = () => {
+        // EventSource reconnects on its own
+        eventsConnected = false;
+    };
+}
 
-        allTools = data.servers;
+/**
+ * Build an /api/tools query for the current filters
+ */
+function toolsQuery(cursor) {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    if (searchInput.value.trim()) params.set('q', searchInput.value.trim());
+    if (serverFilter.value) params.set('server', serverFilter.value);
+    if (enabledFilter.value) params.set('enabled', enabledFilter.value);
+    return `/api/tools?${params}`;
+}
+
+/**
+ * Fetch one page of tools
+ */
+async function fetchToolsPage(url) {
+    const response = await fetch(url);
+    const data = await response.json();
+
+    if (!data.success) {
+        throw new Error(data.error || 'Failed to load tools');
+    }
+    return data;
+}
+
+/**
+ * (Re)load the tool list from the first page for the current filters
+ */
+async function loadTools() {
+    const generation = ++listGeneration;
+    pageRequest = null;
+    rows = [];
+    rowIndex = {};
+    nextCursor = null;
+    toolsContainer.scrollTop = 0;
+    renderTools('Loading tools...');
+
+    try {
+        const data = await fetchToolsPage(toolsQuery(null));
+        if (generation !== listGeneration) return;
+
+        totalTools = data.total;
+        stateVersion = data.version;
+        catalogVersion = data.catalog_version;
+        servers = data.servers;
+        appendRows(data);
         updateStats(data.enabled_count, data.total);
+        renderServers();
         renderTools();
 
     } catch (error) {
-        toolsContainer.innerHTML = `<p class="loading">Error: ${error.message}</p>`;
+        renderTools(`Error: ${error.message}`);
     }
 }
 
+/**
+ * Fetch the next page when the user scrolls near the end of what is loaded
+ */
+function loadMore() {
+    if (!nextCursor || pageRequest) return;
+
+    const generation = listGeneration;
+    pageRequest = fetchToolsPage(toolsQuery(nextCursor))
+        .then(data => {
+            if (generation !== listGeneration) return;
+            appendRows(data);
+            renderTools();
+        })
+        .catch(error => console.error('Failed to load more tools:', error))
+        .finally(() => {
+            if (generation === listGeneration) pageRequest = null;
+        });
+}
+
+/**
+ * Add a page of tools to the loaded rows
+ */
+function appendRows(data) {
+    data.tools.forEach(tool => {
+        rowIndex[tool.name] = rows.length;
+        rows.push(tool);
+    });
+    nextCursor = data.next_cursor;
+}
+
 /**
  * Load available presets
  */
@@ -93,7 +227,7 @@ async function loadSelectedPreset() {
         });
 
         const data = await response.json();
-        if (data.success) {
+        if (data.success && !eventsConnected) {
             await loadTools();
         }
     } catch (error) {
@@ -106,79 +240,102 @@ async function loadSelectedPreset() {
  */
 async function disableAll() {
     try {
-        const response = await fetch('/api/update', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ tools: [] })
-        });
-
-        const data = await response.json();
-        if (data.success) {
-            await loadTools();
-        }
+        await patchTools({ remove: ['*'] });
     } catch (error) {
         console.error('Failed to disable all:', error);
     }
 }
 
+/**
+ * Send an enable/disable delta and apply the gateway's answer locally
+ */
+async function patchTools(delta) {
+    const response = await fetch('/api/current', {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(delta)
+    });
+
+    const data = await response.json();
+    if (data.success) {
+        applyDelta(data);
+    }
+    return data;
+}
+
+/**
+ * Apply a state delta ({version, added, removed, count}) to the page
+ */
+function applyDelta(delta) {
+    if (delta.version <= stateVersion) {
+        return; // already applied (our own change echoed back)
+    }
+    stateVersion = delta.version;
+
+    const setEnabled = (name, enabled) => {
+        const i = rowIndex[name];
+        const server = i !== undefined ? rows[i].server : name.split('__')[0];
+        if (i !== undefined) {
+            rows[i].enabled = enabled;
+        }
+        if (servers[server]) {
+            servers[server].enabled += enabled ? 1 : -1;
+            updateServerCount(server);
+        }
+        const checkbox = document.querySelector(`input[data-tool="${name}"]`);
+        if (checkbox) {
+            checkbox.checked = enabled;
+        }
+    };
+    delta.added.forEach(name => setEnabled(name, true));
+    delta.removed.forEach(name => setEnabled(name, false));
+
+    updateStats(delta.count, totalTools);
+}
+
 /**
  * Toggle a specific tool
  */
 async function toggleTool(toolName) {
-    try {
-        const response = await fetch('/api/tools/toggle', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ tool: toolName })
-        });
+    const tool = rows[rowIndex[toolName]];
+    const enable = !(tool && tool.enabled);
 
-        const data = await response.json();
-        if (data.success) {
-            // Update local state and UI
-            const checkbox = document.querySelector(`input[data-tool="${toolName}"]`);
-            if (checkbox) {
-                checkbox.checked = data.enabled;
-            }
-            await loadTools(); // Refresh stats
+    try {
+        const data = await patchTools(enable ? { add: [toolName] } : { remove: [toolName] });
+        if (!data.success) {
+            throw new Error(data.error || data.detail || 'Toggle failed');
         }
     } catch (error) {
         console.error('Failed to toggle tool:', error);
+        const checkbox = document.querySelector(`input[data-tool="${toolName}"]`);
+        if (checkbox) {
+            checkbox.checked = !enable;
+        }
     }
 }
 
 /**
- * Select/deselect all tools in a server
+ * Select/deselect all tools in a server (one atomic change on the gateway)
  */
 async function toggleServer(serverName, enable) {
-    const tools = allTools[serverName] || [];
-    const toolNames = tools.map(t => t.name);
-
-    // Get current enabled tools
-    const currentResponse = await fetch('/api/current');
-    const currentData = await currentResponse.json();
-    let currentTools = new Set(currentData.tools || []);
-
-    if (enable) {
-        toolNames.forEach(t => currentTools.add(t));
-    } else {
-        toolNames.forEach(t => currentTools.delete(t));
-    }
-
     try {
-        const response = await fetch('/api/update', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ tools: Array.from(currentTools) })
-        });
-
-        if ((await response.json()).success) {
-            await loadTools();
-        }
+        await patchTools(enable ? { add_servers: [serverName] } : { remove_servers: [serverName] });
     } catch (error) {
         console.error('Failed to toggle server:', error);
     }
 }
 
+/**
+ * Refresh a server's enabled/total counter
+ */
+function updateServerCount(serverName) {
+    const summary = servers[serverName];
+    const counter = document.querySelector(`.server-count[data-server="${serverName}"]`);
+    if (summary && counter) {
+        counter.textContent = `${summary.enabled}/${summary.total}`;
+    }
+}
+
 /**
  * Update stats display
  */
@@ -200,45 +357,83 @@ function updateStats(enabled, total) {
 }
 
 /**
- * Render all tools grouped by server
+ * Render the server chips and the server filter options
  */
-function renderTools() {
-    toolsContainer.innerHTML = '';
+function renderServers() {
+    const selected = serverFilter.value;
+    serverFilter.innerHTML = '<option value="">All servers</option>';
+    serverList.innerHTML = '';
+
+    for (const [serverName, summary] of Object.entries(servers)) {
+        const option = document.createElement('option');
+        option.value = serverName;
+        option.textContent = serverName;
+        option.selected = serverName === selected;
+        serverFilter.appendChild(option);
+
+        const chip = document.createElement('div');
+        chip.className = 'server-chip';
+        chip.innerHTML = `
+            <span class="server-name" onclick="filterServer('${serverName}')">${serverName}</span>
+            <span class="server-count" data-server="${serverName}">${summary.enabled}/${summary.total}</span>
+            <button class="btn btn-secondary" onclick="toggleServer('${serverName}', true)">All</button>
+            <button class="btn btn-secondary" onclick="toggleServer('${serverName}', false)">None</button>
+        `;
+        serverList.appendChild(chip);
+    }
+}
 
-    for (const [serverName, tools] of Object.entries(allTools)) {
-        const section = document.createElement('div');
-        section.className = 'server-section';
+/**
+ * Show only one server's tools
+ */
+function filterServer(serverName) {
+    serverFilter.value = serverFilter.value === serverName ? '' : serverName;
+    loadTools();
+}
 
-        const enabledInServer = tools.filter(t => t.enabled).length;
+/**
+ * Render the rows currently in view (plus overscan) of the loaded tools
+ */
+function renderTools(message) {
+    toolsContainer.querySelectorAll('.tool-item, .loading').forEach(el => el.remove());
+    toolsSpacer.style.height = `${rows.length * ROW_HEIGHT}px`;
+
+    if (message || rows.length === 0) {
+        const note = document.createElement('p');
+        note.className = 'loading';
+        note.textContent = message || 'No tools match';
+        toolsContainer.appendChild(note);
+        return;
+    }
 
-        section.innerHTML = `
-            <div class="server-header" onclick="this.parentElement.classList.toggle('collapsed')">
-                <h2>
-                    ${serverName}
-                    <span class="server-count">${enabledInServer}/${tools.length}</span>
-                </h2>
-                <div class="server-actions">
-                    <button class="btn btn-secondary" onclick="event.stopPropagation(); toggleServer('${serverName}', true)">All</button>
-                    <button class="btn btn-secondary" onclick="event.stopPropagation(); toggleServer('${serverName}', false)">None</button>
-                </div>
-            </div>
-            <div class="tools-list">
-                ${tools.map(tool => `
-                    <div class="tool-item">
-                        <input type="checkbox"
-                            data-tool="${tool.name}"
-                            ${tool.enabled ? 'checked' : ''}
-                            onchange="toggleTool('${tool.name}')">
-                        <div class="tool-info">
-                            <div class="tool-name">${tool.name}</div>
-                            <div class="tool-description">${tool.description || 'No description'}</div>
-                        </div>
-                    </div>
-                `).join('')}
+    const first = Math.max(0, Math.floor(toolsContainer.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(
+        rows.length,
+        Math.ceil((toolsContainer.scrollTop + toolsContainer.clientHeight) / ROW_HEIGHT) + OVERSCAN
+    );
+
+    const fragment = document.createDocumentFragment();
+    for (let i = first; i < last; i++) {
+        const tool = rows[i];
+        const item = document.createElement('div');
+        item.className = 'tool-item';
+        item.style.top = `${i * ROW_HEIGHT + 6}px`;
+        item.innerHTML = `
+            <input type="checkbox"
+                data-tool="${tool.name}"
+                ${tool.enabled ? 'checked' : ''}
+                onchange="toggleTool('${tool.name}')">
+            <div class="tool-info">
+                <div class="tool-name">${tool.name}</div>
+                <div class="tool-description">${tool.description || 'No description'}</div>
             </div>
         `;
+        fragment.appendChild(item);
+    }
+    toolsContainer.appendChild(fragment);
 
-        toolsContainer.appendChild(section);
+    if (last >= rows.length - OVERSCAN) {
+        loadMore();
     }
 }
 